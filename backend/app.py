@@ -3,6 +3,7 @@
 # Rather than creating the app at module level, create_app() builds and returns
 # it on demand. This makes testing easier and avoids circular imports.
 
+import logging
 import os
 from flask import Flask, send_from_directory, request, make_response
 from flask_pymongo import PyMongo
@@ -28,12 +29,20 @@ from routes.admin_notification_routes import admin_notification_bp
 from routes.review_routes import review_bp
 from routes.listing_confirmation_routes import listing_confirmation_bp
 
-# APScheduler runs background jobs on a timer without needing Celery/Redis
-from apscheduler.schedulers.background import BackgroundScheduler
-from services.listing_scheduler import run_listing_confirmation_check
+from services.mpesa_inbox import shutdown as shutdown_callback_pool
+from utils.password_hasher import shutdown_password_hasher
+from services.token_revocation import register_token_checks
+from utils.logging_setup import configure_logging, shutdown_logging
+from utils.request_metrics import flush_metrics, init_request_metrics, mongo_command_listener
+from services.slow_query_log import (
+    init_slow_query_log, slow_query_listener, shutdown as shutdown_slow_query_log
+)
+from utils.mongo_routing import init_mongo_routing, primary_client_options, shutdown_mongo_routing
 
+logger = logging.getLogger(__name__)
 
-def create_app():
+
+def create_app(start_background_jobs=True):
     
     # 1. Create the Flask app and load config from config.py             
     app = Flask(__name__)
@@ -42,15 +51,41 @@ def create_app():
     # Cap incoming request size at 50 MB to prevent large upload abuse
     app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024
 
+    # Structured JSON logging through a background queue, with request ids
+    # (utils/logging_setup.py). Set up first so everything below can log.
+    configure_logging(app)
+
     # 2. Bind extensions to this app instance                          
     # init_app() is the second half of the two-step extension setup.
     # mongo  -> database access
     # bcrypt -> password hashing
     # jwt    -> token authentication
-    mongo.init_app(app)
+    # connect=False: no sockets or monitor threads until the first query, so
+    # a gunicorn master that preloads the app forks workers with a clean client
+    # event_listeners: attributes every command's time to the current request
+    # and records commands over SLOW_QUERY_THRESHOLD_MS (services/slow_query_log.py)
+    # Pool sizes and timeouts come from the MONGO_* settings in Config.
+    mongo_listeners = [mongo_command_listener, slow_query_listener]
+    mongo.init_app(
+        app,
+        connect=False,
+        event_listeners=mongo_listeners,
+        **primary_client_options(app.config)
+    )
+    # Secondary-reading client for analytics / financial / export routes
+    init_mongo_routing(app, event_listeners=mongo_listeners)
     bcrypt.init_app(app)
     jwt.init_app(app)
 
+    # Reject revoked tokens and suspended users on every @jwt_required() route
+    register_token_checks(jwt)
+
+    # Per-endpoint latency / status / MongoDB command metrics, the
+    # Server-Timing response header and GET /metrics (Prometheus format).
+    # Registered first so its timer also covers the hooks below.
+    init_request_metrics(app)
+    init_slow_query_log(app)
+
    
     # 3. Configure CORS (Cross-Origin Resource Sharing)                
     # The Angular dev server runs on port 4200. Without CORS headers the
@@ -60,7 +95,7 @@ def create_app():
             "origins": ["http://localhost:4200"],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization"],
-            "expose_headers": ["Content-Type", "Authorization"],
+            "expose_headers": ["Content-Type", "Authorization", "Server-Timing", "X-Request-ID"],
             "supports_credentials": True,  # Required when sending cookies/auth headers
             "max_age": 3600                # Browser caches preflight result for 1 hour
         }
@@ -115,13 +150,34 @@ def create_app():
         uploads_dir = os.path.join(app.root_path, 'uploads')
         return send_from_directory(uploads_dir, filename)
 
-    # ------------------------------------------------------------------ #
-    # 7. Background scheduler (APScheduler)                               #
-    # ------------------------------------------------------------------ #
-    # Runs run_listing_confirmation_check() on a timer (default every 24h).
-    # The SCHEDULER_STARTED guard prevents a second scheduler from being
-    # created when Flask restarts the server in debug/reload mode.
+    # 7. Background jobs (see start_scheduler below). Under gunicorn with
+    # preload_app the master builds the app without them and
+    # gunicorn.conf.py starts the scheduler in one worker after fork.
+    if start_background_jobs:
+        start_scheduler(app)
+
+    return app  # Caller (create_admin.py, run.py, tests, etc.) receives the ready app
+
+
+# ------------------------------------------------------------------ #
+# 7. Background scheduler (APScheduler)                               #
+# ------------------------------------------------------------------ #
+# Runs run_listing_confirmation_check() on a timer (default every 24h).
+# The SCHEDULER_STARTED guard prevents a second scheduler from being
+# created when Flask restarts the server in debug/reload mode.
+def start_scheduler(app):
     if not app.config.get("SCHEDULER_STARTED"):
+        # APScheduler runs background jobs on a timer without needing
+        # Celery/Redis. Imported here so only the process that runs the
+        # jobs pays for loading it.
+        from apscheduler.schedulers.background import BackgroundScheduler
+        from services.listing_scheduler import run_listing_confirmation_check
+        from services.notification_dispatcher import run_scheduled_notification_dispatch
+        from services.notification_archiver import run_notification_archive
+        from services.analytics_rollup import run_analytics_rollup_nightly, run_analytics_rollup_intraday
+        from services.payment_reconciler import run_payment_reconciliation
+        from services.mpesa_inbox import run_callback_inbox
+
         scheduler = BackgroundScheduler()
         scheduler.add_job(
             func=run_listing_confirmation_check,
@@ -141,18 +197,144 @@ def create_app():
                 original_func()
 
         scheduler.modify_job("listing_confirmation_check", func=_job_wrapper)
+
+        # Delivers due scheduled notifications. Only the worker elected in
+        # gunicorn.conf.py runs it; claims stay atomic, so a second host or a
+        # worker handover cannot deliver a schedule twice.
+        def _dispatch_wrapper():
+            with app.app_context():
+                run_scheduled_notification_dispatch()
+
+        scheduler.add_job(
+            func=_dispatch_wrapper,
+            trigger="interval",
+            seconds=app.config.get("SCHEDULED_NOTIFICATION_POLL_SECONDS", 60),
+            id="scheduled_notification_dispatch",
+            name="Scheduled Notification Dispatcher",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        # Moves old read notifications to the cold archive collection
+        def _archive_wrapper():
+            with app.app_context():
+                run_notification_archive()
+
+        scheduler.add_job(
+            func=_archive_wrapper,
+            trigger="interval",
+            hours=app.config.get("NOTIFICATION_ARCHIVE_INTERVAL_HOURS", 24),
+            id="notification_archive",
+            name="Notification Archiver",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        # Fills the daily_metrics rollups behind /analytics/*: the nightly run
+        # finalises past days, the intraday run keeps today fresh
+        def _rollup_nightly_wrapper():
+            with app.app_context():
+                run_analytics_rollup_nightly()
+
+        def _rollup_intraday_wrapper():
+            with app.app_context():
+                run_analytics_rollup_intraday()
+
+        scheduler.add_job(
+            func=_rollup_nightly_wrapper,
+            trigger="cron",
+            hour=app.config.get("ANALYTICS_ROLLUP_NIGHTLY_HOUR", 0),
+            minute=15,
+            timezone="UTC",
+            id="analytics_rollup_nightly",
+            name="Analytics Rollup (nightly)",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        scheduler.add_job(
+            func=_rollup_intraday_wrapper,
+            trigger="interval",
+            minutes=app.config.get("ANALYTICS_ROLLUP_INTERVAL_MINUTES", 60),
+            id="analytics_rollup_intraday",
+            name="Analytics Rollup (intraday)",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        # Settles M-Pesa payments whose callback never arrived and expires
+        # stale ones. Claims stay atomic, so a second host or a worker
+        # handover is safe
+        def _reconcile_wrapper():
+            with app.app_context():
+                run_payment_reconciliation()
+
+        scheduler.add_job(
+            func=_reconcile_wrapper,
+            trigger="interval",
+            seconds=app.config.get("PAYMENT_RECONCILE_INTERVAL_SECONDS", 30),
+            id="payment_reconciliation",
+            name="Payment Reconciler",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
+        # Applies stored M-Pesa callbacks the request-time pool did not get to
+        def _inbox_wrapper():
+            with app.app_context():
+                run_callback_inbox()
+
+        scheduler.add_job(
+            func=_inbox_wrapper,
+            trigger="interval",
+            seconds=app.config.get("MPESA_INBOX_POLL_SECONDS", 15),
+            id="mpesa_callback_inbox",
+            name="M-Pesa Callback Inbox",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+
         scheduler.start()
         app.config["SCHEDULER_STARTED"] = True
+        app.extensions["apscheduler"] = scheduler
 
-        print(f"\n[ListingScheduler] Background scheduler started "
-              f"(interval: {app.config.get('LISTING_CHECK_INTERVAL_HOURS', 24)}h)")
+        logger.info("Background scheduler started (listing check every %sh)",
+                    app.config.get('LISTING_CHECK_INTERVAL_HOURS', 24))
 
-    return app  # Caller (create_admin.py, run.py, tests, etc.) receives the ready app
+    return app.extensions["apscheduler"]
+
+
+def shutdown_background_work(app):
+    """
+    Stop background work started by this process so nothing is cut off
+    mid-write: running scheduler jobs finish, queued M-Pesa callbacks are
+    applied, the password hashing pool is drained, and queued slow query
+    records, this worker's metrics and log lines are written. Called from gunicorn's worker_exit
+    hook.
+    """
+    scheduler = app.extensions.get("apscheduler")
+    if scheduler is not None and scheduler.running:
+        scheduler.shutdown(wait=True)
+        app.config["SCHEDULER_STARTED"] = False
+
+    shutdown_callback_pool()
+    shutdown_password_hasher()
+    shutdown_slow_query_log()
+    flush_metrics(app)
+
+    mongo.cx.close()
+    shutdown_mongo_routing()
+    shutdown_logging()
 
 
 # 8. Direct execution entry point                                     
 # Only runs when you do: python app.py
-# Production deployments (gunicorn, etc.) call create_app() directly
+# Production deployments serve wsgi:app with gunicorn (see gunicorn.conf.py)
 # and never reach this block.
 if __name__ == "__main__":
     app = create_app()
@@ -161,11 +343,7 @@ if __name__ == "__main__":
     os.makedirs('uploads/images', exist_ok=True)
     os.makedirs('uploads/videos', exist_ok=True)
 
-    print("\n" + "="*50)
-    print("Flask server starting...")
-    print("API URL: http://localhost:5000")
-    print("Uploads folder: ./uploads")
-    print("="*50 + "\n")
+    logger.info("Flask server starting on http://localhost:5000 (uploads in ./uploads)")
 
     # host="0.0.0.0" makes the server reachable on the local network,
     # not just localhost. debug=True enables auto-reload on code changes.
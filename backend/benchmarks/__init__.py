@@ -0,0 +1,27 @@
+# backend/benchmarks/__init__.py
+"""
+End-to-end load benchmarks against a seeded local MongoDB.
+
+1. Seed a dedicated database with synthetic data (deterministic for a given
+   --seed; --scale 0.01 gives a quick 1% dataset):
+
+       python -m benchmarks.seed --uri mongodb://localhost:27017/house_hunting_bench \\
+           --drop --manifest bench_manifest.json
+
+2. Serve the app on that database with rate limiting off:
+
+       MONGO_URI=mongodb://localhost:27017/house_hunting_bench RATE_LIMIT_ENABLED=false \\
+           gunicorn -c gunicorn.conf.py wsgi:app
+
+3. Drive it with concurrent clients and keep the JSON report:
+
+       python -m benchmarks.run --manifest bench_manifest.json --concurrency 64 \\
+           --duration 60 --out bench-$(git rev-parse --short HEAD).json
+
+4. Compare two runs, e.g. before / after a change:
+
+       python -m benchmarks.run --compare bench-abc123.json bench-def456.json
+
+The booking_create scenario writes bookings and notifications, so reseed
+between runs that are going to be compared.
+"""
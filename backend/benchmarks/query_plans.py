@@ -0,0 +1,233 @@
+# backend/benchmarks/query_plans.py
+"""
+Query-plan regression check for the hot routes.
+
+    python -m benchmarks.query_plans --uri mongodb://localhost:27017/house_hunting_bench
+    python -m benchmarks.query_plans --manifest bench_manifest.json --max-examined-ratio 5 --out plans.json
+
+Runs against a database seeded by benchmarks.seed. It:
+
+  1. applies utils/create_indexes.py (skip with --skip-indexes), so the
+     check covers the indexes in the working tree;
+  2. sends one request to each route in HOT_ROUTES through the Flask test
+     client, while a pymongo CommandListener records the exact filter, sort
+     and projection (or pipeline) of every query the route issues;
+  3. explains each recorded query with executionStats and fails it when the
+     winning plan has a COLLSCAN, an in-memory SORT stage, or examines more
+     than --max-examined-ratio documents per document returned.
+
+A route's "allow" list exempts it from individual checks ("collscan",
+"in_memory_sort", "examined_ratio") — for a query that is known to be fine,
+say a scan of a small collection. Exits with status 1 when any query fails.
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+
+from pymongo import monitoring
+
+from services.slow_query_log import EXPLAINABLE_COMMANDS, explain_command, plan_summary
+
+# Routes in property_routes, booking_routes and notification_routes that run
+# on most page loads. Paths are formatted with {property_id}; role picks the
+# account from the manifest whose token the request carries.
+HOT_ROUTES = [
+    {"name": "property_list", "role": None, "method": "GET",
+     "path": "/properties/?page=1&per_page=12"},
+    {"name": "property_search", "role": None, "method": "POST", "path": "/properties/search",
+     "body": {"city": "Nairobi", "property_types": ["apartment"], "min_price": 20000,
+              "max_price": 80000, "page": 1, "per_page": 12}},
+    {"name": "property_nearby", "role": None, "method": "POST", "path": "/properties/nearby",
+     "body": {"latitude": -1.2864, "longitude": 36.8172, "radius_km": 5, "page": 1, "per_page": 20}},
+    {"name": "property_detail", "role": None, "method": "GET", "path": "/properties/{property_id}"},
+    {"name": "property_filter_options", "role": None, "method": "GET", "path": "/properties/filters/options"},
+    {"name": "landlord_properties", "role": "landlord", "method": "GET",
+     "path": "/properties/landlord/my-properties"},
+    {"name": "landlord_bookings", "role": "landlord", "method": "GET",
+     "path": "/bookings/landlord/my-bookings?page=1&per_page=20"},
+    {"name": "landlord_pending_bookings", "role": "landlord", "method": "GET",
+     "path": "/bookings/landlord/my-bookings?status=pending&page=1&per_page=20"},
+    {"name": "landlord_booking_stats", "role": "landlord", "method": "GET",
+     "path": "/bookings/landlord/statistics"},
+    {"name": "landlord_upcoming", "role": "landlord", "method": "GET", "path": "/bookings/landlord/upcoming"},
+    {"name": "tenant_bookings", "role": "tenant", "method": "GET",
+     "path": "/bookings/tenant/my-bookings?page=1&per_page=20"},
+    {"name": "tenant_booking_stats", "role": "tenant", "method": "GET", "path": "/bookings/tenant/statistics"},
+    {"name": "tenant_upcoming", "role": "tenant", "method": "GET", "path": "/bookings/tenant/upcoming"},
+    {"name": "notifications", "role": "tenant", "method": "GET", "path": "/notifications/?page=1&per_page=20"},
+    {"name": "notifications_unread", "role": "tenant", "method": "GET",
+     "path": "/notifications/?is_read=false&page=1&per_page=20"},
+    {"name": "notification_unread_count", "role": "tenant", "method": "GET", "path": "/notifications/unread-count"},
+]
+
+# Collections queried by request plumbing (token checks, rate limits,
+# monitoring) rather than by the route itself
+IGNORED_COLLECTIONS = {"token_revocations", "rate_limit_counters", "slow_queries"}
+
+DEFAULT_MAX_EXAMINED_RATIO = 10
+
+
+class QueryRecorder(monitoring.CommandListener):
+    """Keeps a copy of every explainable command issued while `route` is set"""
+
+    def __init__(self):
+        self.route = None
+        self.commands = []
+
+    def started(self, event):
+        if self.route is None or event.command_name not in EXPLAINABLE_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if collection in IGNORED_COLLECTIONS:
+            return
+        self.commands.append({
+            "route": self.route,
+            "command_name": event.command_name,
+            "database": event.database_name,
+            "collection": collection,
+            "command": copy.deepcopy(event.command),
+        })
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _execution_stats(node):
+    """First executionStats block in an explain result (the query stage)"""
+    if isinstance(node, dict):
+        if "executionStats" in node:
+            return node["executionStats"]
+        for value in node.values():
+            found = _execution_stats(value)
+            if found is not None:
+                return found
+    elif isinstance(node, list):
+        for value in node:
+            found = _execution_stats(value)
+            if found is not None:
+                return found
+    return None
+
+
+def _query_parts(command_name, command):
+    """The parts of a command a reviewer cares about"""
+    keys = ("filter", "sort", "projection", "limit", "skip", "pipeline", "query", "key", "hint")
+    return {key: command[key] for key in keys if key in command}
+
+
+def check_query(recorded, max_ratio, allow):
+    explain = explain_command(recorded["database"], recorded["command_name"],
+                              recorded["command"], verbosity="executionStats")
+    plan = plan_summary(explain)
+    stats = _execution_stats(explain) or {}
+    examined = stats.get("totalDocsExamined", 0)
+    returned = stats.get("nReturned", 0)
+
+    problems = []
+    if plan["collscan"] and "collscan" not in allow:
+        problems.append("COLLSCAN")
+    if plan["in_memory_sort"] and "in_memory_sort" not in allow:
+        problems.append("in-memory SORT")
+    if examined > max_ratio * max(returned, 1) and "examined_ratio" not in allow:
+        problems.append(f"examined {examined} docs for {returned} returned")
+    return {
+        "route": recorded["route"],
+        "collection": recorded["collection"],
+        "command": recorded["command_name"],
+        "query": _query_parts(recorded["command_name"], recorded["command"]),
+        "stages": plan["stages"],
+        "indexes": plan["indexes"],
+        "docs_examined": examined,
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "returned": returned,
+        "problems": problems,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when a hot route's query plan regresses")
+    parser.add_argument("--uri", default="mongodb://localhost:27017/house_hunting_bench")
+    parser.add_argument("--manifest", default="bench_manifest.json", help="written by benchmarks.seed")
+    parser.add_argument("--max-examined-ratio", type=float, default=DEFAULT_MAX_EXAMINED_RATIO)
+    parser.add_argument("--skip-indexes", action="store_true", help="do not apply create_indexes first")
+    parser.add_argument("--out", help="write the JSON report here as well")
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+
+    # Before the app (and Config) is imported; registered listeners apply to
+    # every MongoClient created afterwards, including the app's
+    os.environ["MONGO_URI"] = args.uri
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    recorder = QueryRecorder()
+    monitoring.register(recorder)
+
+    from app import create_app
+    app = create_app(start_background_jobs=False)
+    client = app.test_client()
+
+    if not args.skip_indexes:
+        from utils.create_indexes import create_all_indexes
+        with app.app_context():
+            create_all_indexes()
+
+    accounts = {"tenant": manifest["tenants"][0], "landlord": manifest["landlords"][0]}
+    tokens = {}
+    for role, email in accounts.items():
+        response = client.post("/auth/login", json={"email": email, "password": manifest["password"]})
+        if response.status_code != 200:
+            sys.exit(f"Login failed for {email}: {response.status_code} {response.get_data(as_text=True)[:200]}")
+        tokens[role] = response.get_json()["access_token"]
+
+    params = {"property_id": manifest["property_ids"][0]}
+    statuses = {}
+    for route in HOT_ROUTES:
+        headers = {"Authorization": f"Bearer {tokens[route['role']]}"} if route["role"] else {}
+        recorder.route = route["name"]
+        response = client.open(route["path"].format(**params), method=route["method"],
+                               json=route.get("body"), headers=headers)
+        recorder.route = None
+        statuses[route["name"]] = response.status_code
+
+    allow = {route["name"]: set(route.get("allow", [])) for route in HOT_ROUTES}
+    with app.app_context():
+        results = [check_query(recorded, args.max_examined_ratio, allow[recorded["route"]])
+                   for recorded in recorder.commands]
+
+    failures = [r for r in results if r["problems"]]
+    for name, status in statuses.items():
+        if status >= 400:
+            failures.append({"route": name, "problems": [f"request returned {status}"]})
+    covered = {r["route"] for r in results}
+
+    for r in results:
+        verdict = "FAIL " + "; ".join(r["problems"]) if r["problems"] else "ok"
+        print(f"{r['route']:<28} {r['command']:<10} {r['collection'] or '-':<14} "
+              f"{'>'.join(r['stages']) or '-':<32} examined {r['docs_examined']:>7} "
+              f"returned {r['returned']:>5}  {verdict}")
+    for name in statuses:
+        if name not in covered:
+            print(f"{name:<28} (no queries recorded)")
+
+    report = {
+        "max_examined_ratio": args.max_examined_ratio,
+        "statuses": statuses,
+        "queries": results,
+        "failures": failures,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    print(f"{len(results)} queries from {len(covered)} routes, {len(failures)} failing")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
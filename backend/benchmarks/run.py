@@ -0,0 +1,225 @@
+# backend/benchmarks/run.py
+"""
+Scenario runner for the load benchmarks (see benchmarks/__init__.py).
+
+    python -m benchmarks.run --manifest bench_manifest.json --concurrency 64 --duration 60 --out run.json
+    python -m benchmarks.run --manifest bench_manifest.json --scenarios search,nearby
+    python -m benchmarks.run --compare base.json new.json --max-regression 15
+
+Each virtual user logs in as its own tenant / landlord / admin from the
+manifest (before the clock starts), then picks scenarios from
+benchmarks.scenarios.SCENARIOS by weight until --duration runs out. Requests
+made during the first --warmup seconds are not counted.
+
+The JSON report has, per request name, the request count, throughput,
+p50 / p95 / p99 / max latency, errors (5xx and transport failures) and the
+status code mix, plus the git commit and dataset it was measured on.
+--compare prints two reports side by side and, with --max-regression, exits
+with status 1 when any request's p95 got more than that many percent slower.
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from benchmarks.scenarios import SCENARIOS
+
+MIN_SAMPLES_TO_COMPARE = 20      # ignore requests too rare to have a stable p95
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _login(base_url, email, password):
+    response = requests.post(f"{base_url}/auth/login", json={"email": email, "password": password}, timeout=30)
+    if response.status_code != 200:
+        raise RuntimeError(f"Login failed for {email}: {response.status_code} {response.text[:200]}")
+    return response.json()["access_token"]
+
+
+def _tokens(base_url, manifest, concurrency, roles):
+    """Per virtual user: {role: token}, one login per distinct account"""
+    cache = {}
+    accounts = {"tenant": manifest["tenants"], "landlord": manifest["landlords"], "admin": manifest["admins"]}
+    per_user = []
+    for i in range(concurrency):
+        tokens = {}
+        for role in roles:
+            email = accounts[role][i % len(accounts[role])]
+            if email not in cache:
+                cache[email] = _login(base_url, email, manifest["password"])
+            tokens[role] = cache[email]
+        per_user.append(tokens)
+    return per_user
+
+
+def run(base_url, manifest, concurrency, duration, warmup, scenario_names, timeout, seed):
+    scenarios = {name: SCENARIOS[name] for name in scenario_names}
+    names = list(scenarios)
+    weights = [scenarios[name][0] for name in names]
+    roles = sorted({role for _, role, _ in scenarios.values() if role})
+    tokens = _tokens(base_url, manifest, concurrency, roles)
+
+    results = {}
+    lock = threading.Lock()
+    started = time.monotonic()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    def virtual_user(index):
+        rng = random.Random(seed * 10_007 + index)
+        session = requests.Session()
+        local = {}
+        while time.monotonic() < deadline:
+            scenario = rng.choices(names, weights=weights)[0]
+            _, role, steps = scenarios[scenario]
+            headers = {"Authorization": f"Bearer {tokens[index][role]}"} if role else {}
+            for name, method, path, body in steps(manifest, rng):
+                request_started = time.monotonic()
+                try:
+                    response = session.request(method, base_url + path, json=body,
+                                               headers=headers, timeout=timeout)
+                    status = str(response.status_code)
+                    failed = response.status_code >= 500
+                except requests.RequestException:
+                    status, failed = "exception", True
+                finished = time.monotonic()
+                if request_started < measure_from or finished > deadline:
+                    continue
+                stats = local.setdefault(name, {"latencies": [], "errors": 0, "status": {}})
+                stats["latencies"].append(finished - request_started)
+                stats["errors"] += 1 if failed else 0
+                stats["status"][status] = stats["status"].get(status, 0) + 1
+        with lock:
+            for name, stats in local.items():
+                merged = results.setdefault(name, {"latencies": [], "errors": 0, "status": {}})
+                merged["latencies"].extend(stats["latencies"])
+                merged["errors"] += stats["errors"]
+                for status, count in stats["status"].items():
+                    merged["status"][status] = merged["status"].get(status, 0) + count
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(virtual_user, i) for i in range(concurrency)]:
+            future.result()
+
+    ms = lambda seconds: round(seconds * 1000, 1)
+    report = {
+        "meta": {
+            "url": base_url,
+            "commit": _git("rev-parse", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "started_at": datetime.utcnow().isoformat(),
+            "concurrency": concurrency,
+            "duration_s": duration,
+            "warmup_s": warmup,
+            "scenarios": names,
+            "seed": seed,
+            "dataset": {k: manifest.get(k) for k in ("database", "seed", "scale", "counts")},
+        },
+        "requests": {},
+    }
+    total = errors = 0
+    for name, stats in sorted(results.items()):
+        latencies = stats["latencies"]
+        total += len(latencies)
+        errors += stats["errors"]
+        report["requests"][name] = {
+            "count": len(latencies),
+            "rps": round(len(latencies) / duration, 1),
+            "p50_ms": ms(percentile(latencies, 50)),
+            "p95_ms": ms(percentile(latencies, 95)),
+            "p99_ms": ms(percentile(latencies, 99)),
+            "max_ms": ms(max(latencies)),
+            "errors": stats["errors"],
+            "status": stats["status"],
+        }
+    report["total"] = {"count": total, "rps": round(total / duration, 1), "errors": errors}
+    return report
+
+
+def compare(base_path, new_path, max_regression=None):
+    """Print two reports side by side; returns the requests whose p95 regressed"""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    def change(old, now):
+        return f"{(now - old) / old * 100:+.0f}%" if old else "   n/a"
+
+    print(f"base: {base['meta'].get('commit')}  new: {new['meta'].get('commit')}")
+    print(f"{'request':<26}{'rps':>18}{'p50 ms':>22}{'p95 ms':>22}{'p99 ms':>22}{'errors':>12}")
+    regressions = []
+    for name in sorted(set(base["requests"]) | set(new["requests"])):
+        b, n = base["requests"].get(name), new["requests"].get(name)
+        if not b or not n:
+            print(f"{name:<26}{'only in ' + ('new' if n else 'base'):>18}")
+            continue
+        row = f"{name:<26}{b['rps']:>7} → {n['rps']:<7}{change(b['rps'], n['rps']):>3}"
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            row += f"{b[key]:>8} → {n[key]:<8}{change(b[key], n[key]):>5}"
+        row += f"{b['errors']:>5} → {n['errors']}"
+        print(row)
+        if (max_regression is not None and min(b["count"], n["count"]) >= MIN_SAMPLES_TO_COMPARE
+                and b["p95_ms"] and (n["p95_ms"] - b["p95_ms"]) / b["p95_ms"] * 100 > max_regression):
+            regressions.append(name)
+    print(f"{'total':<26}{base['total']['rps']:>7} → {new['total']['rps']:<7}"
+          f"{change(base['total']['rps'], new['total']['rps']):>3}")
+    if regressions:
+        print(f"p95 regressed more than {max_regression}%: {', '.join(regressions)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the load benchmark scenarios")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--manifest", default="bench_manifest.json", help="written by benchmarks.seed")
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    parser.add_argument("--duration", type=int, default=60, help="measured seconds")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured seconds before that")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated subset")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write the JSON report here as well")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two saved reports")
+    parser.add_argument("--max-regression", type=float, help="with --compare: fail above this p95 increase (%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        raise SystemExit(1 if compare(*args.compare, args.max_regression) else 0)
+
+    scenario_names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    report = run(args.url.rstrip("/"), manifest, args.concurrency, args.duration,
+                 args.warmup, scenario_names, args.timeout, args.seed)
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
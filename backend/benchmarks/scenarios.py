@@ -0,0 +1,95 @@
+# backend/benchmarks/scenarios.py
+"""
+The user flows benchmarks.run drives.
+
+Each scenario is (weight, role, steps). A virtual user repeatedly picks a
+scenario by weight and runs its steps in order; steps are
+(request name, method, path, JSON body) and are timed individually. role is
+the account whose token the requests carry (None for public endpoints).
+"""
+
+from datetime import datetime, timedelta
+
+PROPERTY_TYPES = ["apartment", "house", "studio", "condo", "townhouse", "villa"]
+
+
+def _search(manifest, rng):
+    body = {"page": rng.randint(1, 3), "per_page": 12}
+    if rng.random() < 0.8:
+        body["city"] = rng.choice(list(manifest["cities"]))
+    if rng.random() < 0.5:
+        body["property_types"] = rng.sample(PROPERTY_TYPES, rng.randint(1, 2))
+    if rng.random() < 0.6:
+        low = rng.choice([10_000, 20_000, 40_000, 80_000])
+        body["min_price"], body["max_price"] = low, low * rng.choice([2, 3, 5])
+    if rng.random() < 0.3:
+        body["min_bedrooms"] = rng.randint(1, 3)
+    return [("search", "POST", "/properties/search", body)]
+
+
+def _nearby(manifest, rng):
+    lat, lon = manifest["cities"][rng.choice(list(manifest["cities"]))]
+    body = {
+        "latitude": lat + rng.uniform(-0.05, 0.05),
+        "longitude": lon + rng.uniform(-0.05, 0.05),
+        "radius_km": rng.choice([2, 5, 10, 20]),
+        "page": 1,
+        "per_page": 20,
+    }
+    if rng.random() < 0.3:
+        body["property_type"] = rng.choice(PROPERTY_TYPES)
+    return [("nearby", "POST", "/properties/nearby", body)]
+
+
+def _browse(manifest, rng):
+    return [("list", "GET", f"/properties/?page={rng.randint(1, 20)}&per_page=12", None)]
+
+
+def _detail(manifest, rng):
+    property_id = rng.choice(manifest["property_ids"])
+    return [("detail", "GET", f"/properties/{property_id}", None)]
+
+
+def _booking_create(manifest, rng):
+    booking_date = (datetime.now() + timedelta(days=rng.randint(1, 60))).strftime("%Y-%m-%d")
+    body = {
+        "property_id": rng.choice(manifest["property_ids"]),
+        "booking_type": rng.choice(["viewing", "rental_inquiry"]),
+        "booking_date": booking_date,
+        "booking_time": f"{rng.randint(8, 17):02d}:00",
+        "tenant_name": "Bench Tenant",
+        "tenant_email": "tenant@bench.example",
+        "tenant_phone": "254712345678",
+        "message": "Benchmark booking",
+    }
+    return [("booking_create", "POST", "/bookings/tenant/create", body)]
+
+
+def _landlord_dashboard(manifest, rng):
+    return [
+        ("landlord_properties", "GET", "/properties/landlord/my-properties", None),
+        ("landlord_bookings", "GET", "/bookings/landlord/my-bookings?page=1&per_page=20", None),
+        ("landlord_booking_stats", "GET", "/bookings/landlord/statistics", None),
+        ("landlord_subscription", "GET", "/subscription/current", None),
+    ]
+
+
+def _admin_analytics(manifest, rng):
+    return [
+        ("admin_dashboard", "GET", "/admin/dashboard/stats", None),
+        ("admin_analytics_summary", "GET", "/analytics/summary", None),
+        ("admin_booking_trends", "GET", "/analytics/bookings/trends", None),
+        ("admin_financial_overview", "GET", "/financial/overview", None),
+    ]
+
+
+# name -> (weight, role, steps(manifest, rng))
+SCENARIOS = {
+    "search":             (30, None, _search),
+    "nearby":             (20, None, _nearby),
+    "browse":             (10, None, _browse),
+    "detail":             (20, None, _detail),
+    "booking_create":     (5, "tenant", _booking_create),
+    "landlord_dashboard": (10, "landlord", _landlord_dashboard),
+    "admin_analytics":    (5, "admin", _admin_analytics),
+}
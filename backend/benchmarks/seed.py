@@ -0,0 +1,503 @@
+# backend/benchmarks/seed.py
+"""
+Synthetic data generator for the load benchmarks.
+
+    python -m benchmarks.seed --uri mongodb://localhost:27017/house_hunting_bench --drop
+    python -m benchmarks.seed --uri ... --drop --scale 0.01       # 1% dataset
+    python -m benchmarks.seed --uri ... --drop --workers 8 --seed 7
+
+At --scale 1 it writes DEFAULT_COUNTS: 100k properties spread over Kenyan
+cities (coordinates, amenities, prices by type), 1M bookings skewed towards
+popular listings, 5M notifications, 200k reviews and 100k subscription
+payments, owned by 5k landlords and 50k tenants. Every document has an _id
+whose timestamp matches its created_at, like real data.
+
+After the raw collections it creates the app's indexes and builds the
+derived data the endpoints read (ledger, daily analytics rollups, review
+stats, usage counters) with the same code the app uses.
+
+All users share BENCH_PASSWORD. The manifest written at the end (--manifest)
+lists sample accounts and property ids for benchmarks.run.
+
+Refuses to write into a database that already has users unless --drop is
+given, and --drop only ever drops the collections listed in
+SEEDED_COLLECTIONS.
+"""
+
+import argparse
+import calendar
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import MongoClient
+
+
+# ──────────────────────────────────────────────────────────
+# DATASET SHAPE
+# ──────────────────────────────────────────────────────────
+BENCH_PASSWORD = "benchpass123"
+
+DEFAULT_COUNTS = {
+    "admins": 5,
+    "landlords": 5_000,
+    "tenants": 50_000,
+    "properties": 100_000,
+    "bookings": 1_000_000,
+    "notifications": 5_000_000,
+    "reviews": 200_000,
+    "payments": 100_000,
+}
+
+SEEDED_COLLECTIONS = [
+    "users", "properties", "bookings", "notifications", "notifications_archive",
+    "reviews", "payments", "ledger_entries", "ledger_daily", "daily_metrics",
+    "analytics_rollup_state", "favourites", "token_revocations",
+    "rate_limit_counters", "slow_queries",
+]
+
+# city -> (state, latitude, longitude, share of listings)
+CITIES = {
+    "Nairobi":  ("Nairobi County",  -1.2864, 36.8172, 40),
+    "Mombasa":  ("Mombasa County",  -4.0435, 39.6682, 15),
+    "Kisumu":   ("Kisumu County",   -0.0917, 34.7680, 10),
+    "Nakuru":   ("Nakuru County",   -0.3031, 36.0800, 10),
+    "Eldoret":  ("Uasin Gishu",      0.5143, 35.2698, 8),
+    "Thika":    ("Kiambu County",   -1.0333, 37.0693, 7),
+    "Nyeri":    ("Nyeri County",    -0.4201, 36.9476, 5),
+    "Machakos": ("Machakos County", -1.5177, 37.2634, 5),
+}
+CITY_SPREAD_DEGREES = 0.15       # listings fall within roughly 15 km of the centre
+
+# property_type -> (min monthly rent, max monthly rent, max bedrooms, share)
+PROPERTY_TYPES = {
+    "studio":    (8_000, 25_000, 1, 20),
+    "apartment": (15_000, 120_000, 4, 40),
+    "condo":     (40_000, 180_000, 4, 8),
+    "house":     (30_000, 300_000, 6, 20),
+    "townhouse": (60_000, 250_000, 5, 8),
+    "villa":     (150_000, 800_000, 8, 4),
+}
+
+AMENITIES = [
+    "WiFi", "Parking", "Swimming Pool", "Gym", "Security", "Backup Generator",
+    "Borehole", "Balcony", "Garden", "Elevator", "CCTV", "Furnished",
+    "Pet Friendly", "Air Conditioning", "Laundry",
+]
+
+NOTIFICATION_TYPES = [
+    "new_booking", "booking_confirmed", "booking_rejected", "booking_cancelled",
+    "new_review", "payment_received", "subscription_expiring", "system",
+]
+
+BATCH_SIZE = 5_000               # documents per insert_many
+CHUNK_SIZE = 50_000              # documents per worker task
+DAY = timedelta(days=1)
+
+
+# ──────────────────────────────────────────────────────────
+# HELPERS
+# ──────────────────────────────────────────────────────────
+def _oid(rng, when):
+    """ObjectId whose embedded timestamp is *when*"""
+    seconds = calendar.timegm(when.utctimetuple())
+    return ObjectId(seconds.to_bytes(4, "big") + rng.getrandbits(64).to_bytes(8, "big"))
+
+
+def _ago(rng, now, max_days):
+    return now - timedelta(seconds=rng.uniform(0, max_days * 86400))
+
+
+def _weighted(rng, table):
+    names = list(table)
+    return rng.choices(names, weights=[table[n][-1] for n in names])[0]
+
+
+def _insert(collection, docs):
+    for start in range(0, len(docs), BATCH_SIZE):
+        collection.insert_many(docs[start:start + BATCH_SIZE], ordered=False)
+
+
+# ──────────────────────────────────────────────────────────
+# USERS AND PROPERTIES (built in the parent; later collections refer to them)
+# ──────────────────────────────────────────────────────────
+def build_users(rng, counts, now, password_hash, tiers):
+    users = []
+    for role in ("admin", "landlord", "tenant"):
+        for i in range(counts[role + "s"]):
+            created_at = _ago(rng, now, 730)
+            user = {
+                "_id": _oid(rng, created_at),
+                "email": f"{role}{i}@bench.example",
+                "password": password_hash,
+                "role": role,
+                "name": f"Bench {role.title()} {i}",
+                "phone": f"2547{rng.randint(10_000_000, 99_999_999)}",
+                "is_verified": True,
+                "is_suspended": False,
+                "created_at": created_at,
+            }
+            if role == "landlord":
+                tier = rng.choices(["free", "basic", "premium"], weights=[40, 40, 20])[0]
+                user["subscription"] = {
+                    "tier": tier,
+                    "status": "active",
+                    "billing_cycle": "monthly",
+                    "started_at": now - timedelta(days=rng.randint(1, 29)),
+                    "expires_at": now + timedelta(days=rng.randint(1, 30)),
+                    "auto_renew": True,
+                    "price": tiers[tier]["price"],
+                    "currency": tiers[tier]["currency"],
+                }
+            users.append(user)
+    return users
+
+
+def build_properties(rng, count, landlords, now):
+    properties = []
+    for i in range(count):
+        city = _weighted(rng, CITIES)
+        state, lat, lon, _ = CITIES[city]
+        property_type = _weighted(rng, PROPERTY_TYPES)
+        min_price, max_price, max_bedrooms, _ = PROPERTY_TYPES[property_type]
+        bedrooms = 0 if property_type == "studio" else rng.randint(1, max_bedrooms)
+        created_at = _ago(rng, now, 365)
+        status = rng.choices(["active", "pending", "inactive"], weights=[85, 5, 10])[0]
+        moderation_status = {"active": "approved", "pending": "pending_review", "inactive": "rejected"}[status]
+        landlord = landlords[int(len(landlords) * rng.random() ** 1.5)]   # some landlords own many
+        properties.append({
+            "_id": _oid(rng, created_at),
+            "landlord_id": str(landlord["_id"]),
+            "title": f"{bedrooms or 'Studio'} bedroom {property_type} in {city}",
+            "description": f"Well kept {property_type} close to amenities in {city}. " * 3,
+            "property_type": property_type,
+            "address": f"{rng.randint(1, 999)} Bench Road",
+            "city": city,
+            "state": state,
+            "zip_code": f"{rng.randint(100, 999)}00",
+            "country": "Kenya",
+            "latitude": round(lat + rng.uniform(-CITY_SPREAD_DEGREES, CITY_SPREAD_DEGREES), 6),
+            "longitude": round(lon + rng.uniform(-CITY_SPREAD_DEGREES, CITY_SPREAD_DEGREES), 6),
+            "price": round(rng.uniform(min_price, max_price), -2),
+            "bedrooms": bedrooms,
+            "bathrooms": max(1, bedrooms - rng.randint(0, 1)),
+            "area_sqft": rng.randint(300, 600) + bedrooms * rng.randint(250, 450),
+            "images": [f"https://res.cloudinary.com/bench/image/upload/p{i}_{n}.jpg"
+                       for n in range(rng.randint(1, 6))],
+            "videos": [],
+            "amenities": rng.sample(AMENITIES, rng.randint(2, 8)),
+            "status": status,
+            "is_featured": rng.random() < 0.05,
+            "views": int(rng.paretovariate(1.2) * 10),
+            "moderation_status": moderation_status,
+            "moderation_score": rng.randint(40, 100),
+            "moderation_issues": [],
+            "moderation_notes": "Seeded",
+            "moderated_at": created_at,
+            "moderated_by": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "last_confirmed_at": _ago(rng, now, 30),
+        })
+    return properties
+
+
+# ──────────────────────────────────────────────────────────
+# BULK COLLECTIONS (generated in worker processes)
+# ──────────────────────────────────────────────────────────
+_ctx = {}
+
+
+def _init_worker(uri, context):
+    _ctx.update(context)
+    _ctx["db"] = MongoClient(uri).get_default_database()
+
+
+def _pick_property(rng):
+    # Squared uniform: a minority of listings gets most of the bookings
+    return int(len(_ctx["properties"]) * rng.random() ** 2)
+
+
+def _bookings(rng, count, now):
+    docs = []
+    for _ in range(count):
+        property_id, landlord_id, landlord_tier, snapshot = _ctx["properties"][_pick_property(rng)]
+        tenant_id, tenant_email = rng.choice(_ctx["tenants"])
+        created_at = _ago(rng, now, 365)
+        status = rng.choices(
+            ["pending", "confirmed", "completed", "cancelled", "rejected"],
+            weights=[15, 30, 40, 10, 5]
+        )[0]
+        booking_date = created_at + timedelta(days=rng.randint(1, 30))
+        docs.append({
+            "_id": _oid(rng, created_at),
+            "property_id": property_id,
+            "tenant_id": tenant_id,
+            "landlord_id": landlord_id,
+            "booking_type": rng.choices(["viewing", "rental_inquiry"], weights=[75, 25])[0],
+            "booking_date": booking_date.strftime("%Y-%m-%d"),
+            "booking_time": f"{rng.randint(8, 17):02d}:{rng.choice(['00', '30'])}",
+            "status": status,
+            "tenant_name": tenant_email.split("@")[0],
+            "tenant_email": tenant_email,
+            "tenant_phone": f"2547{rng.randint(10_000_000, 99_999_999)}",
+            "message": "I would like to view this property.",
+            "notes": None,
+            "cancellation_reason": "Changed plans" if status == "cancelled" else None,
+            "rejection_reason": "Not available" if status == "rejected" else None,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "confirmed_at": created_at + DAY if status in ("confirmed", "completed") else None,
+            "completed_at": booking_date if status == "completed" else None,
+            "cancelled_at": created_at + DAY if status == "cancelled" else None,
+            "property_snapshot": snapshot,
+            "landlord_tier": landlord_tier,
+        })
+    return {"bookings": docs}
+
+
+def _notifications(rng, count, now):
+    docs = []
+    for _ in range(count):
+        user_id = rng.choice(_ctx["user_ids"])
+        created_at = _ago(rng, now, 80)
+        is_read = rng.random() < 0.7
+        notification_type = rng.choice(NOTIFICATION_TYPES)
+        docs.append({
+            "_id": _oid(rng, created_at),
+            "user_id": user_id,
+            "notification_type": notification_type,
+            "title": notification_type.replace("_", " ").title(),
+            "message": "Seeded notification for load testing.",
+            "link": "/notifications",
+            "data": {},
+            "is_read": is_read,
+            "read_at": created_at + timedelta(hours=rng.randint(1, 72)) if is_read else None,
+            "created_at": created_at,
+            "expires_at": created_at + timedelta(days=90),
+        })
+    return {"notifications": docs}
+
+
+def _reviews(rng, count, now):
+    docs = []
+    for _ in range(count):
+        property_id, landlord_id, _, snapshot = _ctx["properties"][_pick_property(rng)]
+        tenant_id, tenant_email = rng.choice(_ctx["tenants"])
+        rating = rng.choices([1, 2, 3, 4, 5], weights=[5, 7, 15, 35, 38])[0]
+        created_at = _ago(rng, now, 365)
+        docs.append({
+            "_id": _oid(rng, created_at),
+            "tenant_id": tenant_id,
+            "tenant_email": tenant_email,
+            "tenant_name": f"{tenant_email[0].upper()}***",
+            "landlord_id": landlord_id,
+            "property_id": property_id,
+            "property_title": f"{snapshot['property_type'].title()} in {snapshot['city']}",
+            "rating": float(rating),
+            "title": "Seeded review",
+            "comment": "Seeded review text for load testing purposes.",
+            "categories": {
+                category: float(min(5, max(1, rating + rng.randint(-1, 1))))
+                for category in ("communication", "responsiveness", "property_accuracy",
+                                 "cleanliness", "value_for_money")
+            },
+            "is_verified": True,
+            "is_public": True,
+            "helpful_count": rng.randint(0, 20),
+            "reported_count": 0,
+            "status": "active" if rng.random() < 0.97 else "hidden",
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+    return {"reviews": docs}
+
+
+def _payments(rng, count, now):
+    from services.ledger_service import build_entry
+
+    payments, ledger = [], []
+    for _ in range(count):
+        landlord_id, landlord_email = rng.choice(_ctx["landlords"])
+        tier = rng.choices(["basic", "premium"], weights=[70, 30])[0]
+        billing_cycle = rng.choices(["monthly", "annual"], weights=[85, 15])[0]
+        created_at = _ago(rng, now, 365)
+        status = rng.choices(["completed", "pending", "failed"], weights=[85, 5, 10])[0]
+        start = created_at
+        end = start + timedelta(days=30 if billing_cycle == "monthly" else 365)
+        payment = {
+            "_id": _oid(rng, created_at),
+            "landlord_id": landlord_id,
+            "type": "subscription",
+            "tier": tier,
+            "amount": _ctx["tiers"][tier]["price"],
+            "currency": _ctx["tiers"][tier]["currency"],
+            "billing_cycle": billing_cycle,
+            "status": status,
+            "created_at": created_at,
+            "subscription_period": {"start": start, "end": end},
+        }
+        if status == "completed":
+            payment["completed_at"] = created_at + timedelta(minutes=rng.randint(1, 10))
+            ledger.append(build_entry(payment, payment["completed_at"], "seed", landlord_email))
+        payments.append(payment)
+    return {"payments": payments, "ledger_entries": ledger}
+
+
+GENERATORS = {
+    "bookings": _bookings,
+    "notifications": _notifications,
+    "reviews": _reviews,
+    "payments": _payments,
+}
+
+
+def _seed_chunk(kind, count, seed, now):
+    rng = random.Random(seed)
+    written = {}
+    for collection, docs in GENERATORS[kind](rng, count, now).items():
+        _insert(_ctx["db"][collection], docs)
+        written[collection] = len(docs)
+    return written
+
+
+# ──────────────────────────────────────────────────────────
+# DERIVED DATA
+# ──────────────────────────────────────────────────────────
+def build_derived(uri):
+    """Indexes, rollups and denormalized counters, via the app's own code"""
+    os.environ["MONGO_URI"] = uri
+    from app import create_app
+    from utils.create_indexes import create_all_indexes
+    from services.ledger_service import rebuild_ledger_daily
+    from services.analytics_rollup import run_analytics_rollup_nightly
+    from services.review_stats import rebuild_review_stats
+    from services.usage_counters import rebuild_usage
+
+    with create_app(start_background_jobs=False).app_context():
+        for name, step in (
+            ("indexes", create_all_indexes),
+            ("ledger_daily", rebuild_ledger_daily),
+            ("analytics rollups", run_analytics_rollup_nightly),
+            ("review stats", rebuild_review_stats),
+            ("usage counters", rebuild_usage),
+        ):
+            started = time.monotonic()
+            step()
+            print(f" {name}: {time.monotonic() - started:.1f}s")
+
+
+# ──────────────────────────────────────────────────────────
+# CLI
+# ──────────────────────────────────────────────────────────
+def main():
+    parser = argparse.ArgumentParser(description="Seed a database with synthetic benchmark data")
+    parser.add_argument("--uri", default="mongodb://localhost:27017/house_hunting_bench",
+                        help="MongoDB URI including the database name")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for DEFAULT_COUNTS")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--drop", action="store_true", help="drop the seeded collections first")
+    parser.add_argument("--skip-derived", action="store_true", help="skip indexes and rollups")
+    parser.add_argument("--manifest", default="bench_manifest.json")
+    args = parser.parse_args()
+
+    client = MongoClient(args.uri)
+    db = client.get_default_database()
+    if db.users.estimated_document_count() and not args.drop:
+        sys.exit(f"{db.name} already has users; pass --drop to replace the seeded collections")
+    if args.drop:
+        for name in SEEDED_COLLECTIONS:
+            db.drop_collection(name)
+
+    import bcrypt
+    from config import Config
+    from routes.subscription_routes import SUBSCRIPTION_TIERS
+
+    counts = {
+        kind: n if kind == "admins" else max(1, int(n * args.scale))
+        for kind, n in DEFAULT_COUNTS.items()
+    }
+    tiers = {tier: {"price": t["price"], "currency": t["currency"]} for tier, t in SUBSCRIPTION_TIERS.items()}
+    now = datetime.utcnow()
+    rng = random.Random(args.seed)
+    started = time.monotonic()
+    print(f"Seeding {db.name}: {counts}")
+
+    password_hash = bcrypt.hashpw(
+        BENCH_PASSWORD.encode(), bcrypt.gensalt(rounds=Config.BCRYPT_LOG_ROUNDS)
+    ).decode()
+    users = build_users(rng, counts, now, password_hash, tiers)
+    _insert(db.users, users)
+    landlords = [u for u in users if u["role"] == "landlord"]
+    tenants = [u for u in users if u["role"] == "tenant"]
+    print(f" users: {len(users)} ({time.monotonic() - started:.1f}s)")
+
+    properties = build_properties(rng, counts["properties"], landlords, now)
+    _insert(db.properties, properties)
+    print(f" properties: {len(properties)} ({time.monotonic() - started:.1f}s)")
+
+    tier_of = {str(u["_id"]): u["subscription"]["tier"] for u in landlords}
+    context = {
+        "properties": [
+            (p["_id"], p["landlord_id"], tier_of[p["landlord_id"]],
+             {"city": p["city"], "state": p["state"],
+              "property_type": p["property_type"], "price": p["price"]})
+            for p in properties
+        ],
+        "tenants": [(str(u["_id"]), u["email"]) for u in tenants],
+        "landlords": [(str(u["_id"]), u["email"]) for u in landlords],
+        "user_ids": [str(u["_id"]) for u in users],
+        "tiers": tiers,
+    }
+
+    tasks = []
+    for kind in GENERATORS:
+        for offset in range(0, counts[kind], CHUNK_SIZE):
+            tasks.append((kind, min(CHUNK_SIZE, counts[kind] - offset), rng.getrandbits(32)))
+
+    totals = {}
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(args.uri, context)
+    ) as pool:
+        futures = [pool.submit(_seed_chunk, kind, count, seed, now) for kind, count, seed in tasks]
+        for done, future in enumerate(futures, 1):
+            for collection, written in future.result().items():
+                totals[collection] = totals.get(collection, 0) + written
+            if done % 10 == 0 or done == len(futures):
+                print(f" {done}/{len(futures)} chunks: {totals} ({time.monotonic() - started:.1f}s)")
+
+    if not args.skip_derived:
+        build_derived(args.uri)
+
+    active_ids = [str(p["_id"]) for p in properties if p["status"] == "active"]
+    owners = sorted({p["landlord_id"] for p in properties})
+    emails = {str(u["_id"]): u["email"] for u in landlords}
+    manifest = {
+        "database": db.name,
+        "seed": args.seed,
+        "scale": args.scale,
+        "seeded_at": now.isoformat(),
+        "counts": {"users": len(users), "properties": len(properties), **totals},
+        "password": BENCH_PASSWORD,
+        "admins": [u["email"] for u in users if u["role"] == "admin"],
+        "landlords": [emails[i] for i in rng.sample(owners, min(200, len(owners)))],
+        "tenants": [u["email"] for u in rng.sample(tenants, min(500, len(tenants)))],
+        "property_ids": rng.sample(active_ids, min(5000, len(active_ids))),
+        "cities": {city: [lat, lon] for city, (_, lat, lon, _) in CITIES.items()},
+    }
+    with open(args.manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Done in {time.monotonic() - started:.1f}s; manifest written to {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
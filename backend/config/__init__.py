@@ -40,6 +40,37 @@ class Config:
         'mongodb://localhost:27017/house_hunting'
     )
 
+    # Connections kept per process. gunicorn.conf.py sizes this from worker
+    # concurrency (threads / gevent connections) when it is not set.
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '100'))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '0'))
+
+    # How long to wait for a usable server, for a TCP connection, for a reply
+    # on an open socket, and for a free pool connection (milliseconds).
+    # Replies are bounded well below the gunicorn worker timeout.
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '10000'))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '10000'))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '30000'))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '10000'))
+
+    # Admin analytics, financial reports and exports use a separate
+    # "reporting" client that reads from secondaries (utils/mongo_routing.py).
+    # Set to false to serve them from the primary client as well.
+    MONGO_READ_ROUTING_ENABLED = os.getenv('MONGO_READ_ROUTING_ENABLED', 'true').lower() == 'true'
+
+    # Hosts for the reporting client; empty means the MONGO_URI hosts.
+    MONGO_REPORTING_URI = os.getenv('MONGO_REPORTING_URI', '')
+
+    # Read preference of the reporting client and how far behind the primary
+    # a secondary may be to serve it (at least 90 seconds).
+    MONGO_REPORTING_READ_PREFERENCE = os.getenv('MONGO_REPORTING_READ_PREFERENCE', 'secondaryPreferred')
+    MONGO_REPORTING_MAX_STALENESS_SECONDS = int(os.getenv('MONGO_REPORTING_MAX_STALENESS_SECONDS', '120'))
+
+    # Reporting connections per process; also caps how many report queries
+    # run at once. Aggregations get a longer reply timeout.
+    MONGO_REPORTING_MAX_POOL_SIZE = int(os.getenv('MONGO_REPORTING_MAX_POOL_SIZE', '10'))
+    MONGO_REPORTING_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_REPORTING_SOCKET_TIMEOUT_MS', '55000'))
+
     # =========================
     # JWT Authentication
     # =========================
@@ -54,6 +85,50 @@ class Config:
     # Refresh token validity period (30 days).
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
 
+    # How often (seconds) each process pulls token revocations / suspensions.
+    # Changes made by the same process apply immediately.
+    TOKEN_REVOCATION_REFRESH_SECONDS = int(
+        os.getenv('TOKEN_REVOCATION_REFRESH_SECONDS', '5')
+    )
+
+    # =========================
+    # Password Hashing
+    # =========================
+
+    # bcrypt cost factor (log2 rounds). Existing hashes with a different
+    # cost are re-hashed transparently on the user's next login.
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', '12'))
+
+    # Worker processes that hash/check passwords off the request threads.
+    PASSWORD_HASH_WORKERS = int(
+        os.getenv('PASSWORD_HASH_WORKERS', str(max(1, min(4, os.cpu_count() or 1))))
+    )
+
+    # Most hash jobs allowed in flight (running + queued) per process.
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '64'))
+
+    # Seconds a request waits for a free slot before answering 503.
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', '5'))
+
+    # =========================
+    # Rate Limiting
+    # =========================
+
+    # Set to 'false' to disable request throttling (policies: utils/rate_limit.py).
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+
+    # Reverse proxies in front of the app; the client address is taken from
+    # that many hops back in X-Forwarded-For (0 = use the socket address).
+    RATE_LIMIT_PROXY_HOPS = int(os.getenv('RATE_LIMIT_PROXY_HOPS', '0'))
+
+    # =========================
+    # Request Deadlines
+    # =========================
+
+    # Set to 'false' to run routes without their MongoDB time budgets
+    # (budgets: utils/request_deadline.py).
+    REQUEST_DEADLINES_ENABLED = os.getenv('REQUEST_DEADLINES_ENABLED', 'True').lower() == 'true'
+
     # =========================
     # CORS Configuration
     # =========================
@@ -88,6 +163,112 @@ class Config:
     # Cloudinary API secret for authentication.
     CLOUDINARY_API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
 
+    # =========================
+    # M-Pesa (Daraja) Configuration
+    # =========================
+
+    # Daraja API credentials and STK Push settings.
+    MPESA_CONSUMER_KEY = os.getenv('MPESA_CONSUMER_KEY', '')
+    MPESA_CONSUMER_SECRET = os.getenv('MPESA_CONSUMER_SECRET', '')
+    MPESA_SHORTCODE = os.getenv('MPESA_SHORTCODE', '')
+    MPESA_PASSKEY = os.getenv('MPESA_PASSKEY', '')
+    MPESA_CALLBACK_URL = os.getenv('MPESA_CALLBACK_URL', '')
+
+    # 'sandbox' or 'production'; MPESA_BASE_URL overrides both (e.g. a local stub).
+    MPESA_ENVIRONMENT = os.getenv('MPESA_ENVIRONMENT', 'sandbox')
+    MPESA_BASE_URL = os.getenv('MPESA_BASE_URL')
+
+    # Seconds to wait for a connection / for Daraja to answer.
+    MPESA_CONNECT_TIMEOUT = float(os.getenv('MPESA_CONNECT_TIMEOUT', '3.05'))
+    MPESA_READ_TIMEOUT = float(os.getenv('MPESA_READ_TIMEOUT', '15'))
+
+    # Keep-alive connections kept open to Daraja per process.
+    MPESA_POOL_SIZE = int(os.getenv('MPESA_POOL_SIZE', '10'))
+
+    # Open payments older than this (minutes) are expired by the reconciler.
+    PAYMENT_TIMEOUT_MINUTES = int(os.getenv('PAYMENT_TIMEOUT_MINUTES', '30'))
+
+    # How often (seconds) the reconciler looks for payments without a callback.
+    PAYMENT_RECONCILE_INTERVAL_SECONDS = int(
+        os.getenv('PAYMENT_RECONCILE_INTERVAL_SECONDS', '30')
+    )
+
+    # How often (seconds) stored M-Pesa callbacks not yet applied are swept.
+    MPESA_INBOX_POLL_SECONDS = int(os.getenv('MPESA_INBOX_POLL_SECONDS', '15'))
+
+    # =========================
+    # Scheduled Notifications
+    # =========================
+
+    # How often (seconds) the dispatcher polls for due scheduled notifications.
+    SCHEDULED_NOTIFICATION_POLL_SECONDS = int(
+        os.getenv('SCHEDULED_NOTIFICATION_POLL_SECONDS', '60')
+    )
+
+    # How often (hours) read notifications are moved to notifications_archive.
+    NOTIFICATION_ARCHIVE_INTERVAL_HOURS = int(
+        os.getenv('NOTIFICATION_ARCHIVE_INTERVAL_HOURS', '24')
+    )
+
+    # =========================
+    # Analytics Rollups
+    # =========================
+
+    # How often (minutes) today's daily_metrics rollup is refreshed.
+    ANALYTICS_ROLLUP_INTERVAL_MINUTES = int(
+        os.getenv('ANALYTICS_ROLLUP_INTERVAL_MINUTES', '60')
+    )
+
+    # UTC hour at which the nightly job finalises the previous day's rollups.
+    ANALYTICS_ROLLUP_NIGHTLY_HOUR = int(
+        os.getenv('ANALYTICS_ROLLUP_NIGHTLY_HOUR', '0')
+    )
+
+    # =========================
+    # Logging
+    # =========================
+
+    # Default level for application and library loggers.
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+
+    # Per-module overrides, e.g. "routes.property_routes=DEBUG,apscheduler=WARNING".
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+
+    # "json" (one object per line) or "text" for local development.
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+
+    # Share of requests whose DEBUG records are kept (1 keeps all of them).
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.01'))
+
+    # Records buffered for the log writer thread before new ones are dropped.
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+    # =========================
+    # Monitoring
+    # =========================
+
+    # GET /metrics requires "Authorization: Bearer <token>"; unset, it is only served in DEBUG.
+    METRICS_AUTH_TOKEN = os.getenv('METRICS_AUTH_TOKEN')
+
+    # Directory where each worker process writes its metrics, so /metrics
+    # reports all of them (set by gunicorn.conf.py); unset, per process.
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR')
+
+    # Seconds between a worker's writes to METRICS_MULTIPROC_DIR.
+    METRICS_WRITE_INTERVAL_SECONDS = float(os.getenv('METRICS_WRITE_INTERVAL_SECONDS', '5'))
+
+    # Record MongoDB commands slower than the threshold in slow_queries.
+    SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', 'True').lower() == 'true'
+
+    # Commands taking at least this many milliseconds are recorded.
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '100'))
+
+    # Share of repeat slow commands explained (a new shape always is).
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', '0.1'))
+
+    # Days slow query records are kept before the TTL index removes them.
+    SLOW_QUERY_RETENTION_DAYS = int(os.getenv('SLOW_QUERY_RETENTION_DAYS', '7'))
+
 
 class DevelopmentConfig(Config):
     """
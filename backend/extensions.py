@@ -1,8 +1,38 @@
 # act as a central place to initialize and manage reusable extensions that the application depends on
+from flask import g, has_request_context
 from flask_pymongo import PyMongo
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 
-mongo = PyMongo()
+
+class RoutedPyMongo(PyMongo):
+    """
+    PyMongo whose `db` follows the current request's workload.
+
+    Routes marked with utils.mongo_routing.reads_from() (analytics, financial
+    reports, exports) get the database of that workload's client - its own
+    pool and read preference - everywhere they, or the services they call,
+    use mongo.db. Everything else, including background jobs, gets the
+    primary client's database.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.workloads = {}     # name -> Database, filled by init_mongo_routing()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def db(self):
+        if has_request_context():
+            routed = self.workloads.get(g.get("mongo_workload"))
+            if routed is not None:
+                return routed
+        return self._db
+
+    @db.setter
+    def db(self, value):
+        self._db = value
+
+
+mongo = RoutedPyMongo()
 bcrypt = Bcrypt()
 jwt = JWTManager()
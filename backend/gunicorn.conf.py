@@ -0,0 +1,144 @@
+# gunicorn.conf.py
+# gunicorn settings for production. Run from backend/:
+#
+#     gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Every setting can be overridden with an environment variable, e.g.
+#     GUNICORN_WORKER_CLASS=sync GUNICORN_WORKERS=8 gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Worker classes:
+#   gevent  (default) one process per core, each serving up to
+#           GUNICORN_WORKER_CONNECTIONS requests concurrently on greenlets.
+#           Most of our request time is spent waiting on MongoDB, Nominatim,
+#           Cloudinary and Daraja, so this gives the most throughput per MB.
+#   gthread GUNICORN_THREADS OS threads per process, if gevent is unavailable.
+#   sync    one request per process at a time; the baseline for comparison
+#           (see utils/load_test.py).
+
+import fcntl
+import multiprocessing
+import os
+import threading
+import time
+
+# ──────────────────────────────────────────────────────────
+# WORKERS
+# ──────────────────────────────────────────────────────────
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+workers = int(os.getenv("GUNICORN_WORKERS", str(multiprocessing.cpu_count() + 1)))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "200"))
+
+if worker_class == "gevent":
+    # Patch before the app (and pymongo / requests) is imported by preload,
+    # otherwise they keep references to the blocking socket and threading
+    from gevent import monkey
+    monkey.patch_all()
+
+# Load the app once in the master and fork workers from it: faster restarts
+# and copy-on-write memory sharing between workers
+preload_app = True
+
+# Recycle workers after a bounded number of requests; the jitter keeps them
+# from all restarting at the same moment
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+# Seconds a worker may be silent before it is killed, and the time it gets
+# to finish in-flight requests and background work on shutdown / recycle
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+# Default format plus the X-Request-ID the app logged the request under
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %({x-request-id}o)s'
+
+# ──────────────────────────────────────────────────────────
+# MONGODB POOL SIZING
+# ──────────────────────────────────────────────────────────
+# Each worker process has its own MongoClient. Give it one connection per
+# request it can serve at once, plus a few for the scheduler and pools.
+if worker_class == "gevent":
+    _concurrency = worker_connections
+elif worker_class == "gthread":
+    _concurrency = threads
+else:
+    _concurrency = 1
+os.environ.setdefault("MONGO_MAX_POOL_SIZE", str(_concurrency + 10))
+
+# ──────────────────────────────────────────────────────────
+# METRICS
+# ──────────────────────────────────────────────────────────
+# Workers write their counters here and GET /metrics, on whichever worker
+# answers, reports the sum (utils/request_metrics.py)
+METRICS_MULTIPROC_DIR = os.environ.setdefault("METRICS_MULTIPROC_DIR", "/tmp/house_hunting_metrics")
+
+
+def on_starting(server):
+    from utils.request_metrics import reset_metrics_dir
+    reset_metrics_dir(METRICS_MULTIPROC_DIR)
+
+
+def child_exit(server, worker):
+    # Keep the exited worker's counters; its in-flight gauge goes to zero
+    from utils.request_metrics import mark_process_dead
+    mark_process_dead(METRICS_MULTIPROC_DIR, worker.pid)
+
+# ──────────────────────────────────────────────────────────
+# BACKGROUND JOBS
+# ──────────────────────────────────────────────────────────
+# wsgi.py builds the app without the APScheduler jobs. Every worker tries to
+# take an exclusive lock on SCHEDULER_LOCK_FILE; the one that holds it runs
+# the scheduler. The others keep retrying every SCHEDULER_LOCK_RETRY_SECONDS,
+# so when that worker exits (recycled by max_requests, crashed) another one
+# takes over once the lock is released.
+SCHEDULER_LOCK_FILE = os.getenv("SCHEDULER_LOCK_FILE", "/tmp/house_hunting_scheduler.lock")
+SCHEDULER_LOCK_RETRY_SECONDS = int(os.getenv("SCHEDULER_LOCK_RETRY_SECONDS", "30"))
+
+_scheduler_lock = None
+
+
+def _try_scheduler_lock():
+    lock = open(SCHEDULER_LOCK_FILE, "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+
+def _run_scheduler_when_elected(server, worker):
+    global _scheduler_lock
+    while _scheduler_lock is None:
+        _scheduler_lock = _try_scheduler_lock()
+        if _scheduler_lock is None:
+            time.sleep(SCHEDULER_LOCK_RETRY_SECONDS)
+
+    from app import start_scheduler
+    from wsgi import app
+    start_scheduler(app)
+    server.log.info("Worker %s runs the background scheduler", worker.pid)
+
+
+def post_fork(server, worker):
+    # Non-blocking flock + sleep, so under gevent this never blocks the hub
+    threading.Thread(
+        target=_run_scheduler_when_elected,
+        args=(server, worker),
+        name="scheduler-election",
+        daemon=True
+    ).start()
+
+
+def worker_exit(server, worker):
+    # Let running jobs and queued background work finish before the
+    # process goes away
+    from app import shutdown_background_work
+    from wsgi import app
+    shutdown_background_work(app)
+    if _scheduler_lock is not None:
+        _scheduler_lock.close()
@@ -29,6 +29,8 @@ class Booking:
         confirmed_at=None,
         completed_at=None,
         cancelled_at=None,
+        property_snapshot=None,
+        landlord_tier=None,
         _id=None
     ):
         self._id = _id or ObjectId()
@@ -59,6 +61,11 @@ class Booking:
         self.confirmed_at = confirmed_at
         self.completed_at = completed_at
         self.cancelled_at = cancelled_at
+        
+        # Denormalized at creation so analytics/financial group-bys never
+        # need to $lookup properties or users (see services/booking_snapshot)
+        self.property_snapshot = property_snapshot  # {city, state, property_type, price}
+        self.landlord_tier = landlord_tier  # landlord's subscription tier when booked
     
     def to_dict(self):
         """Convert booking object to dictionary for MongoDB"""
@@ -82,7 +89,9 @@ class Booking:
             "updated_at": self.updated_at,
             "confirmed_at": self.confirmed_at,
             "completed_at": self.completed_at,
-            "cancelled_at": self.cancelled_at
+            "cancelled_at": self.cancelled_at,
+            "property_snapshot": self.property_snapshot,
+            "landlord_tier": self.landlord_tier
         }
     
     @staticmethod
@@ -108,5 +117,7 @@ class Booking:
             confirmed_at=data.get("confirmed_at"),
             completed_at=data.get("completed_at"),
             cancelled_at=data.get("cancelled_at"),
+            property_snapshot=data.get("property_snapshot"),
+            landlord_tier=data.get("landlord_tier"),
             _id=data.get("_id")
         )
\ No newline at end of file
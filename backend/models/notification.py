@@ -1,6 +1,16 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from bson import ObjectId
 
+# Notifications are removed by the TTL index on `expires_at` after this many
+# days unless an explicit expiry is given (see utils/create_indexes.py).
+DEFAULT_TTL_DAYS = 90
+
+
+def default_expires_at(created_at=None):
+    """Expiry used for notifications created without an explicit one."""
+    return (created_at or datetime.utcnow()) + timedelta(days=DEFAULT_TTL_DAYS)
+
+
 class Notification:
     """
     In-app Notification Model
@@ -38,7 +48,8 @@ class Notification:
         self.is_read = is_read
         self.read_at = read_at
         self.created_at = created_at or datetime.utcnow()
-        self.expires_at = expires_at  # Optional expiration date
+        # Enforced by a TTL index; defaults to DEFAULT_TTL_DAYS after creation
+        self.expires_at = expires_at or default_expires_at(self.created_at)
     
     def to_dict(self):
         """Convert notification object to dictionary for MongoDB
@@ -3,13 +3,17 @@
 Admin Notification Management Routes
 """
 
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import mongo
 from utils.decorators import admin_only
+from services import broadcast_service, campaign_service
 from bson import ObjectId
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 admin_notification_bp = Blueprint("admin_notifications", __name__)
 
 # ============================================================================
@@ -44,61 +48,45 @@ def send_broadcast():
         if not title or not message:
             return jsonify({"error": "Title and message are required"}), 400
         
-        # Build query for target users
-        query = {}
-        if target_audience == 'landlords':
-            query['role'] = 'landlord'
-        elif target_audience == 'tenants':
-            query['role'] = 'tenant'
-        # 'all' means no role filter
-        
-        # Get all target users
-        users = list(mongo.db.users.find(query, {"_id": 1}))
-        user_ids = [str(user["_id"]) for user in users]
-        
-        # Create notification for each user
-        notifications = []
-        for user_id in user_ids:
-            notification = {
-                "user_id": user_id,
-                "title": title,
-                "message": message,
-                "notification_type": notification_type,
-                "link": link,
-                "is_read": False,
-                "created_at": datetime.utcnow(),
-                "broadcast_id": str(ObjectId()),  # Group broadcasts together
-                "sent_by": admin_id
-            }
-            notifications.append(notification)
-        
-        # Bulk insert
-        if notifications:
-            result = mongo.db.notifications.insert_many(notifications)
-            
-            # Log broadcast
-            broadcast_log = {
-                "admin_id": admin_id,
-                "title": title,
-                "message": message,
-                "target_audience": target_audience,
-                "notification_type": notification_type,
-                "recipients_count": len(user_ids),
-                "sent_at": datetime.utcnow()
-            }
-            mongo.db.broadcast_logs.insert_one(broadcast_log)
-            
-            print(f"Broadcast sent to {len(user_ids)} users")
-            
-            return jsonify({
-                "message": "Broadcast sent successfully",
-                "recipients": len(user_ids)
-            }), 200
-        else:
+        # Audience size at send time (index-backed count, nothing is loaded)
+        recipients = broadcast_service.count_audience(target_audience)
+        if not recipients:
             return jsonify({"error": "No users found for target audience"}), 404
         
+        # Store the broadcast once; it is merged into each user's
+        # notifications at read time instead of copied per user
+        broadcast_id = broadcast_service.create_broadcast(
+            title=title,
+            message=message,
+            target_audience=target_audience,
+            notification_type=notification_type,
+            link=link,
+            sent_by=admin_id
+        )
+        
+        # Log broadcast
+        broadcast_log = {
+            "admin_id": admin_id,
+            "broadcast_id": str(broadcast_id),
+            "title": title,
+            "message": message,
+            "target_audience": target_audience,
+            "notification_type": notification_type,
+            "recipients_count": recipients,
+            "sent_at": datetime.utcnow()
+        }
+        mongo.db.broadcast_logs.insert_one(broadcast_log)
+        
+        logger.info("Broadcast %s sent to %s users", broadcast_id, recipients)
+        
+        return jsonify({
+            "message": "Broadcast sent successfully",
+            "broadcast_id": str(broadcast_id),
+            "recipients": recipients
+        }), 200
+        
     except Exception as e:
-        print(f"❌ Error sending broadcast: {str(e)}")
+        logger.exception("Error sending broadcast")
         return jsonify({"error": f"Failed to send broadcast: {str(e)}"}), 500
 
 
@@ -135,88 +123,56 @@ def send_targeted_campaign():
         if not title or not message:
             return jsonify({"error": "Title and message required"}), 400
         
-        # Build query based on criteria
-        query = {}
-        
-        # Role filter
-        if criteria.get('role'):
-            query['role'] = criteria['role']
-        
-        # Get users
-        users = list(mongo.db.users.find(query, {"_id": 1}))
-        
-        # Apply additional filters
-        target_user_ids = []
-        
-        for user in users:
-            user_id = str(user["_id"])
-            include_user = True
-            
-            # Check inactive days
-            if criteria.get('inactive_days'):
-                inactive_threshold = datetime.utcnow() - timedelta(days=criteria['inactive_days'])
-                # Check last booking or property update
-                last_activity = mongo.db.bookings.find_one(
-                    {"$or": [{"landlord_id": user_id}, {"tenant_id": user_id}]},
-                    sort=[("created_at", -1)]
-                )
-                if last_activity and last_activity.get('created_at', datetime.min) > inactive_threshold:
-                    include_user = False
-            
-            # Check property status
-            if criteria.get('property_status') and user['_id']:
-                property_count = mongo.db.properties.count_documents({
-                    "landlord_id": user_id,
-                    "status": criteria['property_status']
-                })
-                if property_count == 0:
-                    include_user = False
-            
-            if include_user:
-                target_user_ids.append(user_id)
-        
-        # Create notifications
-        notifications = []
-        for user_id in target_user_ids:
-            notification = {
-                "user_id": user_id,
-                "title": title,
-                "message": message,
-                "notification_type": "campaign",
-                "is_read": False,
-                "created_at": datetime.utcnow(),
-                "campaign_id": str(ObjectId()),
-                "sent_by": admin_id
-            }
-            notifications.append(notification)
-        
-        if notifications:
-            mongo.db.notifications.insert_many(notifications)
-            
-            # Log campaign
-            campaign_log = {
-                "admin_id": admin_id,
-                "title": title,
-                "message": message,
-                "criteria": criteria,
-                "recipients_count": len(target_user_ids),
-                "sent_at": datetime.utcnow()
-            }
-            mongo.db.campaign_logs.insert_one(campaign_log)
-            
-            print(f"✅ Campaign sent to {len(target_user_ids)} users")
-            
-            return jsonify({
-                "message": "Campaign sent successfully",
-                "recipients": len(target_user_ids)
-            }), 200
-        else:
-            return jsonify({"error": "No users match criteria"}), 404
+        # Log the campaign first; the background job reports progress on it
+        campaign_log = {
+            "admin_id": admin_id,
+            "title": title,
+            "message": message,
+            "criteria": criteria,
+            "status": "queued",
+            "processed": 0,
+            "recipients_count": 0,
+            "sent_at": datetime.utcnow()
+        }
+        campaign_id = mongo.db.campaign_logs.insert_one(campaign_log).inserted_id
+        
+        # Audience resolution + delivery run off the request thread
+        campaign_service.start_campaign(campaign_id, title, message, criteria, admin_id)
+        
+        return jsonify({
+            "message": "Campaign queued",
+            "campaign_id": str(campaign_id),
+            "status": "queued"
+        }), 202
         
     except Exception as e:
         return jsonify({"error": f"Failed to send campaign: {str(e)}"}), 500
 
 
+@admin_notification_bp.route("/campaign/<campaign_id>", methods=["GET"])
+@jwt_required()
+@admin_only
+def get_campaign_status(campaign_id):
+    """Get delivery progress of a targeted campaign"""
+    try:
+        if not ObjectId.is_valid(campaign_id):
+            return jsonify({"error": "Invalid campaign ID"}), 400
+        
+        campaign = mongo.db.campaign_logs.find_one({"_id": ObjectId(campaign_id)})
+        if not campaign:
+            return jsonify({"error": "Campaign not found"}), 404
+        
+        campaign["_id"] = str(campaign["_id"])
+        for field in ["sent_at", "started_at", "completed_at"]:
+            if campaign.get(field):
+                campaign[field] = campaign[field].isoformat()
+        
+        return jsonify({"campaign": campaign}), 200
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to get campaign: {str(e)}"}), 500
+
+
 # ============================================================================
 # NOTIFICATION TEMPLATES
 # ============================================================================
@@ -347,8 +303,11 @@ def schedule_notification():
         "title": "Maintenance Alert",
         "message": "Scheduled maintenance tomorrow",
         "target_audience": "all",
-        "scheduled_for": "2024-12-25T10:00:00"
+        "scheduled_for": "2024-12-25T10:00:00",
+        "user_ids": ["..."]  # optional, overrides target_audience
     }
+    
+    Delivery is done by services/notification_dispatcher.py once due.
     """
     try:
         admin_id = get_jwt_identity()
@@ -368,12 +327,17 @@ def schedule_notification():
             "message": data.get('message'),
             "target_audience": data.get('target_audience', 'all'),
             "notification_type": data.get('notification_type', 'system_announcement'),
+            "link": data.get('link'),
             "scheduled_for": scheduled_for,
             "created_by": admin_id,
             "created_at": datetime.utcnow(),
-            "status": "pending"  # pending, sent, cancelled
+            "status": "pending",  # pending, dispatching, sent, failed, cancelled
+            "attempts": 0
         }
         
+        if data.get('user_ids'):
+            scheduled_notification["user_ids"] = [str(uid) for uid in data['user_ids']]
+        
         result = mongo.db.scheduled_notifications.insert_one(scheduled_notification)
         
         return jsonify({
@@ -418,11 +382,16 @@ def cancel_scheduled_notification(schedule_id):
         if not ObjectId.is_valid(schedule_id):
             return jsonify({"error": "Invalid schedule ID"}), 400
         
-        mongo.db.scheduled_notifications.update_one(
-            {"_id": ObjectId(schedule_id)},
+        # Only still-pending schedules can be cancelled; the dispatcher may
+        # already have claimed this one
+        result = mongo.db.scheduled_notifications.update_one(
+            {"_id": ObjectId(schedule_id), "status": "pending"},
             {"$set": {"status": "cancelled", "cancelled_at": datetime.utcnow()}}
         )
         
+        if result.matched_count == 0:
+            return jsonify({"error": "Scheduled notification not found or already dispatched"}), 404
+        
         return jsonify({"message": "Scheduled notification cancelled"}), 200
         
     except Exception as e:
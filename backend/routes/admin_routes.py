@@ -5,6 +5,7 @@
 Admin Routes - Dashboard, User Management, Property Moderation
 """
 
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from extensions import mongo, bcrypt
@@ -12,6 +13,14 @@ from utils.decorators import admin_only
 from services.notification_service import NotificationService
 from bson import ObjectId
 from datetime import datetime, timedelta
+from utils.export_stream import export_format, export_response
+from utils.mongo_routing import REPORTING, reads_from
+from utils.request_deadline import deadline
+from services.token_revocation import set_suspended, mark_deleted
+from utils.rate_limit import get_rate_limiter
+from services.slow_query_log import slow_query_log, slow_query_report, slow_query_samples
+
+logger = logging.getLogger(__name__)
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -25,10 +34,12 @@ notification_service = NotificationService()
 @admin_bp.route("/dashboard/stats", methods=["GET"])
 @jwt_required()
 @admin_only
+@deadline("dashboard")
+@reads_from(REPORTING)
 def get_dashboard_stats():
     """Get comprehensive dashboard statistics"""
     try:
-        print("\n Admin Dashboard Stats Request")
+        logger.debug("Admin dashboard stats request")
         
         # ===== USER STATISTICS =====
         total_users = mongo.db.users.count_documents({})
@@ -134,11 +145,11 @@ def get_dashboard_stats():
             }
         }
         
-        print(f" Stats compiled: {total_users} users, {total_properties} properties")
+        logger.debug("Stats compiled: %s users, %s properties", total_users, total_properties)
         return jsonify(response_data), 200
         
     except Exception as e:
-        print(f"❌ Error getting dashboard stats: {str(e)}")
+        logger.exception("Error getting dashboard stats")
         return jsonify({"error": f"Failed to get dashboard stats: {str(e)}"}), 500
 
 
@@ -208,15 +219,7 @@ def get_all_users():
         per_page = request.args.get("per_page", 20, type=int)
         sort_by = request.args.get("sort_by", "newest")
         
-        query = {}
-        
-        if role:
-            query["role"] = role
-        
-        if search:
-            query["$or"] = [
-                {"email": {"$regex": search, "$options": "i"}}
-            ]
+        query = _user_query(role, search)
         
         total_count = mongo.db.users.count_documents(query)
         
@@ -267,6 +270,75 @@ def get_all_users():
         return jsonify({"error": f"Failed to fetch users: {str(e)}"}), 500
 
 
+def _user_query(role=None, search=None):
+    query = {}
+    if role:
+        query["role"] = role
+    if search:
+        query["$or"] = [
+            {"email": {"$regex": search, "$options": "i"}}
+        ]
+    return query
+
+
+def _count_by(collection, field, ids):
+    """{id: count} for documents whose *field* is in *ids* (one aggregation)"""
+    if not ids:
+        return {}
+    return {
+        row["_id"]: row["count"]
+        for row in collection.aggregate([
+            {"$match": {field: {"$in": ids}}},
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}
+        ])
+    }
+
+
+@admin_bp.route("/users/export", methods=["GET"])
+@jwt_required()
+@admin_only
+@reads_from(REPORTING)
+def export_users():
+    """Stream all matching users as CSV (default) or NDJSON"""
+    try:
+        fmt = export_format()
+        if not fmt:
+            return jsonify({"error": "Invalid format. Use csv or ndjson"}), 400
+        
+        query = _user_query(request.args.get("role"), request.args.get("search"))
+        cursor = mongo.db.users.find(
+            query,
+            {"password": 0, "review_stats": 0}
+        ).sort("_id", 1)
+        
+        def add_counts(batch):
+            # Per-batch $in aggregations instead of per-user count_documents
+            landlords = [str(u["_id"]) for u in batch if u.get("role") == "landlord"]
+            tenants = [str(u["_id"]) for u in batch if u.get("role") == "tenant"]
+            properties = _count_by(mongo.db.properties, "landlord_id", landlords)
+            landlord_bookings = _count_by(mongo.db.bookings, "landlord_id", landlords)
+            tenant_bookings = _count_by(mongo.db.bookings, "tenant_id", tenants)
+            for user in batch:
+                user_id = str(user["_id"])
+                if user.get("role") == "landlord":
+                    user["properties_count"] = properties.get(user_id, 0)
+                    user["bookings_count"] = landlord_bookings.get(user_id, 0)
+                elif user.get("role") == "tenant":
+                    user["bookings_count"] = tenant_bookings.get(user_id, 0)
+        
+        return export_response(
+            cursor,
+            ["_id", "email", "role", "is_suspended", "subscription.tier", "subscription.status",
+             "properties_count", "bookings_count", "created_at"],
+            fmt,
+            "users",
+            enrich=add_counts
+        )
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to export users: {str(e)}"}), 500
+
+
 @admin_bp.route("/users/<user_id>", methods=["GET"])
 @jwt_required()
 @admin_only
@@ -360,6 +432,7 @@ def suspend_user(user_id):
                 "suspended_by": current_admin_id
             }}
         )
+        set_suspended(user_id, True, reason)
         
         # If landlord, deactivate all their properties
         if user["role"] == "landlord":
@@ -371,12 +444,12 @@ def suspend_user(user_id):
         #  Send suspension notification to the user
         try:
             notification_service.notify_account_suspended(user, reason)
-            print(f"Suspension notification sent to: {user['email']}")
-        except Exception as notif_err:
+            logger.info("Suspension notification sent to: %s", user['email'])
+        except Exception:
             # Don't fail the whole operation if notification fails
-            print(f"Failed to send suspension notification: {str(notif_err)}")
+            logger.exception("Failed to send suspension notification")
         
-        print(f"User suspended: {user['email']}")
+        logger.info("User suspended: %s", user['email'])
         
         return jsonify({
             "message": "User suspended successfully",
@@ -415,15 +488,16 @@ def activate_user(user_id):
                 }
             }
         )
+        set_suspended(user_id, False)
         
         #  Send reactivation notification to the user
         try:
             notification_service.notify_account_activated(user)
-            print(f" Activation notification sent to: {user['email']}")
-        except Exception as notif_err:
-            print(f" Failed to send activation notification: {str(notif_err)}")
+            logger.info("Activation notification sent to: %s", user['email'])
+        except Exception:
+            logger.exception("Failed to send activation notification")
         
-        print(f"User activated: {user['email']}")
+        logger.info("User activated: %s", user['email'])
         
         return jsonify({
             "message": "User activated successfully",
@@ -462,8 +536,9 @@ def delete_user(user_id):
         
         mongo.db.notifications.delete_many({"user_id": user_id})
         mongo.db.users.delete_one({"_id": ObjectId(user_id)})
+        mark_deleted(user_id)
         
-        print(f"✅ User deleted: {user['email']}")
+        logger.info("User deleted: %s", user['email'])
         
         return jsonify({
             "message": "User and associated data deleted successfully",
@@ -565,7 +640,7 @@ def approve_property(property_id):
             }}
         )
         
-        print(f"✅ Property approved by admin: {prop['title']}")
+        logger.info("Property approved by admin: %s", prop['title'])
         
         return jsonify({
             "message": "Property approved successfully",
@@ -607,7 +682,7 @@ def reject_property(property_id):
             }}
         )
         
-        print(f"❌ Property rejected by admin: {prop['title']}")
+        logger.info("Property rejected by admin: %s", prop['title'])
         
         return jsonify({
             "message": "Property rejected successfully",
@@ -668,4 +743,65 @@ def get_growth_analytics():
         }), 200
         
     except Exception as e:
-        return jsonify({"error": f"Failed to fetch growth analytics: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Failed to fetch growth analytics: {str(e)}"}), 500
+
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+
+@admin_bp.route("/rate-limits/metrics", methods=["GET"])
+@jwt_required()
+@admin_only
+def get_rate_limit_metrics():
+    """Allowed / rejected counts and limiter overhead per policy for this process"""
+    try:
+        return jsonify({"rate_limits": get_rate_limiter().metrics_snapshot()}), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to get rate limit metrics: {str(e)}"}), 500
+
+# ============================================================================
+# SLOW QUERIES
+# ============================================================================
+
+@admin_bp.route("/slow-queries", methods=["GET"])
+@jwt_required()
+@admin_only
+def get_slow_queries():
+    """
+    Slow MongoDB commands grouped by query shape, most total time first.
+    Query params: hours (default 24), route ("POST /properties/search"),
+    collscan=true (only shapes whose plan scanned a whole collection), limit
+    """
+    try:
+        hours = max(1, min(request.args.get("hours", 24, type=int), 24 * 30))
+        limit = max(1, min(request.args.get("limit", 50, type=int), 200))
+        since = datetime.utcnow() - timedelta(hours=hours)
+
+        shapes = slow_query_report(
+            since,
+            collscan_only=request.args.get("collscan", "").lower() == "true",
+            route=request.args.get("route"),
+            limit=limit
+        )
+        return jsonify({
+            "since": since.isoformat(),
+            "shapes": shapes,
+            "collector": slow_query_log.metrics_snapshot()
+        }), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to fetch slow queries: {str(e)}"}), 500
+
+
+@admin_bp.route("/slow-queries/<shape_hash>", methods=["GET"])
+@jwt_required()
+@admin_only
+def get_slow_query_samples(shape_hash):
+    """Most recent slow records of one query shape, with their sampled plans"""
+    try:
+        limit = max(1, min(request.args.get("limit", 20, type=int), 100))
+        samples = slow_query_samples(shape_hash, limit=limit)
+        if not samples:
+            return jsonify({"error": "Query shape not found"}), 404
+        return jsonify({"shape_hash": shape_hash, "samples": samples}), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to fetch slow query samples: {str(e)}"}), 500
@@ -1,14 +1,23 @@
 # backend/routes/analytics_routes.py
 """
 Analytics Routes - Comprehensive Platform Analytics
+
+Period figures are sums over the `daily_metrics` rollups and current-state
+breakdowns come from the latest rollup snapshot (see services/analytics_rollup),
+so response time does not depend on how much history the platform has.
+Every route reads from a secondary through the reporting client
+(utils/mongo_routing), away from user-facing traffic.
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from extensions import mongo
 from utils.decorators import admin_only, tenant_only, landlord_only
+from utils.mongo_routing import REPORTING, reads_from
+from utils.request_deadline import deadline
 from bson import ObjectId
 from datetime import datetime, timedelta
 from collections import defaultdict
+from services import analytics_rollup
 
 analytics_bp = Blueprint("analytics", __name__)
 
@@ -18,67 +27,42 @@ analytics_bp = Blueprint("analytics", __name__)
 
 @analytics_bp.route("/users/engagement", methods=["GET"])
 @jwt_required()
+@deadline("analytics")
+@reads_from(REPORTING)
 def get_user_engagement():
     """Get user engagement metrics"""
     try:
         days = request.args.get("days", 30, type=int)
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
+        first_day, last_day = analytics_rollup.day_range(days, end_date)
         
         # Total active users (logged in during period)
         # Note: You'll need to track user login activity in your auth
-        total_users = mongo.db.users.count_documents({})
+        total_users = mongo.db.users.estimated_document_count()
         
         # New users in period
-        new_users = mongo.db.users.count_documents({
-            "created_at": {"$gte": start_date, "$lte": end_date}
-        })
+        new_users = analytics_rollup.total("users.new", first_day, last_day)
         
         # Users by role
-        users_by_role = list(mongo.db.users.aggregate([
-            {"$group": {
-                "_id": "$role",
-                "count": {"$sum": 1}
-            }}
-        ]))
+        users_by_role = [
+            {"_id": role, "count": row["count"]}
+            for role, row in analytics_rollup.latest_snapshot("users.total", "role").items()
+        ]
         
         # Daily new users trend
-        daily_new_users = list(mongo.db.users.aggregate([
-            {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
-            {"$group": {
-                "_id": {
-                    "year": {"$year": "$created_at"},
-                    "month": {"$month": "$created_at"},
-                    "day": {"$dayOfMonth": "$created_at"}
-                },
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"_id": 1}}
-        ]))
-        
-        # Format daily data
-        formatted_daily = []
-        for item in daily_new_users:
-            date_obj = datetime(item["_id"]["year"], item["_id"]["month"], item["_id"]["day"])
-            formatted_daily.append({
-                "date": date_obj.strftime("%Y-%m-%d"),
-                "count": item["count"]
-            })
+        formatted_daily = analytics_rollup.daily_series("users.new", first_day, last_day)
         
-        # User activity (bookings created)
+        # User activity (bookings created) - distinct tenants cannot be summed
+        # across days, but this only scans the window via the created_at index
         active_users_count = len(mongo.db.bookings.distinct("tenant_id", {
             "created_at": {"$gte": start_date, "$lte": end_date}
         }))
         
         # Retention rate (users who came back)
         # Simple version: users with multiple bookings
-        repeat_users = len(list(mongo.db.bookings.aggregate([
-            {"$group": {
-                "_id": "$tenant_id",
-                "booking_count": {"$sum": 1}
-            }},
-            {"$match": {"booking_count": {"$gt": 1}}}
-        ])))
+        repeat = analytics_rollup.latest_snapshot("tenants.repeat", "all")
+        repeat_users = repeat.get("all", {}).get("count", 0)
         
         retention_rate = (repeat_users / total_users * 100) if total_users > 0 else 0
         
@@ -102,92 +86,60 @@ def get_user_engagement():
 
 @analytics_bp.route("/properties/performance", methods=["GET"])
 @jwt_required()
+@deadline("analytics")
+@reads_from(REPORTING)
 def get_property_performance():
     """Get property performance metrics"""
     try:
         days = request.args.get("days", 30, type=int)
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
+        first_day, last_day = analytics_rollup.day_range(days)
         
         # Total properties
-        total_properties = mongo.db.properties.count_documents({})
-        active_properties = mongo.db.properties.count_documents({"status": "active"})
+        by_status = analytics_rollup.latest_snapshot("properties.total", "status")
+        total_properties = mongo.db.properties.estimated_document_count()
+        active_properties = by_status.get("active", {}).get("count", 0)
         
         # New properties in period
-        new_properties = mongo.db.properties.count_documents({
-            "created_at": {"$gte": start_date, "$lte": end_date}
-        })
+        new_properties = analytics_rollup.total("properties.new", first_day, last_day)
         
         # Properties by status
-        properties_by_status = list(mongo.db.properties.aggregate([
-            {"$group": {
-                "_id": "$status",
-                "count": {"$sum": 1}
-            }}
-        ]))
+        properties_by_status = [
+            {"_id": status, "count": row["count"]} for status, row in by_status.items()
+        ]
         
         # Most booked properties
-        most_booked = list(mongo.db.bookings.aggregate([
-            {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
-            {"$group": {
-                "_id": "$property_id",
-                "booking_count": {"$sum": 1}
-            }},
-            {"$sort": {"booking_count": -1}},
-            {"$limit": 10}
-        ]))
-        
-        # Enrich with property details
-        for item in most_booked:
-            property_id = item["_id"]
-            property_doc = mongo.db.properties.find_one(
-                {"_id": ObjectId(property_id)},
+        booked = analytics_rollup.sum_by_value("bookings.new", "property", first_day, last_day)
+        top = sorted(booked.items(), key=lambda kv: kv[1]["count"], reverse=True)[:10]
+        
+        # Enrich with property details (one batched read)
+        property_docs = {
+            str(p["_id"]): p for p in mongo.db.properties.find(
+                {"_id": {"$in": [ObjectId(pid) for pid, _ in top if ObjectId.is_valid(pid)]}},
                 {"title": 1, "city": 1, "price": 1}
             )
+        }
+        most_booked = []
+        for property_id, row in top:
+            item = {"_id": property_id, "booking_count": row["count"]}
+            property_doc = property_docs.get(property_id)
             if property_doc:
                 item["property_id"] = property_id
                 item["title"] = property_doc.get("title", "Unknown")
                 item["city"] = property_doc.get("city", "Unknown")
                 item["price"] = property_doc.get("price", 0)
                 item.pop("_id")
+            most_booked.append(item)
         
         # Conversion rate (bookings / active properties)
-        total_bookings = mongo.db.bookings.count_documents({
-            "created_at": {"$gte": start_date, "$lte": end_date}
-        })
+        total_bookings = analytics_rollup.total("bookings.new", first_day, last_day)
         conversion_rate = (total_bookings / active_properties * 100) if active_properties > 0 else 0
         
         # Daily property listings
-        daily_properties = list(mongo.db.properties.aggregate([
-            {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
-            {"$group": {
-                "_id": {
-                    "year": {"$year": "$created_at"},
-                    "month": {"$month": "$created_at"},
-                    "day": {"$dayOfMonth": "$created_at"}
-                },
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"_id": 1}}
-        ]))
-        
-        # Format daily data
-        formatted_daily = []
-        for item in daily_properties:
-            date_obj = datetime(item["_id"]["year"], item["_id"]["month"], item["_id"]["day"])
-            formatted_daily.append({
-                "date": date_obj.strftime("%Y-%m-%d"),
-                "count": item["count"]
-            })
+        formatted_daily = analytics_rollup.daily_series("properties.new", first_day, last_day)
         
         # Average property price
-        avg_price_result = list(mongo.db.properties.aggregate([
-            {"$group": {
-                "_id": None,
-                "avg_price": {"$avg": "$price"}
-            }}
-        ]))
-        avg_price = round(avg_price_result[0]["avg_price"], 2) if avg_price_result else 0
+        overall = analytics_rollup.latest_snapshot("properties.total", "all").get("all")
+        avg_price = round(overall["price_sum"] / overall["count"], 2) if overall and overall["count"] else 0
         
         return jsonify({
             "total_properties": total_properties,
@@ -211,60 +163,44 @@ def get_property_performance():
 
 @analytics_bp.route("/geography/distribution", methods=["GET"])
 @jwt_required()
+@deadline("analytics")
+@reads_from(REPORTING)
 def get_geographic_distribution():
     """Get geographic distribution of properties and searches"""
     try:
         # Properties by city
-        properties_by_city = list(mongo.db.properties.aggregate([
-            {"$group": {
-                "_id": "$city",
-                "count": {"$sum": 1},
-                "avg_price": {"$avg": "$price"}
-            }},
-            {"$sort": {"count": -1}},
-            {"$limit": 20}
-        ]))
+        properties_by_city = sorted(
+            analytics_rollup.latest_snapshot("properties.total", "city").items(),
+            key=lambda kv: kv[1]["count"], reverse=True
+        )[:20]
         
         # Format data
         formatted_cities = []
-        for item in properties_by_city:
+        for city, row in properties_by_city:
             formatted_cities.append({
-                "city": item["_id"] or "Unknown",
-                "property_count": item["count"],
-                "avg_price": round(item["avg_price"], 2)
+                "city": city or "Unknown",
+                "property_count": row["count"],
+                "avg_price": round(row["price_sum"] / row["count"], 2) if row["count"] else 0
             })
         
         # Properties by type
-        properties_by_type = list(mongo.db.properties.aggregate([
-            {"$group": {
-                "_id": "$property_type",
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"count": -1}}
-        ]))
-        
-        # Most popular cities (by bookings)
-        popular_cities = list(mongo.db.bookings.aggregate([
-            {"$lookup": {
-                "from": "properties",
-                "localField": "property_id",
-                "foreignField": "_id",
-                "as": "property"
-            }},
-            {"$unwind": "$property"},
-            {"$group": {
-                "_id": "$property.city",
-                "booking_count": {"$sum": 1}
-            }},
-            {"$sort": {"booking_count": -1}},
-            {"$limit": 10}
-        ]))
+        properties_by_type = sorted(
+            [{"_id": ptype, "count": row["count"]}
+             for ptype, row in analytics_rollup.latest_snapshot("properties.total", "type").items()],
+            key=lambda item: item["count"], reverse=True
+        )
+        
+        # Most popular cities (by bookings, all time)
+        popular_cities = sorted(
+            analytics_rollup.sum_by_value("bookings.new", "city").items(),
+            key=lambda kv: kv[1]["count"], reverse=True
+        )[:10]
         
         formatted_popular = []
-        for item in popular_cities:
+        for city, row in popular_cities:
             formatted_popular.append({
-                "city": item["_id"] or "Unknown",
-                "booking_count": item["booking_count"]
+                "city": city or "Unknown",
+                "booking_count": row["count"]
             })
         
         return jsonify({
@@ -283,55 +219,29 @@ def get_geographic_distribution():
 
 @analytics_bp.route("/bookings/trends", methods=["GET"])
 @jwt_required()
+@deadline("analytics")
+@reads_from(REPORTING)
 def get_booking_trends():
     """Get booking trends and statistics"""
     try:
         days = request.args.get("days", 30, type=int)
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
+        first_day, last_day = analytics_rollup.day_range(days)
         
         # Total bookings
-        total_bookings = mongo.db.bookings.count_documents({})
-        period_bookings = mongo.db.bookings.count_documents({
-            "created_at": {"$gte": start_date, "$lte": end_date}
-        })
+        total_bookings = mongo.db.bookings.estimated_document_count()
+        period_bookings = analytics_rollup.total("bookings.new", first_day, last_day)
         
         # Bookings by status
-        bookings_by_status = list(mongo.db.bookings.aggregate([
-            {"$group": {
-                "_id": "$status",
-                "count": {"$sum": 1}
-            }}
-        ]))
+        bookings_by_status = [
+            {"_id": status, "count": row["count"]}
+            for status, row in analytics_rollup.latest_snapshot("bookings.total", "status").items()
+        ]
         
         # Daily bookings trend
-        daily_bookings = list(mongo.db.bookings.aggregate([
-            {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}},
-            {"$group": {
-                "_id": {
-                    "year": {"$year": "$created_at"},
-                    "month": {"$month": "$created_at"},
-                    "day": {"$dayOfMonth": "$created_at"}
-                },
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"_id": 1}}
-        ]))
-        
-        # Format daily data
-        formatted_daily = []
-        for item in daily_bookings:
-            date_obj = datetime(item["_id"]["year"], item["_id"]["month"], item["_id"]["day"])
-            formatted_daily.append({
-                "date": date_obj.strftime("%Y-%m-%d"),
-                "count": item["count"]
-            })
+        formatted_daily = analytics_rollup.daily_series("bookings.new", first_day, last_day)
         
-        # Conversion rate
-        confirmed_bookings = mongo.db.bookings.count_documents({
-            "status": "confirmed",
-            "created_at": {"$gte": start_date, "$lte": end_date}
-        })
+        # Conversion rate (bookings confirmed during the period)
+        confirmed_bookings = analytics_rollup.total("bookings.confirmed", first_day, last_day)
         conversion_rate = (confirmed_bookings / period_bookings * 100) if period_bookings > 0 else 0
         
         return jsonify({
@@ -354,45 +264,33 @@ def get_booking_trends():
 
 @analytics_bp.route("/summary", methods=["GET"])
 @jwt_required()
+@deadline("analytics")
+@reads_from(REPORTING)
 def get_analytics_summary():
     """Get comprehensive analytics summary"""
     try:
         days = request.args.get("days", 30, type=int)
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
+        first_day, last_day = analytics_rollup.day_range(days)
         
         # Get all key metrics
-        total_users = mongo.db.users.count_documents({})
-        total_properties = mongo.db.properties.count_documents({})
-        total_bookings = mongo.db.bookings.count_documents({})
-        
-        new_users = mongo.db.users.count_documents({
-            "created_at": {"$gte": start_date}
-        })
-        
-        new_properties = mongo.db.properties.count_documents({
-            "created_at": {"$gte": start_date}
-        })
-        
-        new_bookings = mongo.db.bookings.count_documents({
-            "created_at": {"$gte": start_date}
-        })
-        
-        # Growth percentages
-        prev_start = start_date - timedelta(days=days)
-        prev_users = mongo.db.users.count_documents({
-            "created_at": {"$gte": prev_start, "$lt": start_date}
-        })
+        total_users = mongo.db.users.estimated_document_count()
+        total_properties = mongo.db.properties.estimated_document_count()
+        total_bookings = mongo.db.bookings.estimated_document_count()
+        
+        new_users = analytics_rollup.total("users.new", first_day, last_day)
+        new_properties = analytics_rollup.total("properties.new", first_day, last_day)
+        new_bookings = analytics_rollup.total("bookings.new", first_day, last_day)
+        
+        # Growth percentages (previous period ends the day before this one starts)
+        prev_end = datetime.strptime(first_day, analytics_rollup.DAY_FORMAT) - timedelta(days=1)
+        prev_first, prev_last = analytics_rollup.day_range(days, prev_end)
+        prev_users = analytics_rollup.total("users.new", prev_first, prev_last)
         user_growth = ((new_users - prev_users) / prev_users * 100) if prev_users > 0 else 100
         
-        prev_properties = mongo.db.properties.count_documents({
-            "created_at": {"$gte": prev_start, "$lt": start_date}
-        })
+        prev_properties = analytics_rollup.total("properties.new", prev_first, prev_last)
         property_growth = ((new_properties - prev_properties) / prev_properties * 100) if prev_properties > 0 else 100
         
-        prev_bookings = mongo.db.bookings.count_documents({
-            "created_at": {"$gte": prev_start, "$lt": start_date}
-        })
+        prev_bookings = analytics_rollup.total("bookings.new", prev_first, prev_last)
         booking_growth = ((new_bookings - prev_bookings) / prev_bookings * 100) if prev_bookings > 0 else 100
         
         return jsonify({
@@ -1,16 +1,22 @@
 # auth_routes.py
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
-from extensions import mongo, bcrypt
+from extensions import mongo
 from models.user import User
 from utils.validators import validate_email, validate_password, validate_role
 from utils.decorators import admin_only, landlord_only, tenant_only
 from services.notification_service import NotificationService
 from services.email_service import EmailService
+from utils.password_hasher import get_password_hasher, PasswordHasherBusy
+from utils.rate_limit import rate_limited
+from services.token_revocation import revoke_tokens, token_version_of, TOKEN_VERSION_CLAIM
 from datetime import datetime, timedelta
 import secrets
 import string
 
+logger = logging.getLogger(__name__)
+
 # Blueprint with URL prefix /auth
 auth_bp = Blueprint("auth", __name__)
 
@@ -18,6 +24,11 @@ auth_bp = Blueprint("auth", __name__)
 notification_service = NotificationService()
 email_service = EmailService()
 
+
+def _hashing_busy():
+    return jsonify({"error": "Server is busy, please try again shortly"}), 503
+
+
 # ---------------------------
 # REGISTER USER
 # ---------------------------
@@ -46,7 +57,7 @@ def register():
         if existing_user:
             return jsonify({"error": "User already exists"}), 409
 
-        hashed_password = bcrypt.generate_password_hash(password).decode("utf-8")
+        hashed_password = get_password_hasher().hash_password(password)
 
         user = User(email=email, password=hashed_password, role=role)
         user_dict = user.to_dict()
@@ -63,6 +74,8 @@ def register():
             "role": role
         }), 201
     
+    except PasswordHasherBusy:
+        return _hashing_busy()
     except Exception as e:
         return jsonify({"error": f"Registration failed: {str(e)}"}), 500
 
@@ -70,6 +83,7 @@ def register():
 # LOGIN USER
 # ---------------------------
 @auth_bp.route("/login", methods=["POST"])
+@rate_limited("login")
 def login():
     try:
         data = request.get_json()
@@ -87,12 +101,21 @@ def login():
         if not user:
             return jsonify({"error": "Invalid credentials"}), 401
 
-        if not bcrypt.check_password_hash(user["password"], password):
+        hasher = get_password_hasher()
+        if not hasher.check_password(user["password"], password):
             return jsonify({"error": "Invalid credentials"}), 401
 
+        # Upgrade hashes made with a different BCRYPT_LOG_ROUNDS; conditional
+        # on the old hash so a concurrent password change is never overwritten
+        if hasher.needs_rehash(user["password"]):
+            mongo.db.users.update_one(
+                {"_id": user["_id"], "password": user["password"]},
+                {"$set": {"password": hasher.hash_password(password)}}
+            )
+
         if user.get("is_suspended"):
             suspension_reason = user.get("suspension_reason", "Your account has been suspended.")
-            print(f" Blocked login for suspended user: {email}")
+            logger.info("Blocked login for suspended user: %s", email)
             return jsonify({
                 "error": "account_suspended",
                 "message": "Your account has been suspended. Please contact support.",
@@ -103,7 +126,8 @@ def login():
             identity=str(user["_id"]),
             additional_claims={
                 "email": user["email"],
-                "role": user["role"]
+                "role": user["role"],
+                TOKEN_VERSION_CLAIM: token_version_of(user)
             }
         )
         
@@ -117,6 +141,8 @@ def login():
             }
         }), 200
     
+    except PasswordHasherBusy:
+        return _hashing_busy()
     except Exception as e:
         return jsonify({"error": f"Login failed: {str(e)}"}), 500
 
@@ -127,16 +153,10 @@ def login():
 @jwt_required()
 def get_current_user():
     try:
+        # Suspended users never get here: @jwt_required() rejects their
+        # tokens from the in-process revocation cache (services/token_revocation)
         user_id = get_jwt_identity()
         claims = get_jwt()
-
-        user = mongo.db.users.find_one({"_id": __import__('bson').ObjectId(user_id)}, {"is_suspended": 1, "suspension_reason": 1})
-        if user and user.get("is_suspended"):
-            return jsonify({
-                "error": "account_suspended",
-                "message": "Your account has been suspended. Please contact support.",
-                "reason": user.get("suspension_reason", "")
-            }), 403
         
         return jsonify({
             "user": {
@@ -201,6 +221,7 @@ def tenant_bookings():
 # REQUEST PASSWORD RESET
 # ---------------------------
 @auth_bp.route("/forgot-password", methods=["POST"])
+@rate_limited("forgot_password")
 def forgot_password():
     try:
         data = request.get_json()
@@ -239,11 +260,7 @@ def forgot_password():
             upsert=True
         )
         
-        print(f"\n{'='*50}")
-        print(f"🔐 PASSWORD RESET TOKEN FOR: {email}")
-        print(f"Token: {reset_token}")
-        print(f"Expires: {expires_at}")
-        print(f"{'='*50}\n")
+        logger.info("Password reset token for %s: %s (expires %s)", email, reset_token, expires_at)
 
         # Actually send the reset token via email
         user_name = email.split('@')[0]
@@ -254,7 +271,7 @@ def forgot_password():
         )
 
         if not email_sent:
-            print(f"Email delivery failed for {email}, but token is saved in DB.")
+            logger.warning("Email delivery failed for %s, but token is saved in DB.", email)
             # Still return success so the user isn't confused —
             # but log this so you can investigate delivery issues.
 
@@ -336,7 +353,7 @@ def reset_password():
         if not user:
             return jsonify({"error": "User not found"}), 404
         
-        hashed_password = bcrypt.generate_password_hash(new_password).decode("utf-8")
+        hashed_password = get_password_hasher().hash_password(new_password)
         
         mongo.db.users.update_one(
             {"email": email},
@@ -348,11 +365,16 @@ def reset_password():
             {"$set": {"used": True, "used_at": datetime.utcnow()}}
         )
         
+        # Sign out every existing session
+        revoke_tokens(user["_id"])
+        
         return jsonify({
             "message": "Password has been reset successfully",
             "email": email
         }), 200
         
+    except PasswordHasherBusy:
+        return _hashing_busy()
     except Exception as e:
         return jsonify({"error": f"Failed to reset password: {str(e)}"}), 500
 
@@ -382,19 +404,48 @@ def change_password():
         if not user:
             return jsonify({"error": "User not found"}), 404
         
-        if not bcrypt.check_password_hash(user["password"], current_password):
+        hasher = get_password_hasher()
+        if not hasher.check_password(user["password"], current_password):
             return jsonify({"error": "Current password is incorrect"}), 401
         
-        hashed_password = bcrypt.generate_password_hash(new_password).decode("utf-8")
+        hashed_password = hasher.hash_password(new_password)
         
         mongo.db.users.update_one(
             {"email": email},
             {"$set": {"password": hashed_password}}
         )
         
+        # Sign out other sessions; this one continues with a fresh token
+        version = revoke_tokens(user["_id"])
+        access_token = create_access_token(
+            identity=str(user["_id"]),
+            additional_claims={
+                "email": user["email"],
+                "role": user["role"],
+                TOKEN_VERSION_CLAIM: version
+            }
+        )
+        
         return jsonify({
-            "message": "Password changed successfully"
+            "message": "Password changed successfully",
+            "access_token": access_token
         }), 200
         
+    except PasswordHasherBusy:
+        return _hashing_busy()
+    except Exception as e:
+        return jsonify({"error": f"Failed to change password: {str(e)}"}), 500
+
+
+# ---------------------------
+# PASSWORD HASHING METRICS
+# ---------------------------
+@auth_bp.route("/password-hashing/metrics", methods=["GET"])
+@jwt_required()
+@admin_only
+def get_password_hashing_metrics():
+    """Queue depth, rejections and latency of this process's hashing pool"""
+    try:
+        return jsonify({"hashing": get_password_hasher().metrics_snapshot()}), 200
     except Exception as e:
-        return jsonify({"error": f"Failed to change password: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Failed to get hashing metrics: {str(e)}"}), 500
@@ -4,9 +4,13 @@ from extensions import mongo
 from models.booking import Booking
 from utils.decorators import landlord_only, tenant_only
 from utils.validators import validate_booking_data
+from utils.request_deadline import deadline
 from bson import ObjectId
 from datetime import datetime
 from services.notification_service import NotificationService
+from services.booking_snapshot import property_snapshot, landlord_tier
+from services import usage_counters
+from routes.subscription_routes import SUBSCRIPTION_TIERS
 
 booking_bp = Blueprint("booking", __name__)
 
@@ -205,10 +209,21 @@ def confirm_booking(booking_id):
         if data.get("notes"):
             update_data["notes"] = data["notes"]
         
-        mongo.db.bookings.update_one(
-            {"_id": ObjectId(booking_id)},
+        # Only a still-pending booking can be confirmed, so the usage counters
+        # are incremented exactly once even if the request is repeated
+        result = mongo.db.bookings.update_one(
+            {"_id": ObjectId(booking_id), "status": "pending"},
             {"$set": update_data}
         )
+        if not result.modified_count:
+            return jsonify({"error": "Booking is no longer pending"}), 409
+        
+        usage_counters.record_confirmed_booking(
+            landlord_id,
+            usage_counters.booking_commission(booking, {
+                tier: details["commission_rate"] for tier, details in SUBSCRIPTION_TIERS.items()
+            })
+        )
 
                 # ✨ SEND NOTIFICATIONS TO TENANT
         property_data = mongo.db.properties.find_one({"_id": ObjectId(booking["property_id"])})
@@ -415,6 +430,7 @@ def update_booking_notes(booking_id):
 @booking_bp.route("/landlord/statistics", methods=["GET"])
 @jwt_required()
 @landlord_only
+@deadline("dashboard")
 def get_landlord_booking_statistics():
     """Get booking statistics for the landlord's properties"""
     try:
@@ -561,6 +577,9 @@ def create_booking():
         # Get tenant details
         tenant_data = mongo.db.users.find_one({"_id": tenant_id})
         
+        # Landlord is needed for the tier snapshot and the notification below
+        landlord_data = mongo.db.users.find_one({"_id": ObjectId(landlord_id)})
+        
         # Create booking object
         booking = Booking(
             property_id=ObjectId(property_id),
@@ -575,7 +594,9 @@ def create_booking():
             tenant_phone=data.get("tenant_phone"),
             message=data.get("message"),
             created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+            updated_at=datetime.utcnow(),
+            property_snapshot=property_snapshot(property_data),
+            landlord_tier=landlord_tier(landlord_data)
         )
         
         # Insert into database
@@ -585,8 +606,6 @@ def create_booking():
         booking_data_with_id = booking.to_dict()
         booking_data_with_id['_id'] = result.inserted_id
         
-        landlord_data = mongo.db.users.find_one({"_id": ObjectId(landlord_id)})
-        
         notification_service.notify_new_booking(
             booking_data=booking_data_with_id,
             property_data=property_data,
@@ -929,6 +948,7 @@ def update_tenant_booking(booking_id):
 @booking_bp.route("/tenant/statistics", methods=["GET"])
 @jwt_required()
 @tenant_only
+@deadline("dashboard")
 def get_tenant_booking_statistics():
     """Get booking statistics for the tenant"""
     try:
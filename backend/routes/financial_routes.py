@@ -1,6 +1,10 @@
 # backend/routes/financial_routes.py
 """
 Financial Routes - Admin Financial Management
+
+Revenue figures are read from the append-only ledger (`ledger_entries`) and its
+daily rollup (`ledger_daily`), see services/ledger_service. Every route reads
+from a secondary through the reporting client (utils/mongo_routing).
 """
 
 from flask import Blueprint, request, jsonify
@@ -9,6 +13,10 @@ from extensions import mongo
 from utils.decorators import admin_only
 from bson import ObjectId
 from datetime import datetime, timedelta
+from services import ledger_service
+from utils.export_stream import export_format, export_response, landlord_emails
+from utils.mongo_routing import REPORTING, reads_from
+from utils.request_deadline import deadline
 
 financial_bp = Blueprint("financial", __name__)
 
@@ -19,6 +27,8 @@ financial_bp = Blueprint("financial", __name__)
 @financial_bp.route("/overview", methods=["GET"])
 @jwt_required()
 @admin_only
+@deadline("report")
+@reads_from(REPORTING)
 def get_financial_overview():
     """Get comprehensive financial overview"""
     try:
@@ -26,25 +36,13 @@ def get_financial_overview():
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        # ===== SUBSCRIPTION REVENUE =====
-        subscription_pipeline = [
-            {
-                "$match": {
-                    "type": "subscription",
-                    "status": "completed",
-                    "completed_at": {"$gte": start_date, "$lte": end_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$tier",
-                    "revenue": {"$sum": "$amount"},
-                    "count": {"$sum": 1}
-                }
-            }
-        ]
+        first_day = ledger_service.day_key(start_date)
+        last_day = ledger_service.day_key(end_date)
         
-        subscription_revenue = list(mongo.db.payments.aggregate(subscription_pipeline))
+        # ===== SUBSCRIPTION REVENUE =====
+        subscription_revenue = ledger_service.revenue_by(
+            "tier", first_day, last_day, {"type": "subscription"}
+        )
         
         total_subscription_revenue = sum(item["revenue"] for item in subscription_revenue)
         
@@ -58,28 +56,11 @@ def get_financial_overview():
                 }
             },
             {
-                "$lookup": {
-                    "from": "properties",
-                    "localField": "property_id",
-                    "foreignField": "_id",
-                    "as": "property"
-                }
-            },
-            {"$unwind": "$property"},
-            {
-                "$lookup": {
-                    "from": "users",
-                    "localField": "landlord_id",
-                    "foreignField": "_id",
-                    "as": "landlord"
-                }
-            },
-            {"$unwind": "$landlord"},
-            {
+                # Tier and price are stamped on the booking when it is created
                 "$group": {
-                    "_id": "$landlord.subscription.tier",
+                    "_id": "$landlord_tier",
                     "bookings": {"$sum": 1},
-                    "avg_property_price": {"$avg": "$property.price"}
+                    "avg_property_price": {"$avg": "$property_snapshot.price"}
                 }
             }
         ]
@@ -96,7 +77,7 @@ def get_financial_overview():
             tier = item["_id"] or "free"
             commission_rate = SUBSCRIPTION_TIERS.get(tier, SUBSCRIPTION_TIERS["free"])["commission_rate"]
             # Estimate: Assume average rent is 1 month = property price
-            estimated_commission = (item["avg_property_price"] * commission_rate / 100) * item["bookings"]
+            estimated_commission = ((item["avg_property_price"] or 0) * commission_rate / 100) * item["bookings"]
             total_commission += estimated_commission
             
             commission_breakdown.append({
@@ -107,82 +88,37 @@ def get_financial_overview():
             })
         
         # ===== ACTIVE SUBSCRIPTIONS =====
-        active_subscriptions = {}
-        for tier in ["free", "basic", "premium"]:
-            count = mongo.db.users.count_documents({
-                "role": "landlord",
-                "subscription.tier": tier,
-                "subscription.status": "active"
-            })
-            active_subscriptions[tier] = count
+        active_subscriptions = {tier: 0 for tier in ["free", "basic", "premium"]}
+        for item in mongo.db.users.aggregate([
+            {"$match": {"role": "landlord", "subscription.status": "active"}},
+            {"$group": {"_id": "$subscription.tier", "count": {"$sum": 1}}}
+        ]):
+            if item["_id"] in active_subscriptions:
+                active_subscriptions[item["_id"]] = item["count"]
         
         # ===== MONTHLY RECURRING REVENUE (MRR) =====
-        mrr_pipeline = [
-            {
-                "$match": {
-                    "role": "landlord",
-                    "subscription.status": "active",
-                    "subscription.tier": {"$in": ["basic", "premium"]},
-                    "subscription.billing_cycle": "monthly"
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$subscription.tier",
-                    "count": {"$sum": 1}
-                }
-            }
-        ]
-        
-        mrr_data = list(mongo.db.users.aggregate(mrr_pipeline))
-        
-        mrr = 0
-        for item in mrr_data:
-            tier = item["_id"]
-            count = item["count"]
-            tier_price = SUBSCRIPTION_TIERS[tier]["price"]
-            mrr += tier_price * count
+        mrr = ledger_service.monthly_recurring_revenue()
         
         # ===== DAILY REVENUE TREND =====
-        daily_revenue = list(mongo.db.payments.aggregate([
-            {
-                "$match": {
-                    "status": "completed",
-                    "completed_at": {"$gte": start_date, "$lte": end_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": {
-                        "year": {"$year": "$completed_at"},
-                        "month": {"$month": "$completed_at"},
-                        "day": {"$dayOfMonth": "$completed_at"}
-                    },
-                    "revenue": {"$sum": "$amount"}
-                }
-            },
-            {"$sort": {"_id": 1}}
-        ]))
-        
-        # Format daily data
-        formatted_daily = []
-        for item in daily_revenue:
-            date_obj = datetime(item["_id"]["year"], item["_id"]["month"], item["_id"]["day"])
-            formatted_daily.append({
-                "date": date_obj.strftime("%Y-%m-%d"),
-                "revenue": round(item["revenue"], 2)
-            })
+        formatted_daily = [
+            {"date": item["_id"], "revenue": round(item["revenue"], 2)}
+            for item in ledger_service.revenue_by("day", first_day, last_day)
+        ]
         
         # ===== TOTAL REVENUE =====
         total_revenue = total_subscription_revenue + total_commission
         
+        # ===== LATE M-PESA CONFIRMATIONS AWAITING AN ADMIN =====
+        needs_reconciliation = mongo.db.payments.count_documents({"needs_reconciliation": True})
+        
         return jsonify({
             "summary": {
                 "total_revenue": round(total_revenue, 2),
                 "subscription_revenue": round(total_subscription_revenue, 2),
                 "commission_revenue": round(total_commission, 2),
                 "mrr": round(mrr, 2),
-                "period_days": days
+                "period_days": days,
+                "payments_needing_reconciliation": needs_reconciliation
             },
             "subscription_breakdown": subscription_revenue,
             "commission_breakdown": commission_breakdown,
@@ -201,6 +137,8 @@ def get_financial_overview():
 @financial_bp.route("/subscriptions/analytics", methods=["GET"])
 @jwt_required()
 @admin_only
+@deadline("report")
+@reads_from(REPORTING)
 def get_subscription_analytics():
     """Get detailed subscription analytics"""
     try:
@@ -217,22 +155,12 @@ def get_subscription_analytics():
         
         # New subscriptions (last 30 days)
         thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        new_subscriptions = list(mongo.db.payments.aggregate([
-            {
-                "$match": {
-                    "type": "subscription",
-                    "status": "completed",
-                    "completed_at": {"$gte": thirty_days_ago}
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$tier",
-                    "count": {"$sum": 1},
-                    "revenue": {"$sum": "$amount"}
-                }
-            }
-        ]))
+        new_subscriptions = ledger_service.revenue_by(
+            "tier",
+            ledger_service.day_key(thirty_days_ago),
+            ledger_service.day_key(datetime.utcnow()),
+            {"type": "subscription"}
+        )
         
         # Churn rate (cancelled subscriptions)
         cancelled = mongo.db.users.count_documents({
@@ -277,6 +205,8 @@ def get_subscription_analytics():
 @financial_bp.route("/transactions", methods=["GET"])
 @jwt_required()
 @admin_only
+@deadline("report")
+@reads_from(REPORTING)
 def get_all_transactions():
     """Get all financial transactions"""
     try:
@@ -284,14 +214,9 @@ def get_all_transactions():
         per_page = request.args.get("per_page", 20, type=int)
         transaction_type = request.args.get("type")
         status = request.args.get("status")
+        needs_reconciliation = request.args.get("needs_reconciliation") == "true"
         
-        query = {}
-        
-        if transaction_type:
-            query["type"] = transaction_type
-        
-        if status:
-            query["status"] = status
+        query = _transaction_query(transaction_type, status, needs_reconciliation)
         
         total_count = mongo.db.payments.count_documents(query)
         
@@ -301,16 +226,13 @@ def get_all_transactions():
                           .skip(skip)
                           .limit(per_page))
         
-        # Enrich with landlord details
+        # Enrich with landlord details (one batched read for the page)
+        emails = landlord_emails(txn.get("landlord_id") for txn in transactions)
+        
         for txn in transactions:
-            landlord = mongo.db.users.find_one(
-                {"_id": ObjectId(txn["landlord_id"])},
-                {"email": 1}
-            )
-            
             txn["_id"] = str(txn["_id"])
             txn["landlord_id"] = str(txn["landlord_id"])
-            txn["landlord_email"] = landlord["email"] if landlord else "Unknown"
+            txn["landlord_email"] = emails.get(txn["landlord_id"]) or "Unknown"
             
             if txn.get("created_at"):
                 txn["created_at"] = txn["created_at"].isoformat()
@@ -330,6 +252,55 @@ def get_all_transactions():
         return jsonify({"error": f"Failed to get transactions: {str(e)}"}), 500
 
 
+def _transaction_query(transaction_type=None, status=None, needs_reconciliation=False):
+    query = {}
+    if transaction_type:
+        query["type"] = transaction_type
+    if status:
+        query["status"] = status
+    if needs_reconciliation:
+        # Late M-Pesa confirmations, see services/payment_service
+        query["needs_reconciliation"] = True
+    return query
+
+
+@financial_bp.route("/transactions/export", methods=["GET"])
+@jwt_required()
+@admin_only
+@reads_from(REPORTING)
+def export_transactions():
+    """Stream every matching transaction as CSV (default) or NDJSON"""
+    try:
+        fmt = export_format()
+        if not fmt:
+            return jsonify({"error": "Invalid format. Use csv or ndjson"}), 400
+        
+        query = _transaction_query(request.args.get("type"), request.args.get("status"),
+                                   request.args.get("needs_reconciliation") == "true")
+        cursor = mongo.db.payments.find(
+            query,
+            {"mpesa_callback_data": 0, "mpesa_result": 0}
+        ).sort("created_at", -1)
+        
+        def add_landlord_emails(batch):
+            emails = landlord_emails(txn.get("landlord_id") for txn in batch)
+            for txn in batch:
+                txn["landlord_email"] = emails.get(str(txn.get("landlord_id"))) or "Unknown"
+        
+        return export_response(
+            cursor,
+            ["_id", "type", "tier", "amount", "currency", "status", "billing_cycle",
+             "landlord_id", "landlord_email", "mpesa_receipt_number", "created_at", "completed_at",
+             "needs_reconciliation", "reconciliation_reason"],
+            fmt,
+            "transactions",
+            enrich=add_landlord_emails
+        )
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to export transactions: {str(e)}"}), 500
+
+
 # ============================================================================
 # REVENUE REPORT
 # ============================================================================
@@ -337,83 +308,30 @@ def get_all_transactions():
 @financial_bp.route("/report", methods=["GET"])
 @jwt_required()
 @admin_only
+@deadline("report")
+@reads_from(REPORTING)
 def get_revenue_report():
     """Generate comprehensive revenue report"""
     try:
-        start_date_str = request.args.get("start_date")
-        end_date_str = request.args.get("end_date")
+        start_date, end_date = _report_period()
         
-        if start_date_str and end_date_str:
-            start_date = datetime.fromisoformat(start_date_str)
-            end_date = datetime.fromisoformat(end_date_str)
-        else:
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(days=30)
+        first_day = ledger_service.day_key(start_date)
+        last_day = ledger_service.day_key(end_date)
         
         # Total revenue in period
-        total_revenue_result = list(mongo.db.payments.aggregate([
-            {
-                "$match": {
-                    "status": "completed",
-                    "completed_at": {"$gte": start_date, "$lte": end_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": None,
-                    "total": {"$sum": "$amount"},
-                    "count": {"$sum": 1}
-                }
-            }
-        ]))
+        total_revenue_result = ledger_service.revenue_by(None, first_day, last_day)
         
-        total_revenue = total_revenue_result[0]["total"] if total_revenue_result else 0
+        total_revenue = total_revenue_result[0]["revenue"] if total_revenue_result else 0
         transaction_count = total_revenue_result[0]["count"] if total_revenue_result else 0
         
         # Revenue by type
-        revenue_by_type = list(mongo.db.payments.aggregate([
-            {
-                "$match": {
-                    "status": "completed",
-                    "completed_at": {"$gte": start_date, "$lte": end_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$type",
-                    "revenue": {"$sum": "$amount"},
-                    "count": {"$sum": 1}
-                }
-            }
-        ]))
-        
-        # Top paying landlords
-        top_landlords = list(mongo.db.payments.aggregate([
-            {
-                "$match": {
-                    "status": "completed",
-                    "completed_at": {"$gte": start_date, "$lte": end_date}
-                }
-            },
-            {
-                "$group": {
-                    "_id": "$landlord_id",
-                    "total_paid": {"$sum": "$amount"},
-                    "transaction_count": {"$sum": 1}
-                }
-            },
-            {"$sort": {"total_paid": -1}},
-            {"$limit": 10}
-        ]))
+        revenue_by_type = ledger_service.revenue_by("type", first_day, last_day)
         
-        # Enrich with landlord emails
+        # Top paying landlords (email is denormalized on the ledger entries)
+        top_landlords = ledger_service.top_landlords(start_date, end_date)
         for landlord in top_landlords:
-            user = mongo.db.users.find_one(
-                {"_id": ObjectId(landlord["_id"])},
-                {"email": 1}
-            )
             landlord["landlord_id"] = str(landlord.pop("_id"))
-            landlord["email"] = user["email"] if user else "Unknown"
+            landlord["email"] = landlord.get("email") or "Unknown"
         
         return jsonify({
             "period": {
@@ -430,4 +348,46 @@ def get_revenue_report():
         }), 200
         
     except Exception as e:
-        return jsonify({"error": f"Failed to generate report: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Failed to generate report: {str(e)}"}), 500
+
+
+def _report_period():
+    """(start, end) from ?start_date=&end_date= (ISO), default last 30 days"""
+    start_date_str = request.args.get("start_date")
+    end_date_str = request.args.get("end_date")
+    
+    if start_date_str and end_date_str:
+        return datetime.fromisoformat(start_date_str), datetime.fromisoformat(end_date_str)
+    
+    end_date = datetime.utcnow()
+    return end_date - timedelta(days=30), end_date
+
+
+@financial_bp.route("/report/export", methods=["GET"])
+@jwt_required()
+@admin_only
+@reads_from(REPORTING)
+def export_revenue_report():
+    """Stream the ledger entries behind the revenue report as CSV or NDJSON"""
+    try:
+        fmt = export_format()
+        if not fmt:
+            return jsonify({"error": "Invalid format. Use csv or ndjson"}), 400
+        
+        start_date, end_date = _report_period()
+        cursor = mongo.db.ledger_entries.find(
+            {"completed_at": {"$gte": start_date, "$lte": end_date}},
+            {"_id": 0}
+        ).sort("completed_at", 1)
+        
+        # Landlord email is already denormalized on each ledger entry
+        return export_response(
+            cursor,
+            ["completed_at", "day", "payment_id", "type", "tier", "billing_cycle",
+             "amount", "currency", "landlord_id", "landlord_email", "source"],
+            fmt,
+            f"revenue_report_{start_date.date()}_{end_date.date()}"
+        )
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to export report: {str(e)}"}), 500
@@ -4,13 +4,18 @@ M-Pesa Payment Routes
 Handle subscription payments via M-Pesa
 """
 
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import mongo
 from bson import ObjectId
 from datetime import datetime
-from utils.mpesa import MPesaClient, handle_mpesa_callback, format_phone_number
-from utils.decorators import landlord_only
+from utils.mpesa import get_mpesa_client, format_phone_number
+from utils.decorators import landlord_only, admin_only
+from services import mpesa_inbox
+from services.payment_reconciler import next_reconcile_at
+
+logger = logging.getLogger(__name__)
 
 mpesa_bp = Blueprint("mpesa", __name__)
 
@@ -61,8 +66,8 @@ def initiate_mpesa_payment():
         except ValueError as e:
             return jsonify({"error": str(e)}), 400
         
-        # Initialize M-Pesa client
-        mpesa = MPesaClient()
+        # Shared, pooled M-Pesa client
+        mpesa = get_mpesa_client()
         
         # Initiate STK Push
         amount = int(payment['amount'])
@@ -86,11 +91,14 @@ def initiate_mpesa_payment():
                     "mpesa_merchant_request_id": stk_response.get('MerchantRequestID'),
                     "status": "processing",
                     "phone_number": formatted_phone,
-                    "stk_push_initiated_at": datetime.utcnow()
+                    "stk_push_initiated_at": datetime.utcnow(),
+                    # Picked up by the reconciliation worker if no callback comes
+                    "reconcile_attempts": 0,
+                    "next_reconcile_at": next_reconcile_at(0)
                 }}
             )
             
-            print(f"✅ STK Push initiated for payment {payment_id}")
+            logger.info("STK Push initiated for payment %s", payment_id)
             
             return jsonify({
                 "message": "Payment request sent to your phone. Please enter your M-Pesa PIN.",
@@ -104,7 +112,7 @@ def initiate_mpesa_payment():
             }), 400
         
     except Exception as e:
-        print(f"❌ Error initiating M-Pesa payment: {str(e)}")
+        logger.exception("Error initiating M-Pesa payment")
         return jsonify({"error": f"Payment initiation failed: {str(e)}"}), 500
 
 
@@ -112,6 +120,14 @@ def initiate_mpesa_payment():
 # CHECK PAYMENT STATUS
 # ============================================================================
 
+STATUS_MESSAGES = {
+    "pending": "Awaiting payment",
+    "processing": "Processing...",
+    "completed": "Payment successful",
+    "cancelled": "Payment cancelled by user",
+}
+
+
 @mpesa_bp.route("/check-status/<payment_id>", methods=["GET"])
 @jwt_required()
 @landlord_only
@@ -131,60 +147,11 @@ def check_payment_status(payment_id):
         if not payment:
             return jsonify({"error": "Payment not found"}), 404
         
-        # If payment has checkout request ID, query M-Pesa
-        if payment.get('mpesa_checkout_request_id') and payment['status'] == 'processing':
-            mpesa = MPesaClient()
-            
-            try:
-                query_result = mpesa.query_transaction(payment['mpesa_checkout_request_id'])
-                
-                # Update payment status based on query result
-                result_code = query_result.get('ResultCode')
-                
-                if result_code == '0':
-                    # Payment successful
-                    mongo.db.payments.update_one(
-                        {"_id": ObjectId(payment_id)},
-                        {"$set": {
-                            "status": "completed",
-                            "completed_at": datetime.utcnow(),
-                            "mpesa_result": query_result
-                        }}
-                    )
-                    
-                    # Activate subscription
-                    activate_subscription(landlord_id, payment)
-                    
-                    return jsonify({
-                        "status": "completed",
-                        "message": "Payment successful"
-                    }), 200
-                elif result_code == '1032':
-                    # User cancelled
-                    mongo.db.payments.update_one(
-                        {"_id": ObjectId(payment_id)},
-                        {"$set": {
-                            "status": "cancelled",
-                            "cancelled_at": datetime.utcnow()
-                        }}
-                    )
-                    return jsonify({
-                        "status": "cancelled",
-                        "message": "Payment cancelled by user"
-                    }), 200
-                else:
-                    # Still processing or failed
-                    return jsonify({
-                        "status": payment['status'],
-                        "message": query_result.get('ResultDesc', 'Processing...')
-                    }), 200
-                    
-            except Exception as e:
-                print(f"Error querying M-Pesa: {str(e)}")
-        
-        # Return current status
+        # Served from stored state: the callback and the reconciliation worker
+        # (services/payment_reconciler) keep it up to date
         return jsonify({
             "status": payment['status'],
+            "message": STATUS_MESSAGES.get(payment['status'], payment.get('failure_reason')),
             "amount": payment['amount'],
             "tier": payment.get('tier'),
             "created_at": payment['created_at'].isoformat() if payment.get('created_at') else None
@@ -202,98 +169,41 @@ def check_payment_status(payment_id):
 def mpesa_callback():
     """
     Receive M-Pesa payment callbacks
-    This endpoint is called by Safaricom when payment is completed
+    This endpoint is called by Safaricom when payment is completed.
+    
+    The raw payload is stored in the callback inbox and acknowledged straight
+    away; services/mpesa_inbox applies it to the payment in the background.
+    A retried callback for the same CheckoutRequestID is acknowledged and
+    ignored.
     """
     try:
-        callback_data = request.get_json()
-        
-        print(f"📥 M-Pesa Callback received: {callback_data}")
-        
-        # Parse callback
-        parsed = handle_mpesa_callback(callback_data)
-        
-        checkout_request_id = parsed['checkout_request_id']
+        callback_data = request.get_json(silent=True)
         
-        # Find payment by checkout request ID
-        payment = mongo.db.payments.find_one({
-            "mpesa_checkout_request_id": checkout_request_id
-        })
+        if not mpesa_inbox.checkout_request_id(callback_data):
+            return jsonify({"ResultCode": 1, "ResultDesc": "Invalid callback"}), 400
         
-        if not payment:
-            print(f"❌ Payment not found for checkout request: {checkout_request_id}")
-            return jsonify({"ResultCode": 1, "ResultDesc": "Payment not found"}), 404
-        
-        payment_id = str(payment['_id'])
-        landlord_id = payment['landlord_id']
-        
-        if parsed['success']:
-            # Payment successful
-            mongo.db.payments.update_one(
-                {"_id": ObjectId(payment_id)},
-                {"$set": {
-                    "status": "completed",
-                    "completed_at": datetime.utcnow(),
-                    "mpesa_receipt_number": parsed['mpesa_receipt'],
-                    "mpesa_transaction_date": parsed['transaction_date'],
-                    "mpesa_phone_number": parsed['phone_number'],
-                    "mpesa_callback_data": callback_data
-                }}
-            )
-            
-            # Activate subscription
-            activate_subscription(landlord_id, payment)
-            
-            print(f"✅ Payment completed: {payment_id}")
-            
-        else:
-            # Payment failed
-            mongo.db.payments.update_one(
-                {"_id": ObjectId(payment_id)},
-                {"$set": {
-                    "status": "failed",
-                    "failed_at": datetime.utcnow(),
-                    "failure_reason": parsed['result_desc'],
-                    "mpesa_callback_data": callback_data
-                }}
-            )
-            
-            print(f"❌ Payment failed: {payment_id} - {parsed['result_desc']}")
+        inbox_id = mpesa_inbox.store_callback(callback_data)
+        if inbox_id is not None:
+            mpesa_inbox.schedule_apply(inbox_id)
         
         # Acknowledge receipt
         return jsonify({"ResultCode": 0, "ResultDesc": "Success"}), 200
         
     except Exception as e:
-        print(f"❌ Error handling callback: {str(e)}")
+        logger.exception("Error handling callback")
         return jsonify({"ResultCode": 1, "ResultDesc": str(e)}), 500
 
 
 # ============================================================================
-# HELPER FUNCTIONS
+# CLIENT METRICS
 # ============================================================================
 
-def activate_subscription(landlord_id, payment):
-    """Activate subscription after successful payment"""
+@mpesa_bp.route("/metrics", methods=["GET"])
+@jwt_required()
+@admin_only
+def get_mpesa_metrics():
+    """Per-operation Daraja latency / error counters for this process"""
     try:
-        subscription = {
-            "tier": payment["tier"],
-            "status": "active",
-            "billing_cycle": payment["billing_cycle"],
-            "started_at": payment["subscription_period"]["start"],
-            "expires_at": payment["subscription_period"]["end"],
-            "auto_renew": True,
-            "last_payment_id": str(payment["_id"]),
-            "last_payment_date": datetime.utcnow()
-        }
-        
-        mongo.db.users.update_one(
-            {"_id": ObjectId(landlord_id)},
-            {"$set": {"subscription": subscription}}
-        )
-        
-        print(f"✅ Subscription activated for landlord: {landlord_id}")
-        
-        # TODO: Send confirmation email/notification
-        
+        return jsonify({"operations": get_mpesa_client().metrics_snapshot()}), 200
     except Exception as e:
-        print(f"❌ Error activating subscription: {str(e)}")
-        raise
\ No newline at end of file
+        return jsonify({"error": f"Failed to get M-Pesa metrics: {str(e)}"}), 500
@@ -1,8 +1,10 @@
 # notification_routes.py
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from extensions import mongo
 from services.notification_service import NotificationService
+from services import broadcast_service
+from utils.decorators import admin_only
 from bson import ObjectId
 from datetime import datetime
 
@@ -33,13 +35,25 @@ def get_notifications():
         if notification_type:
             query["notification_type"] = notification_type
         
+        # Broadcasts are stored once and merged in at read time
+        broadcasts = broadcast_service.get_user_broadcasts(user_id, get_jwt().get("role"))
+        if is_read is not None:
+            broadcasts = [b for b in broadcasts if b["is_read"] == query["is_read"]]
+        if notification_type:
+            broadcasts = [b for b in broadcasts if b["notification_type"] == notification_type]
+        
         # Get total count
-        total_count = mongo.db.notifications.count_documents(query)
+        total_count = mongo.db.notifications.count_documents(query) + len(broadcasts)
         
-        # Apply pagination and sorting (newest first)
+        # Apply pagination and sorting (newest first). The personal window is
+        # widened by len(broadcasts) so the merged page is always complete.
         skip = (page - 1) * per_page
-        notifications_cursor = mongo.db.notifications.find(query).sort("created_at", -1).skip(skip).limit(per_page)
-        notifications = list(notifications_cursor)
+        personal_offset = max(0, skip - len(broadcasts))
+        notifications_cursor = mongo.db.notifications.find(query).sort("created_at", -1) \
+            .skip(personal_offset).limit(skip - personal_offset + per_page)
+        notifications = broadcast_service.merge_page(
+            list(notifications_cursor), broadcasts, skip, per_page, personal_offset
+        )
         
         # Convert ObjectIds to strings
         for notification in notifications:
@@ -69,7 +83,8 @@ def get_unread_count():
     """Get count of unread notifications"""
     try:
         user_id = get_jwt_identity()
-        count = notification_service.get_unread_count(user_id)
+        count = notification_service.get_unread_count(user_id) + \
+            broadcast_service.count_unread_broadcasts(user_id, get_jwt().get("role"))
         
         return jsonify({
             "unread_count": count
@@ -98,6 +113,10 @@ def mark_notification_as_read(notification_id):
         })
         
         if not notification:
+            # Broadcasts share the notification list, so their ids land here too
+            if broadcast_service.is_visible_broadcast(ObjectId(notification_id), get_jwt().get("role")):
+                broadcast_service.mark_broadcast_read(user_id, ObjectId(notification_id))
+                return jsonify({"message": "Notification marked as read"}), 200
             return jsonify({"error": "Notification not found"}), 404
         
         # Mark as read
@@ -121,6 +140,7 @@ def mark_all_as_read():
     try:
         user_id = get_jwt_identity()
         success = notification_service.mark_all_as_read(user_id)
+        broadcast_service.mark_all_broadcasts_read(user_id, get_jwt().get("role"))
         
         if success:
             return jsonify({"message": "All notifications marked as read"}), 200
@@ -146,6 +166,11 @@ def delete_notification(notification_id):
         # Delete notification
         success = notification_service.delete_notification(ObjectId(notification_id), user_id)
         
+        # Broadcasts cannot be deleted per user, only dismissed
+        if not success and broadcast_service.is_visible_broadcast(ObjectId(notification_id), get_jwt().get("role")):
+            broadcast_service.dismiss_broadcast(user_id, ObjectId(notification_id))
+            success = True
+        
         if success:
             return jsonify({"message": "Notification deleted successfully"}), 200
         else:
@@ -165,10 +190,12 @@ def delete_all_notifications():
         user_id = get_jwt_identity()
         
         result = mongo.db.notifications.delete_many({"user_id": user_id})
+        deleted_count = result.deleted_count + \
+            broadcast_service.dismiss_all_broadcasts(user_id, get_jwt().get("role"))
         
         return jsonify({
-            "message": f"Deleted {result.deleted_count} notifications",
-            "deleted_count": result.deleted_count
+            "message": f"Deleted {deleted_count} notifications",
+            "deleted_count": deleted_count
         }), 200
         
     except Exception as e:
@@ -211,6 +238,17 @@ def get_notification_statistics():
             "created_at": {"$gte": seven_days_ago}
         })
         
+        # Fold in broadcasts merged into this user's inbox
+        broadcasts = broadcast_service.get_user_broadcasts(user_id, get_jwt().get("role"))
+        total_count += len(broadcasts)
+        unread_count += sum(1 for b in broadcasts if not b["is_read"])
+        recent_count += sum(1 for b in broadcasts if b["created_at"] >= seven_days_ago)
+        type_counts = {t["_id"]: t for t in by_type}
+        for b in broadcasts:
+            type_counts.setdefault(b["notification_type"], {"_id": b["notification_type"], "count": 0})
+            type_counts[b["notification_type"]]["count"] += 1
+        by_type = list(type_counts.values())
+        
         return jsonify({
             "total_notifications": total_count,
             "unread_count": unread_count,
@@ -226,10 +264,12 @@ def get_notification_statistics():
 
 @notification_bp.route("/cleanup", methods=["POST"])
 @jwt_required()
+@admin_only
 def cleanup_old_notifications():
     """
-    Cleanup notifications older than specified days
-    This should ideally be restricted to admin users
+    Move read notifications older than specified days to notifications_archive.
+    Runs automatically on a schedule; this endpoint triggers a pass on demand.
+    Unread notifications expire through the TTL index on expires_at.
     """
     try:
         data = request.get_json() or {}
@@ -238,7 +278,7 @@ def cleanup_old_notifications():
         deleted_count = notification_service.cleanup_old_notifications(days)
         
         return jsonify({
-            "message": f"Cleaned up notifications older than {days} days",
+            "message": f"Archived read notifications older than {days} days",
             "deleted_count": deleted_count
         }), 200
         
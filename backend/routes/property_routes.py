@@ -7,16 +7,28 @@ from utils.decorators import landlord_only
 from utils.validators import validate_property_data
 from utils.property_moderation import PropertyModerator
 from config.moderation_config import ModerationConfig
+from routes.subscription_routes import SUBSCRIPTION_TIERS
+from services import usage_counters
+from utils.rate_limit import rate_limited
+from utils.request_deadline import best_effort, deadline, is_partial
 from bson import ObjectId
 from datetime import datetime
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 property_bp = Blueprint("property", __name__)
-# Initialize moderator
-# moderator = PropertyModerator()
 
-# Initialize moderator
-moderator = PropertyModerator()
+# Initialize moderator lazily, on the first property that needs moderating
+_moderator = None
+
+
+def get_moderator():
+    global _moderator
+    if _moderator is None:
+        _moderator = PropertyModerator()
+    return _moderator
 
 @property_bp.route("/", methods=["POST"])
 @jwt_required()
@@ -25,42 +37,43 @@ def create_property():
     """
     Create property with automatic moderation
     """
+    listing_reserved = False
     try:
         user_id = get_jwt_identity()
         data = request.get_json()
         
-        print("\n" + "="*60)
-        print("CREATE PROPERTY - AUTO-MODERATION ENABLED")
-        print("="*60)
-        print(f"User ID: {user_id}")
-        print(f"Property Title: {data.get('title')}")
+        logger.debug("Creating property %r for landlord %s", data.get("title"), user_id)
         
         # Step 1: Validate property data (existing validation)
         is_valid, errors = validate_property_data(data)
         if not is_valid:
-            print(f" Validation failed: {errors}")
+            logger.debug("Property validation failed: %s", errors)
             return jsonify({"error": errors}), 400
         
-        print(" Basic validation passed")
+        # Step 1b: Enforce the plan's listing limit with one conditional update
+        # on the landlord's usage counter (no counting of properties)
+        landlord = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"subscription.tier": 1})
+        tier_id = ((landlord or {}).get("subscription") or {}).get("tier", "free")
+        max_properties = SUBSCRIPTION_TIERS.get(tier_id, SUBSCRIPTION_TIERS["free"])["max_properties"]
+        if not usage_counters.reserve_listing(user_id, max_properties):
+            return jsonify({
+                "error": f"Your {tier_id} plan allows up to {max_properties} properties. Upgrade to add more.",
+                "properties_limit": max_properties,
+                "can_upgrade": tier_id in ["free", "basic"]
+            }), 403
+        listing_reserved = True
         
         # Step 2: Auto-moderation (NEW)
         if ModerationConfig.AUTO_MODERATION_ENABLED:
-            print("\n Running auto-moderation...")
-            
-            moderation_status, moderation_score, moderation_issues = moderator.moderate_property(data)
-            moderation_summary = moderator.get_moderation_summary(
+            moderation_status, moderation_score, moderation_issues = get_moderator().moderate_property(data)
+            moderation_summary = get_moderator().get_moderation_summary(
                 moderation_status, 
                 moderation_score, 
                 moderation_issues
             )
             
-            print(f"   Status: {moderation_status}")
-            print(f"   Score: {moderation_score}/100")
-            print(f"   Issues: {len(moderation_issues)}")
-            
-            if moderation_issues:
-                for issue in moderation_issues[:5]:  # Show first 5
-                    print(f"      - {issue}")
+            logger.debug("Moderation: %s, score %s/100, issues %s",
+                         moderation_status, moderation_score, moderation_issues[:5])
         else:
             # If moderation disabled, approve by default
             moderation_status = 'approved'
@@ -72,12 +85,10 @@ def create_property():
                 'message': 'Auto-moderation disabled',
                 'issues': []
             }
-            print(" Auto-moderation is disabled - approving by default")
+            logger.debug("Auto-moderation is disabled - approving by default")
         
         # Step 3: Auto-geocode if coordinates not provided
         if not data.get("latitude") or not data.get("longitude"):
-            print("\n No coordinates provided. Attempting to geocode...")
-            
             try:
                 from utils.location_utils import geocode_address
                 geocode_result = geocode_address(
@@ -90,11 +101,11 @@ def create_property():
                 if geocode_result:
                     data["latitude"] = geocode_result["latitude"]
                     data["longitude"] = geocode_result["longitude"]
-                    print(f"  Geocoded: {geocode_result['latitude']}, {geocode_result['longitude']}")
+                    logger.debug("Geocoded: %s, %s", geocode_result["latitude"], geocode_result["longitude"])
                 else:
-                    print(" Geocoding failed. Property will be created without coordinates.")
-            except Exception as e:
-                print(f" Geocoding error: {str(e)}")
+                    logger.info("Geocoding failed; property will be created without coordinates")
+            except Exception:
+                logger.warning("Geocoding error", exc_info=True)
         
         # Step 4: Determine property status based on moderation
         if moderation_status == 'approved':
@@ -104,8 +115,6 @@ def create_property():
         else:  # rejected
             property_status = 'inactive'  # Not visible
         
-        print(f"\n Property status will be: {property_status}")
-        
         # Step 5: Create property object with moderation data
         property_obj = Property(
             landlord_id=user_id,
@@ -140,9 +149,12 @@ def create_property():
         # Step 6: Insert into database
         result = mongo.db.properties.insert_one(property_obj.to_dict())
         property_id = str(result.inserted_id)
+        listing_reserved = False  # the slot now belongs to this property
         
-        print(f"\n Property created with ID: {property_id}")
-        print("="*60 + "\n")
+        logger.info("Property created", extra={
+            "property_id": property_id, "landlord_id": user_id,
+            "status": property_status, "moderation_score": moderation_score
+        })
         
         # Step 7: Prepare response
         response = {
@@ -156,9 +168,9 @@ def create_property():
         return jsonify(response), 201
         
     except Exception as e:
-        print(f"\n Error creating property: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        if listing_reserved:
+            usage_counters.release_listing(get_jwt_identity())
+        logger.exception("Error creating property")
         return jsonify({"error": f"Failed to create property: {str(e)}"}), 500
 
 
@@ -228,8 +240,8 @@ def remoderate_property(property_id):
             return jsonify({"error": "Unauthorized"}), 403
         
         # Run moderation
-        moderation_status, moderation_score, moderation_issues = moderator.moderate_property(property_data)
-        moderation_summary = moderator.get_moderation_summary(
+        moderation_status, moderation_score, moderation_issues = get_moderator().moderate_property(property_data)
+        moderation_summary = get_moderator().get_moderation_summary(
             moderation_status, 
             moderation_score, 
             moderation_issues
@@ -269,6 +281,7 @@ def remoderate_property(property_id):
 # GET ALL PROPERTIES (PUBLIC)
 # ---------------------------
 @property_bp.route("/", methods=["GET"], strict_slashes=False)
+@deadline("browse")
 def get_all_properties():
     try:
         # Get query parameters for filtering
@@ -338,8 +351,13 @@ def get_all_properties():
         properties_cursor = mongo.db.properties.find(query).sort(sort_criteria).skip(skip).limit(per_page)
         properties = list(properties_cursor)
 
-        # Get total count for pagination
-        total_count = mongo.db.properties.count_documents(query)
+        # Get total count for pagination. Counting every match is the slow
+        # half of a broad search; if the budget runs out, report a lower bound
+        # (one more page when this one is full)
+        total_count = best_effort(
+            lambda: mongo.db.properties.count_documents(query),
+            default=skip + len(properties) + (1 if len(properties) == per_page else 0)
+        )
 
         # Get the base URL for images
         base_url = request.host_url.rstrip('/')
@@ -372,6 +390,7 @@ def get_all_properties():
             "page": page,
             "per_page": per_page,
             "total_pages": (total_count + per_page - 1) // per_page,
+            "partial": is_partial(),
             "filters_applied": {
                 "city": city,
                 "state": state,
@@ -390,6 +409,7 @@ def get_all_properties():
 # GET SINGLE PROPERTY
 
 @property_bp.route("/<property_id>", methods=["GET"])
+@deadline("browse")
 def get_property(property_id):
     try:
         # Validate ObjectId
@@ -531,7 +551,9 @@ def delete_property(property_id):
             return jsonify({"error": "Unauthorized to delete this property"}), 403
         
         # Delete property
-        mongo.db.properties.delete_one({"_id": ObjectId(property_id)})
+        result = mongo.db.properties.delete_one({"_id": ObjectId(property_id)})
+        if result.deleted_count:
+            usage_counters.release_listing(user_id)
         
         return jsonify({"message": "Property deleted successfully"}), 200
         
@@ -578,6 +600,8 @@ def confirm_property(property_id):
 # ADVANCED SEARCH ENDPOINT
 
 @property_bp.route("/search", methods=["POST"])
+@rate_limited("search")
+@deadline("search")
 def search_properties():
     """
     Advanced search endpoint with POST body
@@ -672,8 +696,11 @@ def search_properties():
         properties_cursor = mongo.db.properties.find(query).sort(sort_criteria).skip(skip).limit(per_page)
         properties = list(properties_cursor)
         
-        # Get total count
-        total_count = mongo.db.properties.count_documents(query)
+        # Get total count (a lower bound if the budget runs out, as above)
+        total_count = best_effort(
+            lambda: mongo.db.properties.count_documents(query),
+            default=skip + len(properties) + (1 if len(properties) == per_page else 0)
+        )
         
         # Convert ObjectId to string
         for prop in properties:
@@ -688,7 +715,8 @@ def search_properties():
             "total": total_count,
             "page": page,
             "per_page": per_page,
-            "total_pages": (total_count + per_page - 1) // per_page
+            "total_pages": (total_count + per_page - 1) // per_page,
+            "partial": is_partial()
         }), 200
         
     except Exception as e:
@@ -697,6 +725,7 @@ def search_properties():
 # GET FILTER OPTIONS (for dropdowns)
 
 @property_bp.route("/filters/options", methods=["GET"])
+@deadline("browse")
 def get_filter_options():
     """
     Get available filter options from existing properties
@@ -752,6 +781,7 @@ def get_filter_options():
 # GET PROPERTY STATISTICS
 
 @property_bp.route("/stats", methods=["GET"])
+@deadline("dashboard")
 def get_property_stats():
     """
     Get statistics about properties
@@ -820,6 +850,7 @@ from utils.location_utils import (
 
 # GEOCODE ADDRESS (Convert address to coordinates)
 @property_bp.route("/geocode", methods=["POST"])
+@rate_limited("geocode")
 def geocode_property_address():
     """
     Convert address to coordinates
@@ -863,6 +894,7 @@ def geocode_property_address():
 # REVERSE GEOCODE (Convert coordinates to address)
 # ---------------------------
 @property_bp.route("/reverse-geocode", methods=["POST"])
+@rate_limited("geocode")
 def reverse_geocode_coordinates():
     """
     Convert coordinates to address
@@ -907,6 +939,8 @@ def reverse_geocode_coordinates():
 # SEARCH PROPERTIES BY LOCATION (Nearby search)
 # ---------------------------
 @property_bp.route("/nearby", methods=["POST"])
+@rate_limited("nearby")
+@deadline("nearby")
 def search_properties_nearby():
     """
     Search properties near a location
@@ -4,12 +4,18 @@ Review & Rating System -
 Properly handles tenant anonymization
 """
 
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import mongo
+from pymongo import ReturnDocument
 from bson import ObjectId
 from datetime import datetime
 from utils.decorators import landlord_only
+from models.notification import default_expires_at
+from services.review_stats import apply_review_change, get_review_stats
+
+logger = logging.getLogger(__name__)
 
 review_bp = Blueprint("reviews", __name__)
 
@@ -128,8 +134,8 @@ def create_review():
         result = mongo.db.reviews.insert_one(review)
         review_id = str(result.inserted_id)
         
-        # Update landlord's average rating
-        update_landlord_rating(landlord_id)
+        # Add this review to the landlord's running rating aggregates
+        apply_review_change(landlord_id, after=review)
         
         # Send notification to landlord
         notification = {
@@ -139,11 +145,12 @@ def create_review():
             "notification_type": "new_review",
             "link": "/landlord/reviews",
             "is_read": False,
-            "created_at": datetime.utcnow()
+            "created_at": datetime.utcnow(),
+            "expires_at": default_expires_at()
         }
         mongo.db.notifications.insert_one(notification)
         
-        print(f" Review created: {review_id} - {rating} stars by {review['tenant_name']}")
+        logger.info("Review created: %s - %s stars by %s", review_id, rating, review['tenant_name'])
         
         return jsonify({
             "message": "Review submitted successfully",
@@ -152,7 +159,7 @@ def create_review():
         }), 201
         
     except Exception as e:
-        print(f" Error creating review: {str(e)}")
+        logger.exception("Error creating review")
         return jsonify({"error": f"Failed to create review: {str(e)}"}), 500
 
 # GET LANDLORD REVIEWS (PUBLIC)
@@ -221,7 +228,7 @@ def get_landlord_reviews(landlord_id):
         }), 200
         
     except Exception as e:
-        print(f" Error getting reviews: {str(e)}")
+        logger.exception("Error getting reviews")
         return jsonify({"error": f"Failed to get reviews: {str(e)}"}), 500
 
 # GET MY REVIEWS (TENANT)
@@ -249,7 +256,7 @@ def get_my_reviews():
         return jsonify({"reviews": reviews}), 200
         
     except Exception as e:
-        print(f" Error getting tenant reviews: {str(e)}")
+        logger.exception("Error getting tenant reviews")
         return jsonify({"error": f"Failed to get reviews: {str(e)}"}), 500
 
 # GET REVIEWS ABOUT ME (LANDLORD)
@@ -299,7 +306,7 @@ def get_reviews_about_me():
         }), 200
         
     except Exception as e:
-        print(f" Error getting landlord reviews: {str(e)}")
+        logger.exception("Error getting landlord reviews")
         return jsonify({"error": f"Failed to get reviews: {str(e)}"}), 500
 
 # UPDATE REVIEW
@@ -347,17 +354,22 @@ def update_review(review_id):
                 "value_for_money": float(data["categories"].get("value_for_money", 0))
             }
         
-        mongo.db.reviews.update_one(
+        # Return the pre-update document so the aggregate delta is exact even
+        # if the review changed since it was read above
+        before = mongo.db.reviews.find_one_and_update(
             {"_id": ObjectId(review_id)},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE
         )
         
-        update_landlord_rating(review["landlord_id"])
+        if before and before.get("status") == "active":
+            after = {**before, **update_data}
+            apply_review_change(review["landlord_id"], before=before, after=after)
         
         return jsonify({"message": "Review updated successfully"}), 200
         
     except Exception as e:
-        print(f" Error updating review: {str(e)}")
+        logger.exception("Error updating review")
         return jsonify({"error": f"Failed to update review: {str(e)}"}), 500
 
 
@@ -381,17 +393,21 @@ def delete_review(review_id):
         if not review:
             return jsonify({"error": "Review not found or unauthorized"}), 404
         
-        mongo.db.reviews.update_one(
-            {"_id": ObjectId(review_id)},
-            {"$set": {"status": "deleted", "deleted_at": datetime.utcnow()}}
+        # Only an active -> deleted transition removes the review from the
+        # aggregates (a hidden review was already removed)
+        before = mongo.db.reviews.find_one_and_update(
+            {"_id": ObjectId(review_id), "status": {"$ne": "deleted"}},
+            {"$set": {"status": "deleted", "deleted_at": datetime.utcnow()}},
+            return_document=ReturnDocument.BEFORE
         )
         
-        update_landlord_rating(review["landlord_id"])
+        if before and before.get("status") == "active":
+            apply_review_change(review["landlord_id"], before=before)
         
         return jsonify({"message": "Review deleted successfully"}), 200
         
     except Exception as e:
-        print(f" Error deleting review: {str(e)}")
+        logger.exception("Error deleting review")
         return jsonify({"error": f"Failed to delete review: {str(e)}"}), 500
 
 # MARK REVIEW AS HELPFUL
@@ -412,7 +428,7 @@ def mark_helpful(review_id):
         return jsonify({"message": "Marked as helpful"}), 200
         
     except Exception as e:
-        print(f" Error marking helpful: {str(e)}")
+        logger.exception("Error marking helpful")
         return jsonify({"error": f"Failed to mark as helpful: {str(e)}"}), 500
 
 # REPORT REVIEW
@@ -442,157 +458,29 @@ def report_review(review_id):
         }
         mongo.db.review_reports.insert_one(report)
         
-        review = mongo.db.reviews.find_one({"_id": ObjectId(review_id)})
-        if review and review.get("reported_count", 0) >= 3:
-            mongo.db.reviews.update_one(
-                {"_id": ObjectId(review_id)},
-                {"$set": {"status": "hidden"}}
-            )
+        # Hide after 3 reports; the status filter makes the transition
+        # happen (and leave the aggregates) exactly once
+        hidden = mongo.db.reviews.find_one_and_update(
+            {"_id": ObjectId(review_id), "status": "active", "reported_count": {"$gte": 3}},
+            {"$set": {"status": "hidden"}}
+        )
+        if hidden:
+            apply_review_change(hidden["landlord_id"], before=hidden)
         
         return jsonify({"message": "Review reported"}), 200
         
     except Exception as e:
-        print(f" Error reporting review: {str(e)}")
+        logger.exception("Error reporting review")
         return jsonify({"error": f"Failed to report review: {str(e)}"}), 500
 
 
 # HELPER FUNCTIONS
 
-def update_landlord_rating(landlord_id):
-    """Update landlord's overall rating based on reviews"""
-    try:
-        pipeline = [
-            {
-                "$match": {
-                    "landlord_id": landlord_id,
-                    "status": "active"
-                }
-            },
-            {
-                "$group": {
-                    "_id": None,
-                    "avg_rating": {"$avg": "$rating"},
-                    "total_reviews": {"$sum": 1},
-                    "avg_communication": {"$avg": "$categories.communication"},
-                    "avg_responsiveness": {"$avg": "$categories.responsiveness"},
-                    "avg_property_accuracy": {"$avg": "$categories.property_accuracy"},
-                    "avg_cleanliness": {"$avg": "$categories.cleanliness"},
-                    "avg_value_for_money": {"$avg": "$categories.value_for_money"}
-                }
-            }
-        ]
-        
-        result = list(mongo.db.reviews.aggregate(pipeline))
-        
-        if result:
-            stats = result[0]
-            mongo.db.users.update_one(
-                {"_id": ObjectId(landlord_id)},
-                {"$set": {
-                    "rating": round(stats.get("avg_rating", 0), 2),
-                    "total_reviews": stats.get("total_reviews", 0),
-                    "rating_breakdown": {
-                        "communication": round(stats.get("avg_communication", 0), 2),
-                        "responsiveness": round(stats.get("avg_responsiveness", 0), 2),
-                        "property_accuracy": round(stats.get("avg_property_accuracy", 0), 2),
-                        "cleanliness": round(stats.get("avg_cleanliness", 0), 2),
-                        "value_for_money": round(stats.get("avg_value_for_money", 0), 2)
-                    }
-                }}
-            )
-        else:
-            mongo.db.users.update_one(
-                {"_id": ObjectId(landlord_id)},
-                {"$set": {"rating": 0, "total_reviews": 0}}
-            )
-        
-    except Exception as e:
-        print(f" Error updating landlord rating: {str(e)}")
-
-
 def calculate_landlord_stats(landlord_id):
-    """Calculate detailed statistics for a landlord"""
+    """Detailed statistics for a landlord, read from the running aggregates"""
     try:
-        pipeline = [
-            {
-                "$match": {
-                    "landlord_id": landlord_id,
-                    "status": "active"
-                }
-            },
-            {
-                "$facet": {
-                    "overall": [
-                        {
-                            "$group": {
-                                "_id": None,
-                                "avg_rating": {"$avg": "$rating"},
-                                "total_reviews": {"$sum": 1}
-                            }
-                        }
-                    ],
-                    "rating_distribution": [
-                        {
-                            "$group": {
-                                "_id": "$rating",
-                                "count": {"$sum": 1}
-                            }
-                        },
-                        {"$sort": {"_id": -1}}
-                    ],
-                    "categories": [
-                        {
-                            "$group": {
-                                "_id": None,
-                                "communication": {"$avg": "$categories.communication"},
-                                "responsiveness": {"$avg": "$categories.responsiveness"},
-                                "property_accuracy": {"$avg": "$categories.property_accuracy"},
-                                "cleanliness": {"$avg": "$categories.cleanliness"},
-                                "value_for_money": {"$avg": "$categories.value_for_money"}
-                            }
-                        }
-                    ]
-                }
-            }
-        ]
-        
-        result = list(mongo.db.reviews.aggregate(pipeline))
-        
-        if result and result[0]:
-            data = result[0]
-            overall = data["overall"][0] if data["overall"] else {}
-            categories = data["categories"][0] if data["categories"] else {}
-            
-            distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-            for item in data["rating_distribution"]:
-                distribution[int(item["_id"])] = item["count"]
-            
-            return {
-                "average_rating": round(overall.get("avg_rating", 0), 2),
-                "total_reviews": overall.get("total_reviews", 0),
-                "rating_distribution": distribution,
-                "category_ratings": {
-                    "communication": round(categories.get("communication", 0), 2),
-                    "responsiveness": round(categories.get("responsiveness", 0), 2),
-                    "property_accuracy": round(categories.get("property_accuracy", 0), 2),
-                    "cleanliness": round(categories.get("cleanliness", 0), 2),
-                    "value_for_money": round(categories.get("value_for_money", 0), 2)
-                }
-            }
-        
-        return {
-            "average_rating": 0,
-            "total_reviews": 0,
-            "rating_distribution": {1: 0, 2: 0, 3: 0, 4: 0, 5: 0},
-            "category_ratings": {
-                "communication": 0,
-                "responsiveness": 0,
-                "property_accuracy": 0,
-                "cleanliness": 0,
-                "value_for_money": 0
-            }
-        }
+        return get_review_stats(landlord_id)
         
-    except Exception as e:
-        print(f" Error calculating stats: {str(e)}")
-        return {}
\ No newline at end of file
+    except Exception:
+        logger.exception("Error calculating stats")
+        return {}
@@ -3,12 +3,17 @@
 Subscription Routes - Landlord Subscription Management
 """
 
+import logging
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import mongo
 from bson import ObjectId
 from datetime import datetime, timedelta
 from utils.decorators import landlord_only
+from services.ledger_service import record_payment
+from services.usage_counters import get_usage
+
+logger = logging.getLogger(__name__)
 
 subscription_bp = Blueprint("subscription", __name__)
 
@@ -101,8 +106,11 @@ def get_current_subscription():
     try:
         landlord_id = get_jwt_identity()
         
-        # Get user subscription data
-        user = mongo.db.users.find_one({"_id": ObjectId(landlord_id)})
+        # Subscription and usage counters come from this one document read
+        user = mongo.db.users.find_one(
+            {"_id": ObjectId(landlord_id)},
+            {"subscription": 1, "usage": 1}
+        )
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -118,37 +126,7 @@ def get_current_subscription():
         tier_id = subscription.get("tier", "free")
         tier_details = SUBSCRIPTION_TIERS.get(tier_id, SUBSCRIPTION_TIERS["free"])
         
-        # Get usage statistics
-        property_count = mongo.db.properties.count_documents({"landlord_id": landlord_id})
-        
-        # Calculate commission earned (if applicable)
-        # Commission is calculated from confirmed bookings
-        commission_pipeline = [
-            {
-                "$match": {
-                    "landlord_id": landlord_id,
-                    "status": "confirmed"
-                }
-            },
-            {
-                "$lookup": {
-                    "from": "properties",
-                    "localField": "property_id",
-                    "foreignField": "_id",
-                    "as": "property"
-                }
-            },
-            {"$unwind": "$property"},
-            {
-                "$group": {
-                    "_id": None,
-                    "total_bookings": {"$sum": 1}
-                }
-            }
-        ]
-        
-        commission_result = list(mongo.db.bookings.aggregate(commission_pipeline))
-        total_bookings = commission_result[0]["total_bookings"] if commission_result else 0
+        usage = get_usage(user)
         
         response = {
             "subscription": {
@@ -160,9 +138,12 @@ def get_current_subscription():
                 **tier_details
             },
             "usage": {
-                "properties_count": property_count,
+                "properties_count": usage["listings"],
                 "properties_limit": tier_details["max_properties"],
-                "total_bookings": total_bookings
+                "total_bookings": usage["total_bookings"],
+                "period": usage["period"],
+                "period_bookings": usage["period_bookings"],
+                "commission_accrued": usage["commission_accrued"]
             },
             "can_upgrade": tier_id in ["free", "basic"]
         }
@@ -238,7 +219,7 @@ def subscribe_to_plan():
         payment_result = mongo.db.payments.insert_one(payment)
         payment_id = str(payment_result.inserted_id)
         
-        print(f"✅ Subscription initiated: {tier_id} for {landlord_id}")
+        logger.info("Subscription initiated: %s for %s", tier_id, landlord_id)
         
         return jsonify({
             "message": "Subscription initiated. Please complete payment.",
@@ -280,13 +261,15 @@ def confirm_subscription_payment(payment_id):
             return jsonify({"error": "Payment already processed"}), 400
         
         # Update payment status
+        completed_at = datetime.utcnow()
         mongo.db.payments.update_one(
             {"_id": ObjectId(payment_id)},
             {"$set": {
                 "status": "completed",
-                "completed_at": datetime.utcnow()
+                "completed_at": completed_at
             }}
         )
+        record_payment(payment, completed_at, source="subscription_confirm")
         
         # Activate subscription
         subscription = {
@@ -305,7 +288,7 @@ def confirm_subscription_payment(payment_id):
             {"$set": {"subscription": subscription}}
         )
         
-        print(f"✅ Subscription activated: {payment['tier']} for {landlord_id}")
+        logger.info("Subscription activated: %s for %s", payment['tier'], landlord_id)
         
         return jsonify({
             "message": "Subscription activated successfully",
@@ -348,7 +331,7 @@ def cancel_subscription():
             }}
         )
         
-        print(f"✅ Subscription cancelled: {landlord_id}")
+        logger.info("Subscription cancelled: %s", landlord_id)
         
         return jsonify({
             "message": "Subscription will be cancelled at end of billing period",
@@ -1,6 +1,7 @@
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import logging
 import os
 import uuid
 from datetime import datetime
@@ -13,6 +14,8 @@ from utils.cloudinary_helper import (
     delete_from_cloudinary
 )
 
+logger = logging.getLogger(__name__)
+
 upload_bp = Blueprint("upload", __name__)
 
 # CONFIGURATION
@@ -43,10 +46,8 @@ def generate_unique_filename(filename):
 @upload_bp.route("/debug", methods=["POST"])
 @jwt_required()
 def debug_upload():
-    print("\n=== DEBUG UPLOAD ===")
-    print("Content-Type:", request.content_type)
-    print("Files:", request.files)
-    print("Keys:", list(request.files.keys()))
+    logger.info("Debug upload: content_type=%s, file keys=%s",
+                request.content_type, list(request.files.keys()))
 
     return jsonify({
         "content_type": request.content_type,
@@ -64,13 +65,8 @@ def upload_multiple_images():
     if request.method == "OPTIONS":
         return jsonify({"message": "OK"}), 200
 
-    print("\n=== UPLOAD MULTIPLE IMAGES ===")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Request.files: {request.files}")
-    print(f"Request.files.keys(): {list(request.files.keys())}")
-
     files = request.files.getlist("files")
-    print(f"Files count: {len(files)}")
+    logger.debug("Image upload: %d files (content_type=%s)", len(files), request.content_type)
 
     if not files:
         return jsonify({"error": "No images provided"}), 400
@@ -85,8 +81,6 @@ def upload_multiple_images():
     errors = []
 
     for file in files:
-        print(f"Processing file: {file.filename}")
-        
         if file.filename == "":
             continue
 
@@ -97,7 +91,6 @@ def upload_multiple_images():
         file.seek(0, os.SEEK_END)
         size = file.tell()
         file.seek(0)
-        print(f"File size: {size} bytes")
 
         if size > MAX_IMAGE_SIZE:
             errors.append(f"{file.filename}: Image too large")
@@ -106,7 +99,7 @@ def upload_multiple_images():
         filename = generate_unique_filename(file.filename)
         path = os.path.join(images_dir, filename)
         file.save(path)
-        print(f"Saved file: {path}")
+        logger.debug("Saved %s (%d bytes) to %s", file.filename, size, path)
 
         uploaded_files.append({
             "original_name": file.filename,
@@ -116,7 +109,7 @@ def upload_multiple_images():
             "mimetype": file.content_type
         })
 
-    print(f"Successfully uploaded {len(uploaded_files)} files")
+    logger.info("Uploaded %d images", len(uploaded_files), extra={"rejected": len(errors)})
     
     return jsonify({
         "message": f"Uploaded {len(uploaded_files)} images",
@@ -164,56 +157,39 @@ def upload_multiple_videos():
     if request.method == "OPTIONS":
         return jsonify({"message": "OK"}), 200
 
-    print("\n=== UPLOAD MULTIPLE VIDEOS ===")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Request.files: {request.files}")
-    print(f"Request.files.keys(): {list(request.files.keys())}")
-
     # Get files from request
     files = request.files.getlist("files")
-    print(f"Files count: {len(files)}")
-    
-    # Log each file received
-    for i, file in enumerate(files):
-        print(f"File {i+1}: name={file.filename}, content_type={file.content_type}")
+    logger.debug("Video upload: %s", [(f.filename, f.content_type) for f in files])
 
     if not files:
-        print("❌ No files provided in request")
         return jsonify({"error": "No videos provided"}), 400
 
     if len(files) > 5:
-        print(f"❌ Too many files: {len(files)}")
         return jsonify({"error": "Maximum 5 videos allowed"}), 400
 
     # Validate each file
     for file in files:
-        print(f"Validating file: {file.filename}")
-        
         if not allowed_file(file.filename, ALLOWED_VIDEO_EXTENSIONS):
-            print(f"❌ Invalid video type: {file.filename}")
             return jsonify({"error": f"Invalid video type: {file.filename}"}), 400
 
         file.seek(0, os.SEEK_END)
         size = file.tell()
         file.seek(0)
-        print(f"File size: {size} bytes ({size / 1024 / 1024:.2f} MB)")
         
         if size > MAX_VIDEO_SIZE:
-            print(f"❌ File too large: {file.filename}")
             return jsonify({"error": f"{file.filename} too large (max 50MB)"}), 400
 
     # Upload to Cloudinary
-    print("✅ All validations passed. Uploading to Cloudinary...")
     uploaded_files, errors = cloudinary_upload_multiple_videos(files)
 
     if errors:
-        print(f"❌ Cloudinary upload errors: {errors}")
+        logger.warning("Cloudinary video upload errors: %s", errors)
         return jsonify({
             "error": "Video upload failed",
             "details": errors
         }), 400
 
-    print(f"✅ Successfully uploaded {len(uploaded_files)} videos")
+    logger.info("Uploaded %d videos", len(uploaded_files))
     return jsonify({
         "message": "Videos uploaded successfully",
         "files": uploaded_files
@@ -0,0 +1,280 @@
+"""
+services/analytics_rollup.py
+────────────────────────────
+Fills the `daily_metrics` rollup collection that powers /analytics/*.
+
+Analytics endpoints used to re-run $group-by-day aggregations over the raw
+users / properties / bookings collections on every call, so their latency grew
+with the size of the history. They now sum small pre-aggregated documents.
+
+Two kinds of rollup document live in `daily_metrics`:
+
+  flow      — what happened ON a day (documents created that day)
+              {kind: "flow", day: "2026-10-18", metric: "bookings.new",
+               dimension: "city", value: "Nairobi", count: 12}
+  snapshot  — the state of a whole collection AS OF a day
+              {kind: "snapshot", day: "2026-10-18", metric: "properties.total",
+               dimension: "status", value: "active", count: 340, price_sum: ...}
+
+Flow metrics / dimensions:
+  users.new            all, role
+  properties.new       all, status, city, type       (+ price_sum)
+  bookings.new         all, status, city, property
+  bookings.confirmed   all                           (by confirmed_at day)
+
+Snapshot metrics / dimensions:
+  users.total          role
+  properties.total     all, status, city, type       (+ price_sum)
+  bookings.total       status
+  tenants.repeat       all                           (tenants with > 1 booking)
+
+Jobs (registered in app.py):
+  run_analytics_rollup_nightly   — finalises every day up to yesterday that has
+                                   not been rolled up yet, then refreshes today
+  run_analytics_rollup_intraday  — re-rolls today and refreshes the snapshots
+
+Days are UTC. Re-rolling a day is idempotent (deterministic _id + replace).
+"""
+
+import logging
+from datetime import datetime, timedelta
+from pymongo import ReplaceOne
+from extensions import mongo
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────
+# CONFIGURATION
+# ──────────────────────────────────────────────────────────
+STATE_ID    = "daily_metrics"   # _id of the progress doc in analytics_rollup_state
+DAY_FORMAT  = "%Y-%m-%d"
+
+
+def day_key(dt):
+    return dt.strftime(DAY_FORMAT)
+
+
+def _day_bounds(day):
+    start = datetime.strptime(day, DAY_FORMAT)
+    return start, start + timedelta(days=1)
+
+
+def _doc(kind, day, metric, dimension, value, count, price_sum=None):
+    if dimension == "all":
+        value = "all"
+    value = "Unknown" if value is None else str(value)
+    doc = {
+        "_id": f"{kind}|{day}|{metric}|{dimension}|{value}",
+        "kind": kind,
+        "day": day,
+        "metric": metric,
+        "dimension": dimension,
+        "value": value,
+        "count": count,
+        "updated_at": datetime.utcnow()
+    }
+    if price_sum is not None:
+        doc["price_sum"] = price_sum
+    return doc
+
+
+def _grouped(collection, match, field, with_price=False):
+    """[(value, count, price_sum)] grouped by *field* for documents in *match*."""
+    group = {"_id": f"${field}" if field else None, "count": {"$sum": 1}}
+    if with_price:
+        group["price_sum"] = {"$sum": {"$ifNull": ["$price", 0]}}
+    rows = collection.aggregate([{"$match": match}, {"$group": group}], allowDiskUse=True)
+    return [(r["_id"], r["count"], r.get("price_sum")) for r in rows]
+
+
+def _write(kind, day, docs):
+    """Replace every rollup document of (kind, day) with *docs*."""
+    if docs:
+        mongo.db.daily_metrics.bulk_write(
+            [ReplaceOne({"_id": d["_id"]}, d, upsert=True) for d in docs],
+            ordered=False
+        )
+    # Values that disappeared since the last roll (e.g. status moved on)
+    mongo.db.daily_metrics.delete_many({
+        "kind": kind,
+        "day": day,
+        "_id": {"$nin": [d["_id"] for d in docs]}
+    })
+
+
+# ──────────────────────────────────────────────────────────
+# ROLLUP BUILDERS
+# ──────────────────────────────────────────────────────────
+def rollup_day(day):
+    """Recompute every flow metric for one UTC day ("YYYY-MM-DD")."""
+    start, end = _day_bounds(day)
+    created = {"created_at": {"$gte": start, "$lt": end}}
+    docs = []
+
+    def add(metric, dimension, rows):
+        for value, count, price_sum in rows:
+            docs.append(_doc("flow", day, metric, dimension, value, count, price_sum))
+
+    add("users.new", "all", _grouped(mongo.db.users, created, None))
+    add("users.new", "role", _grouped(mongo.db.users, created, "role"))
+
+    for dimension, field in (("all", None), ("status", "status"),
+                             ("city", "city"), ("type", "property_type")):
+        add("properties.new", dimension,
+            _grouped(mongo.db.properties, created, field, with_price=True))
+
+    add("bookings.new", "all", _grouped(mongo.db.bookings, created, None))
+    add("bookings.new", "status", _grouped(mongo.db.bookings, created, "status"))
+    add("bookings.new", "property", _grouped(mongo.db.bookings, created, "property_id"))
+    add("bookings.new", "city", _grouped(mongo.db.bookings, created, "property_snapshot.city"))
+
+    add("bookings.confirmed", "all", _grouped(
+        mongo.db.bookings, {"confirmed_at": {"$gte": start, "$lt": end}}, None
+    ))
+
+    _write("flow", day, docs)
+    return len(docs)
+
+
+def snapshot_current(day=None):
+    """Record the current state breakdowns of each collection under *day*."""
+    day = day or day_key(datetime.utcnow())
+    docs = []
+
+    def add(metric, dimension, rows):
+        for value, count, price_sum in rows:
+            docs.append(_doc("snapshot", day, metric, dimension, value, count, price_sum))
+
+    add("users.total", "role", _grouped(mongo.db.users, {}, "role"))
+
+    for dimension, field in (("all", None), ("status", "status"),
+                             ("city", "city"), ("type", "property_type")):
+        add("properties.total", dimension,
+            _grouped(mongo.db.properties, {}, field, with_price=True))
+
+    add("bookings.total", "status", _grouped(mongo.db.bookings, {}, "status"))
+
+    repeat = list(mongo.db.bookings.aggregate([
+        {"$group": {"_id": "$tenant_id", "n": {"$sum": 1}}},
+        {"$match": {"n": {"$gt": 1}}},
+        {"$count": "tenants"}
+    ], allowDiskUse=True))
+    add("tenants.repeat", "all", [(None, repeat[0]["tenants"] if repeat else 0, None)])
+
+    _write("snapshot", day, docs)
+    return len(docs)
+
+
+def _earliest_day():
+    """First UTC day that has any user, property or booking."""
+    firsts = []
+    for collection in (mongo.db.users, mongo.db.properties, mongo.db.bookings):
+        doc = collection.find_one({"created_at": {"$type": "date"}},
+                                  {"created_at": 1}, sort=[("created_at", 1)])
+        if doc:
+            firsts.append(doc["created_at"])
+    return day_key(min(firsts)) if firsts else None
+
+
+# ──────────────────────────────────────────────────────────
+# JOBS  — called by APScheduler (see app.py)
+# ──────────────────────────────────────────────────────────
+def run_analytics_rollup_nightly():
+    """Roll every not-yet-finalised day up to yesterday, then refresh today."""
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    state = mongo.db.analytics_rollup_state.find_one({"_id": STATE_ID}) or {}
+
+    if state.get("last_complete_day"):
+        cursor = datetime.strptime(state["last_complete_day"], DAY_FORMAT) + timedelta(days=1)
+    else:
+        earliest = _earliest_day()
+        cursor = datetime.strptime(earliest, DAY_FORMAT) if earliest else today
+
+    rolled = 0
+    while cursor < today:
+        rollup_day(day_key(cursor))
+        mongo.db.analytics_rollup_state.update_one(
+            {"_id": STATE_ID},
+            {"$set": {"last_complete_day": day_key(cursor), "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+        cursor += timedelta(days=1)
+        rolled += 1
+
+    run_analytics_rollup_intraday()
+    logger.info("Nightly done — finalised %s day(s)", rolled)
+    return rolled
+
+
+def run_analytics_rollup_intraday():
+    """Refresh today's flow metrics and the current snapshots."""
+    today = day_key(datetime.utcnow())
+    rollup_day(today)
+    snapshot_current(today)
+
+
+# ──────────────────────────────────────────────────────────
+# READ HELPERS  — used by routes/analytics_routes.py
+# ──────────────────────────────────────────────────────────
+def day_range(days, end=None):
+    """(first_day, last_day) keys of the *days* calendar days ending on *end*."""
+    end = end or datetime.utcnow()
+    return day_key(end - timedelta(days=max(days, 1) - 1)), day_key(end)
+
+
+def sum_by_value(metric, dimension, first_day=None, last_day=None):
+    """{value: {"count", "price_sum"}} summed over flow docs in the day range."""
+    match = {"kind": "flow", "metric": metric, "dimension": dimension}
+    if first_day or last_day:
+        match["day"] = {}
+        if first_day:
+            match["day"]["$gte"] = first_day
+        if last_day:
+            match["day"]["$lte"] = last_day
+    rows = mongo.db.daily_metrics.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": "$value",
+            "count": {"$sum": "$count"},
+            "price_sum": {"$sum": {"$ifNull": ["$price_sum", 0]}}
+        }}
+    ])
+    return {r["_id"]: {"count": r["count"], "price_sum": r["price_sum"]} for r in rows}
+
+
+def total(metric, first_day=None, last_day=None):
+    """Sum of a flow metric's "all" dimension over the day range."""
+    return sum_by_value(metric, "all", first_day, last_day).get("all", {}).get("count", 0)
+
+
+def daily_series(metric, first_day, last_day):
+    """[{"date", "count"}] for each day in range that has data, oldest first."""
+    docs = mongo.db.daily_metrics.find(
+        {"kind": "flow", "metric": metric, "dimension": "all",
+         "day": {"$gte": first_day, "$lte": last_day}},
+        {"day": 1, "count": 1}
+    ).sort("day", 1)
+    return [{"date": d["day"], "count": d["count"]} for d in docs if d["count"]]
+
+
+def latest_snapshot(metric, dimension):
+    """{value: {"count", "price_sum"}} from the most recent snapshot day."""
+    latest = mongo.db.daily_metrics.find_one(
+        {"kind": "snapshot", "metric": metric, "dimension": dimension},
+        {"day": 1}, sort=[("day", -1)]
+    )
+    if not latest:
+        return {}
+    docs = mongo.db.daily_metrics.find({
+        "kind": "snapshot", "metric": metric, "dimension": dimension, "day": latest["day"]
+    })
+    return {d["value"]: {"count": d["count"], "price_sum": d.get("price_sum", 0)} for d in docs}
+
+
+if __name__ == "__main__":
+    # Backfill / catch up: python -m services.analytics_rollup
+    from app import create_app
+
+    with create_app().app_context():
+        run_analytics_rollup_nightly()
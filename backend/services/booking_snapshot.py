@@ -0,0 +1,97 @@
+# services/booking_snapshot.py
+"""
+Denormalized property / landlord data stamped onto bookings.
+
+Every booking carries, from the moment it is created:
+
+    property_snapshot: {"city", "state", "property_type", "price"}
+    landlord_tier:     "free" | "basic" | "premium"
+
+so analytics and financial reports can group bookings by city, type, price or
+tier without a $lookup into `properties` or `users`. The values describe the
+property and subscription AT BOOKING TIME and are not rewritten later.
+
+Bookings created before these fields existed are filled in by the one-off
+migration:
+
+    python -m services.booking_snapshot
+"""
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from extensions import mongo
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+_PROPERTY_FIELDS = {"city": 1, "state": 1, "property_type": 1, "price": 1}
+
+
+def property_snapshot(property_data):
+    """The subset of a property document copied onto its bookings."""
+    property_data = property_data or {}
+    return {
+        "city": property_data.get("city"),
+        "state": property_data.get("state"),
+        "property_type": property_data.get("property_type"),
+        "price": property_data.get("price")
+    }
+
+
+def landlord_tier(landlord_data):
+    """Subscription tier of a landlord document (free when none)."""
+    return ((landlord_data or {}).get("subscription") or {}).get("tier") or "free"
+
+
+def backfill_booking_snapshots():
+    """
+    Stamp property_snapshot / landlord_tier onto bookings that lack them.
+
+    Walks the bookings in _id order and resolves each batch's properties and
+    landlords with one $in query apiece. Returns the number of bookings updated.
+    """
+    updated = 0
+    last_id = None
+    while True:
+        query = {"property_snapshot": None}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        bookings = list(mongo.db.bookings.find(
+            query, {"property_id": 1, "landlord_id": 1}
+        ).sort("_id", 1).limit(BACKFILL_BATCH_SIZE))
+        if not bookings:
+            break
+
+        property_ids = {b["property_id"] for b in bookings if isinstance(b.get("property_id"), ObjectId)}
+        properties = {
+            p["_id"]: p for p in mongo.db.properties.find(
+                {"_id": {"$in": list(property_ids)}}, _PROPERTY_FIELDS
+            )
+        }
+        landlord_ids = {
+            ObjectId(b["landlord_id"]) for b in bookings
+            if b.get("landlord_id") and ObjectId.is_valid(str(b["landlord_id"]))
+        }
+        landlords = {
+            str(u["_id"]): u for u in mongo.db.users.find(
+                {"_id": {"$in": list(landlord_ids)}}, {"subscription.tier": 1}
+            )
+        }
+
+        mongo.db.bookings.bulk_write([
+            UpdateOne({"_id": b["_id"]}, {"$set": {
+                "property_snapshot": property_snapshot(properties.get(b.get("property_id"))),
+                "landlord_tier": landlord_tier(landlords.get(str(b.get("landlord_id"))))
+            }})
+            for b in bookings
+        ], ordered=False)
+        updated += len(bookings)
+        last_id = bookings[-1]["_id"]
+    return updated
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    with create_app().app_context():
+        print(f"Backfilled snapshots on {backfill_booking_snapshots()} bookings")
@@ -0,0 +1,212 @@
+# services/broadcast_service.py
+"""
+Fan-out-on-read broadcasts.
+
+A broadcast is stored ONCE in the `broadcasts` collection together with its
+audience criteria (the roles it targets). Nothing is written per user when an
+admin sends it. Instead, every read of a user's notification list / unread
+count merges the active broadcasts for that user's role into the result.
+
+Per-user state lives in `broadcast_receipts`, one small document per
+(user, broadcast) pair that is only created when the user actually reads or
+dismisses the broadcast:
+
+    {"broadcast_id": ObjectId, "user_id": "<str>", "read_at": dt, "dismissed_at": dt}
+
+Only broadcasts from the last BROADCAST_VISIBILITY_DAYS are merged, which keeps
+the per-request broadcast list small and bounded.
+"""
+
+from datetime import datetime, timedelta
+from bson import ObjectId
+from extensions import mongo
+
+
+# Broadcasts older than this are no longer merged into users' inboxes
+BROADCAST_VISIBILITY_DAYS = 30
+
+# Audience value -> roles that receive the broadcast
+AUDIENCE_ROLES = {
+    "all":       ["admin", "landlord", "tenant"],
+    "landlords": ["landlord"],
+    "tenants":   ["tenant"],
+}
+
+
+def audience_roles(target_audience):
+    """Translate the admin-facing audience name into the stored role list."""
+    return AUDIENCE_ROLES.get(target_audience, AUDIENCE_ROLES["all"])
+
+
+def create_broadcast(title, message, target_audience, notification_type,
+                     link=None, sent_by=None, created_at=None, schedule_id=None):
+    """Store one broadcast document and return its ObjectId."""
+    if schedule_id:
+        # A retried scheduled delivery must not publish the broadcast twice
+        existing = mongo.db.broadcasts.find_one({"schedule_id": schedule_id}, {"_id": 1})
+        if existing:
+            return existing["_id"]
+
+    broadcast = {
+        "title": title,
+        "message": message,
+        "notification_type": notification_type,
+        "link": link,
+        "target_audience": target_audience,
+        "audience_roles": audience_roles(target_audience),
+        "sent_by": sent_by,
+        "created_at": created_at or datetime.utcnow(),
+    }
+    if schedule_id:
+        broadcast["schedule_id"] = schedule_id
+    result = mongo.db.broadcasts.insert_one(broadcast)
+    return result.inserted_id
+
+
+def count_audience(target_audience):
+    """Number of users a broadcast currently reaches (index-backed count)."""
+    roles = audience_roles(target_audience)
+    if roles == AUDIENCE_ROLES["all"]:
+        return mongo.db.users.estimated_document_count()
+    return mongo.db.users.count_documents({"role": {"$in": roles}})
+
+
+def _active_broadcasts(role):
+    """Broadcasts visible to *role*, newest first."""
+    if not role:
+        return []
+    cutoff = datetime.utcnow() - timedelta(days=BROADCAST_VISIBILITY_DAYS)
+    return list(mongo.db.broadcasts.find(
+        {"audience_roles": role, "created_at": {"$gte": cutoff}}
+    ).sort("created_at", -1))
+
+
+def _receipts(user_id, broadcast_ids):
+    """Map broadcast_id -> receipt for this user."""
+    if not broadcast_ids:
+        return {}
+    receipts = mongo.db.broadcast_receipts.find({
+        "user_id": user_id,
+        "broadcast_id": {"$in": broadcast_ids}
+    })
+    return {r["broadcast_id"]: r for r in receipts}
+
+
+def get_user_broadcasts(user_id, role):
+    """
+    Return the user's active, non-dismissed broadcasts shaped like notification
+    documents (newest first), so callers can merge them with `notifications`.
+    """
+    broadcasts = _active_broadcasts(role)
+    receipts = _receipts(user_id, [b["_id"] for b in broadcasts])
+
+    items = []
+    for b in broadcasts:
+        receipt = receipts.get(b["_id"], {})
+        if receipt.get("dismissed_at"):
+            continue
+        items.append({
+            "_id": b["_id"],
+            "user_id": user_id,
+            "title": b.get("title"),
+            "message": b.get("message"),
+            "notification_type": b.get("notification_type"),
+            "link": b.get("link"),
+            "data": {},
+            "is_read": bool(receipt.get("read_at")),
+            "read_at": receipt.get("read_at"),
+            "created_at": b.get("created_at"),
+            "broadcast_id": str(b["_id"]),
+            "sent_by": b.get("sent_by"),
+            "is_broadcast": True
+        })
+    return items
+
+
+def count_unread_broadcasts(user_id, role):
+    """Unread, non-dismissed broadcasts for this user."""
+    broadcasts = _active_broadcasts(role)
+    receipts = _receipts(user_id, [b["_id"] for b in broadcasts])
+    return sum(
+        1 for b in broadcasts
+        if not receipts.get(b["_id"], {}).get("read_at")
+        and not receipts.get(b["_id"], {}).get("dismissed_at")
+    )
+
+
+def is_visible_broadcast(broadcast_id, role):
+    """True if *broadcast_id* is an active broadcast addressed to *role*."""
+    if not role:
+        return False
+    cutoff = datetime.utcnow() - timedelta(days=BROADCAST_VISIBILITY_DAYS)
+    return mongo.db.broadcasts.count_documents({
+        "_id": broadcast_id,
+        "audience_roles": role,
+        "created_at": {"$gte": cutoff}
+    }, limit=1) > 0
+
+
+def _set_receipt(user_id, broadcast_ids, field):
+    """Upsert a read/dismiss marker for each broadcast id."""
+    now = datetime.utcnow()
+    # Past the visibility window the broadcast is never merged again, so the
+    # receipt can be dropped by the TTL index
+    expires_at = now + timedelta(days=BROADCAST_VISIBILITY_DAYS)
+    for broadcast_id in broadcast_ids:
+        mongo.db.broadcast_receipts.update_one(
+            {"user_id": user_id, "broadcast_id": broadcast_id},
+            {"$set": {field: now},
+             "$setOnInsert": {"expires_at": expires_at}},
+            upsert=True
+        )
+
+
+def mark_broadcast_read(user_id, broadcast_id):
+    _set_receipt(user_id, [broadcast_id], "read_at")
+
+
+def dismiss_broadcast(user_id, broadcast_id):
+    _set_receipt(user_id, [broadcast_id], "dismissed_at")
+
+
+def mark_all_broadcasts_read(user_id, role):
+    """Mark every unread active broadcast as read; returns how many changed."""
+    unread = [b["_id"] for b in get_user_broadcasts(user_id, role) if not b["is_read"]]
+    _set_receipt(user_id, unread, "read_at")
+    return len(unread)
+
+
+def dismiss_all_broadcasts(user_id, role):
+    """Dismiss every active broadcast; returns how many were dismissed."""
+    visible = [b["_id"] for b in get_user_broadcasts(user_id, role)]
+    _set_receipt(user_id, visible, "dismissed_at")
+    return len(visible)
+
+
+def merge_page(personal, broadcasts, skip, per_page, personal_offset):
+    """
+    Merge one window of personal notifications with the user's broadcasts and
+    return the requested page.
+
+    *personal* must be the personal notifications (newest first) starting at
+    global position *personal_offset*, where
+    personal_offset = max(0, skip - len(broadcasts)), and hold at least
+    (skip - personal_offset) + per_page items when that many exist.
+    Broadcasts newer than the first fetched personal item are known to sit
+    before the window, so they only shift the page offset.
+    """
+    epoch = datetime.min
+    if personal_offset > 0 and personal:
+        first_ts = personal[0].get("created_at") or epoch
+        preceding = [b for b in broadcasts if (b.get("created_at") or epoch) > first_ts]
+        remaining = [b for b in broadcasts if (b.get("created_at") or epoch) <= first_ts]
+    else:
+        preceding, remaining = [], broadcasts
+
+    merged = sorted(
+        personal + remaining,
+        key=lambda n: n.get("created_at") or epoch,
+        reverse=True
+    )
+    start = skip - personal_offset - len(preceding)
+    return merged[start:start + per_page]
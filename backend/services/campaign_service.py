@@ -0,0 +1,167 @@
+# services/campaign_service.py
+"""
+Targeted campaign delivery.
+
+Audience resolution runs as ONE aggregation over `users`: the inactivity and
+property-status criteria are expressed as `$lookup` sub-pipelines (indexed
+equality on landlord_id / tenant_id, `$limit: 1`), so the database answers
+"does this user have a recent booking / a matching property?" without a query
+per user.
+
+Sending runs on a small background pool. The aggregation cursor is streamed
+and notifications are written with chunked `insert_many`, while progress is
+recorded on the campaign's `campaign_logs` document:
+
+    status:           queued -> running -> completed | failed
+    processed:        updated after every chunk
+    recipients_count: final count once the job finishes
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from extensions import mongo
+from models.notification import default_expires_at
+
+logger = logging.getLogger(__name__)
+
+
+# Notifications written per insert_many call
+CAMPAIGN_CHUNK_SIZE = 1000
+
+# At most this many campaigns are delivered at the same time
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="campaign")
+
+
+def build_audience_pipeline(criteria):
+    """
+    Aggregation over `users` that yields {"uid": "<user id str>"} for every
+    user matching *criteria* (role, inactive_days, property_status).
+    """
+    pipeline = []
+
+    if criteria.get("role"):
+        pipeline.append({"$match": {"role": criteria["role"]}})
+
+    # Bookings/properties reference users by the string form of their _id
+    pipeline.append({"$project": {"_id": 0, "uid": {"$toString": "$_id"}}})
+
+    if criteria.get("inactive_days"):
+        threshold = datetime.utcnow() - timedelta(days=criteria["inactive_days"])
+        recent_booking = [
+            {"$match": {"created_at": {"$gt": threshold}}},
+            {"$limit": 1},
+            {"$project": {"_id": 1}}
+        ]
+        # Exclude users with any booking (as landlord or tenant) after the threshold
+        pipeline += [
+            {"$lookup": {
+                "from": "bookings",
+                "localField": "uid",
+                "foreignField": "landlord_id",
+                "pipeline": recent_booking,
+                "as": "recent_as_landlord"
+            }},
+            {"$lookup": {
+                "from": "bookings",
+                "localField": "uid",
+                "foreignField": "tenant_id",
+                "pipeline": recent_booking,
+                "as": "recent_as_tenant"
+            }},
+            {"$match": {"recent_as_landlord": {"$size": 0}, "recent_as_tenant": {"$size": 0}}}
+        ]
+
+    if criteria.get("property_status"):
+        # Keep only users owning at least one property in this status
+        pipeline += [
+            {"$lookup": {
+                "from": "properties",
+                "localField": "uid",
+                "foreignField": "landlord_id",
+                "pipeline": [
+                    {"$match": {"status": criteria["property_status"]}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 1}}
+                ],
+                "as": "matching_properties"
+            }},
+            {"$match": {"matching_properties.0": {"$exists": True}}}
+        ]
+
+    pipeline.append({"$project": {"uid": 1}})
+    return pipeline
+
+
+def start_campaign(campaign_id, title, message, criteria, sent_by):
+    """Queue delivery of an already-logged campaign on the background pool."""
+    app = current_app._get_current_object()
+    return _executor.submit(_run_campaign, app, campaign_id, title, message, criteria, sent_by)
+
+
+def _run_campaign(app, campaign_id, title, message, criteria, sent_by):
+    # Runs outside the request, so it needs its own app context for mongo.db
+    with app.app_context():
+        logs = mongo.db.campaign_logs
+        logs.update_one(
+            {"_id": campaign_id},
+            {"$set": {"status": "running", "started_at": datetime.utcnow()}}
+        )
+        delivered = 0
+        try:
+            cursor = mongo.db.users.aggregate(
+                build_audience_pipeline(criteria),
+                allowDiskUse=True,
+                batchSize=CAMPAIGN_CHUNK_SIZE
+            )
+            chunk = []
+            for row in cursor:
+                now = datetime.utcnow()
+                chunk.append({
+                    "user_id": row["uid"],
+                    "title": title,
+                    "message": message,
+                    "notification_type": "campaign",
+                    "is_read": False,
+                    "created_at": now,
+                    "expires_at": default_expires_at(now),
+                    "campaign_id": str(campaign_id),
+                    "sent_by": sent_by
+                })
+                if len(chunk) >= CAMPAIGN_CHUNK_SIZE:
+                    delivered += _flush(chunk, campaign_id, delivered)
+                    chunk = []
+            if chunk:
+                delivered += _flush(chunk, campaign_id, delivered)
+
+            logs.update_one(
+                {"_id": campaign_id},
+                {"$set": {
+                    "status": "completed",
+                    "recipients_count": delivered,
+                    "completed_at": datetime.utcnow()
+                }}
+            )
+            logger.info("Campaign %s sent to %s users", campaign_id, delivered)
+        except Exception as e:
+            logs.update_one(
+                {"_id": campaign_id},
+                {"$set": {
+                    "status": "failed",
+                    "error": str(e),
+                    "recipients_count": delivered,
+                    "completed_at": datetime.utcnow()
+                }}
+            )
+            logger.exception("Campaign %s failed after %s users", campaign_id, delivered)
+
+
+def _flush(chunk, campaign_id, delivered_so_far):
+    """Insert one chunk and publish progress; returns the chunk size."""
+    mongo.db.notifications.insert_many(chunk, ordered=False)
+    mongo.db.campaign_logs.update_one(
+        {"_id": campaign_id},
+        {"$set": {"processed": delivered_so_far + len(chunk)}}
+    )
+    return len(chunk)
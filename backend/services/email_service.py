@@ -1,9 +1,13 @@
+import logging
 import os
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+
 class EmailService:
     """
     Email Service for sending notifications
@@ -23,7 +27,7 @@ class EmailService:
         Send email using SMTP
         """
         if not self.enabled:
-            print(f"[EMAIL DISABLED] Would send to {to_email}: {subject}")
+            logger.info("[EMAIL DISABLED] Would send to %s: %s", to_email, subject)
             return True
         
         try:
@@ -44,11 +48,11 @@ class EmailService:
                 server.login(self.sender_email, self.sender_password)
                 server.sendmail(self.sender_email, to_email, message.as_string())
             
-            print(f"✅ Email sent successfully to {to_email}")
+            logger.info("Email sent successfully to %s", to_email)
             return True
             
-        except Exception as e:
-            print(f"❌ Failed to send email to {to_email}: {str(e)}")
+        except Exception:
+            logger.exception("Failed to send email to %s", to_email)
             return False
 
     # PASSWORD RESET EMAIL  
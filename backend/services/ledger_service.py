@@ -0,0 +1,217 @@
+# services/ledger_service.py
+"""
+Append-only revenue ledger.
+
+Every payment that reaches `completed` is recorded exactly once in
+`ledger_entries`, together with the landlord details reports need and
+pre-bucketed time keys:
+
+    {
+        "payment_id":     "<payments._id as str>",   (unique)
+        "type":           "subscription",
+        "tier":           "basic",
+        "billing_cycle":  "monthly",
+        "amount":         2900,
+        "currency":       "KES",
+        "landlord_id":    "<str>",
+        "landlord_email": "landlord@example.com",
+        "period_end":     <subscription_period.end>,
+        "completed_at":   <datetime>,
+        "day":            "2026-10-18",
+        "month":          "2026-10",
+        "source":         "mpesa_callback" | "mpesa_query" | "subscription_confirm"
+    }
+
+Entries are never updated. Alongside each new entry one $inc is applied to
+`ledger_daily`, a rollup keyed by (day, type, tier) holding revenue and count,
+which the /financial endpoints sum instead of aggregating `payments`.
+
+The ledger for payments completed before it existed, and the daily rollup
+itself, can be (re)built with:
+
+    python -m services.ledger_service
+"""
+
+from datetime import datetime
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from extensions import mongo
+
+
+DAY_FORMAT   = "%Y-%m-%d"
+MONTH_FORMAT = "%Y-%m"
+
+
+def _landlord_email(landlord_id):
+    if not landlord_id or not ObjectId.is_valid(str(landlord_id)):
+        return None
+    user = mongo.db.users.find_one({"_id": ObjectId(str(landlord_id))}, {"email": 1})
+    return user.get("email") if user else None
+
+
+def build_entry(payment, completed_at, source, landlord_email=None):
+    """Ledger document for a completed *payment*."""
+    period = payment.get("subscription_period") or {}
+    return {
+        "payment_id": str(payment["_id"]),
+        "type": payment.get("type"),
+        "tier": payment.get("tier"),
+        "billing_cycle": payment.get("billing_cycle"),
+        "amount": payment.get("amount") or 0,
+        "currency": payment.get("currency"),
+        "landlord_id": str(payment.get("landlord_id")),
+        "landlord_email": landlord_email,
+        "period_end": period.get("end"),
+        "completed_at": completed_at,
+        "day": completed_at.strftime(DAY_FORMAT),
+        "month": completed_at.strftime(MONTH_FORMAT),
+        "source": source,
+        "recorded_at": datetime.utcnow()
+    }
+
+
+def _apply_to_rollup(entry):
+    mongo.db.ledger_daily.update_one(
+        {"_id": f"{entry['day']}|{entry['type']}|{entry['tier']}"},
+        {"$inc": {"revenue": entry["amount"], "count": 1},
+         "$setOnInsert": {
+             "day": entry["day"],
+             "month": entry["month"],
+             "type": entry["type"],
+             "tier": entry["tier"]
+         }},
+        upsert=True
+    )
+
+
+def record_payment(payment, completed_at=None, source=None):
+    """
+    Append the ledger entry for a payment that has just completed.
+
+    Idempotent: the unique payment_id index rejects a second entry for the same
+    payment (e.g. callback and status query both completing it), and the daily
+    rollup is only incremented when the entry is actually inserted. Returns
+    True when a new entry was written.
+    """
+    entry = build_entry(
+        payment,
+        completed_at or datetime.utcnow(),
+        source,
+        _landlord_email(payment.get("landlord_id"))
+    )
+    try:
+        mongo.db.ledger_entries.insert_one(entry)
+    except DuplicateKeyError:
+        return False
+    _apply_to_rollup(entry)
+    return True
+
+
+# ──────────────────────────────────────────────────────────
+# READ HELPERS  — used by routes/financial_routes.py
+# ──────────────────────────────────────────────────────────
+def day_key(dt):
+    return dt.strftime(DAY_FORMAT)
+
+
+def revenue_by(field, first_day, last_day, match=None):
+    """[{"_id": <field value>, "revenue", "count"}] from ledger_daily."""
+    query = {"day": {"$gte": first_day, "$lte": last_day}}
+    query.update(match or {})
+    return list(mongo.db.ledger_daily.aggregate([
+        {"$match": query},
+        {"$group": {
+            "_id": f"${field}" if field else None,
+            "revenue": {"$sum": "$revenue"},
+            "count": {"$sum": "$count"}
+        }},
+        {"$sort": {"_id": 1}}
+    ]))
+
+
+def monthly_recurring_revenue(now=None):
+    """
+    MRR from subscriptions paid for and not yet expired. Annual payments are
+    spread over twelve months.
+    """
+    now = now or datetime.utcnow()
+    rows = mongo.db.ledger_entries.aggregate([
+        {"$match": {"type": "subscription", "period_end": {"$gt": now}}},
+        {"$group": {
+            "_id": None,
+            "mrr": {"$sum": {"$cond": [
+                {"$eq": ["$billing_cycle", "annual"]},
+                {"$divide": ["$amount", 12]},
+                "$amount"
+            ]}}
+        }}
+    ])
+    rows = list(rows)
+    return rows[0]["mrr"] if rows else 0
+
+
+def top_landlords(start, end, limit=10):
+    """Highest-paying landlords in [start, end] with their denormalized email."""
+    return list(mongo.db.ledger_entries.aggregate([
+        {"$match": {"completed_at": {"$gte": start, "$lte": end}}},
+        {"$group": {
+            "_id": "$landlord_id",
+            "email": {"$first": "$landlord_email"},
+            "total_paid": {"$sum": "$amount"},
+            "transaction_count": {"$sum": 1}
+        }},
+        {"$sort": {"total_paid": -1}},
+        {"$limit": limit}
+    ]))
+
+
+# ──────────────────────────────────────────────────────────
+# BACKFILL / RECONCILIATION
+# ──────────────────────────────────────────────────────────
+def backfill_ledger():
+    """Record ledger entries for completed payments that have none."""
+    recorded = 0
+    for payment in mongo.db.payments.find({"status": "completed"}).sort("_id", 1):
+        if mongo.db.ledger_entries.count_documents({"payment_id": str(payment["_id"])}, limit=1):
+            continue
+        completed_at = payment.get("completed_at") or payment.get("created_at") or datetime.utcnow()
+        entry = build_entry(payment, completed_at, "backfill",
+                            _landlord_email(payment.get("landlord_id")))
+        try:
+            mongo.db.ledger_entries.insert_one(entry)
+            recorded += 1
+        except DuplicateKeyError:
+            pass
+    return recorded
+
+
+def rebuild_ledger_daily():
+    """Recompute ledger_daily from ledger_entries; returns the rollup row count."""
+    rows = list(mongo.db.ledger_entries.aggregate([
+        {"$group": {
+            "_id": {"day": "$day", "type": "$type", "tier": "$tier"},
+            "month": {"$first": "$month"},
+            "revenue": {"$sum": "$amount"},
+            "count": {"$sum": 1}
+        }}
+    ], allowDiskUse=True))
+    mongo.db.ledger_daily.delete_many({})
+    if rows:
+        mongo.db.ledger_daily.insert_many([{
+            "_id": f"{r['_id']['day']}|{r['_id']['type']}|{r['_id']['tier']}",
+            "day": r["_id"]["day"],
+            "month": r["month"],
+            "type": r["_id"]["type"],
+            "tier": r["_id"]["tier"],
+            "revenue": r["revenue"],
+            "count": r["count"]
+        } for r in rows])
+    return len(rows)
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    with create_app().app_context():
+        print(f"Recorded {backfill_ledger()} ledger entries")
+        print(f"Rebuilt {rebuild_ledger_daily()} ledger_daily rows")
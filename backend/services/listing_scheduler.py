@@ -18,9 +18,13 @@ Depends on:
   - extensions.mongo  (your existing Flask-PyMongo wrapper)
 """
 
+import logging
 from datetime import datetime, timedelta
 from bson import ObjectId
 from extensions import mongo   # re-use your existing mongo instance
+from models.notification import default_expires_at
+
+logger = logging.getLogger(__name__)
 
 
 # ──────────────────────────────────────────────────────────
@@ -52,6 +56,7 @@ def _create_notification(user_id: str, title: str, message: str,
         "link":               link,
         "is_read":            False,
         "created_at":         datetime.utcnow(),
+        "expires_at":         default_expires_at(),
         "sent_by":            "system"          # distinguishes automated msgs
     })
 
@@ -79,7 +84,7 @@ def run_listing_confirmation_check():
     Safe to call repeatedly — each threshold fires at most once thanks to
     the `confirmation_reminders_sent` set stored on the property doc.
     """
-    print("[ListingScheduler] Starting confirmation check …")
+    logger.info("Starting confirmation check …")
 
     now = datetime.utcnow()
 
@@ -200,9 +205,9 @@ def run_listing_confirmation_check():
                         "Early (25-day) confirmation reminder sent")
             reminders_sent += 1
 
-    print(
-        f"[ListingScheduler] Done — reminders: {reminders_sent}, "
-        f"warnings: {warnings_sent}, deactivations: {deactivations}"
+    logger.info(
+        "Done — reminders: %s, warnings: %s, deactivations: %s",
+        reminders_sent, warnings_sent, deactivations,
     )
 
 
@@ -0,0 +1,187 @@
+"""
+services/mpesa_inbox.py
+───────────────────────
+Fast-ack, idempotent processing of M-Pesa STK callbacks.
+
+POST /mpesa/callback only stores the raw payload in `mpesa_callback_inbox`
+and acknowledges Safaricom:
+
+    {"checkout_request_id": "ws_CO_…", "payload": {...}, "status": "received",
+     "attempts": 0, "received_at": dt, "next_attempt_at": dt}
+
+The unique index on checkout_request_id turns a retried callback into a
+duplicate-key error, which is acknowledged and otherwise ignored.
+
+Applying the payload (payment transition, ledger entry, subscription) happens
+off the request thread: the route hands the new inbox id to a small thread
+pool, and run_callback_inbox() — registered with APScheduler in app.py —
+sweeps anything that pool missed (process restart, errors). Items are claimed
+with find_one_and_update, and the payment transitions in payment_service are
+conditional on the payment still being open, so applying the same callback
+twice is a no-op. A success callback for a payment the reconciler already
+expired or failed is settled late (payment_service.settle_late_payment).
+
+A callback can beat the STK push response that stores its CheckoutRequestID
+on the payment; such "orphans" are retried until MAX_APPLY_ATTEMPTS.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from extensions import mongo
+from utils.mpesa import handle_mpesa_callback
+from services import payment_service
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────
+# CONFIGURATION
+# ──────────────────────────────────────────────────────────
+INBOX_BATCH_SIZE     = 100    # items applied per sweep
+MAX_APPLY_ATTEMPTS   = 5      # then the item is parked as "failed"
+RETRY_DELAY_SECONDS  = 30     # wait before retrying an orphan / error
+CLAIM_LEASE_MINUTES  = 5      # stale "applying" claims are re-claimable
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mpesa-inbox")
+
+
+def shutdown():
+    """Let callbacks already handed to the pool finish (worker shutdown)"""
+    _executor.shutdown(wait=True)
+
+
+def checkout_request_id(payload):
+    """Body.stkCallback.CheckoutRequestID, or None when the payload is not an STK callback"""
+    body = payload.get("Body") if isinstance(payload, dict) else None
+    callback = body.get("stkCallback") if isinstance(body, dict) else None
+    request_id = callback.get("CheckoutRequestID") if isinstance(callback, dict) else None
+    return request_id if isinstance(request_id, str) and request_id else None
+
+
+def store_callback(payload):
+    """
+    Persist a raw callback. Returns the inbox _id, or None when this
+    CheckoutRequestID was already received (a retried callback).
+    """
+    now = datetime.utcnow()
+    try:
+        result = mongo.db.mpesa_callback_inbox.insert_one({
+            "checkout_request_id": checkout_request_id(payload),
+            "payload": payload,
+            "status": "received",
+            "attempts": 0,
+            "received_at": now,
+            "next_attempt_at": now
+        })
+    except DuplicateKeyError:
+        return None
+    return result.inserted_id
+
+
+def schedule_apply(inbox_id):
+    """Apply a stored callback on the background pool."""
+    app = current_app._get_current_object()
+    _executor.submit(_apply_in_context, app, inbox_id)
+
+
+def _apply_in_context(app, inbox_id):
+    with app.app_context():
+        item = _claim({"_id": inbox_id})
+        if item:
+            apply_callback(item)
+
+
+def _claim(extra=None, now=None):
+    now = now or datetime.utcnow()
+    query = {"$or": [
+        {"status": "received", "next_attempt_at": {"$lte": now}},
+        {"status": "applying", "claimed_at": {"$lt": now - timedelta(minutes=CLAIM_LEASE_MINUTES)}}
+    ]}
+    query.update(extra or {})
+    return mongo.db.mpesa_callback_inbox.find_one_and_update(
+        query,
+        {"$set": {"status": "applying", "claimed_at": now}, "$inc": {"attempts": 1}},
+        sort=[("received_at", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _finish(item, status, **fields):
+    mongo.db.mpesa_callback_inbox.update_one(
+        {"_id": item["_id"]},
+        {"$set": {"status": status, "processed_at": datetime.utcnow(), **fields}}
+    )
+
+
+def _retry_later(item, error):
+    give_up = item.get("attempts", 1) >= MAX_APPLY_ATTEMPTS
+    mongo.db.mpesa_callback_inbox.update_one(
+        {"_id": item["_id"]},
+        {"$set": {
+            "status": "failed" if give_up else "received",
+            "last_error": error,
+            "next_attempt_at": datetime.utcnow() + timedelta(seconds=RETRY_DELAY_SECONDS)
+        }}
+    )
+
+
+def apply_callback(item):
+    """Apply one claimed inbox item to its payment."""
+    try:
+        payload = item["payload"]
+        parsed = handle_mpesa_callback(payload)
+
+        payment = mongo.db.payments.find_one({
+            "mpesa_checkout_request_id": parsed["checkout_request_id"]
+        })
+        if not payment:
+            _retry_later(item, "Payment not found")
+            return "orphan"
+
+        if parsed["success"]:
+            fields = {
+                "mpesa_receipt_number": parsed["mpesa_receipt"],
+                "mpesa_transaction_date": parsed["transaction_date"],
+                "mpesa_phone_number": parsed["phone_number"],
+                "mpesa_callback_data": payload
+            }
+            changed = payment_service.complete_payment(payment, "mpesa_callback", fields)
+            if not changed and parsed["mpesa_receipt"]:
+                # Expired / failed by the reconciler before Safaricom called back
+                changed = payment_service.settle_late_payment(payment, "mpesa_callback", fields)
+        elif parsed["result_code"] == 1032:
+            changed = payment_service.cancel_payment(payment, {"mpesa_callback_data": payload})
+        else:
+            changed = payment_service.fail_payment(payment, parsed["result_desc"], {
+                "mpesa_callback_data": payload
+            })
+            logger.warning("Payment failed: %s - %s", payment['_id'], parsed['result_desc'])
+
+        # changed=False: the payment was already settled (e.g. by the reconciler)
+        _finish(item, "applied", payment_id=str(payment["_id"]), changed_payment=changed)
+        return "applied"
+
+    except Exception as e:
+        logger.exception("Error applying M-Pesa callback %s", item.get('checkout_request_id'))
+        _retry_later(item, str(e))
+        return "error"
+
+
+# ──────────────────────────────────────────────────────────
+# MAIN JOB  — called by APScheduler on a short interval
+# ──────────────────────────────────────────────────────────
+def run_callback_inbox():
+    applied = 0
+    for _ in range(INBOX_BATCH_SIZE):
+        item = _claim()
+        if not item:
+            break
+        if apply_callback(item) == "applied":
+            applied += 1
+    if applied:
+        logger.info("Applied %s callback(s)", applied)
+    return applied
@@ -0,0 +1,123 @@
+"""
+services/notification_archiver.py
+─────────────────────────────────
+Keeps the hot `notifications` collection (and its indexes) small.
+
+Two mechanisms:
+  1. Expiry — every notification carries `expires_at` and a TTL index on that
+     field lets mongod delete it automatically; no application job involved.
+  2. Cold archive — read notifications older than ARCHIVE_AFTER_DAYS are moved
+     in batches to `notifications_archive`, stored in a compact shape. The
+     archive has its own TTL on `archived_at`.
+
+Each batch is insert-then-delete keyed by the original _id, so an interrupted
+run can simply be repeated: already-archived ids are skipped on insert and
+deleted on the next pass.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from extensions import mongo
+from models.notification import default_expires_at
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────
+# CONFIGURATION
+# ──────────────────────────────────────────────────────────
+ARCHIVE_AFTER_DAYS        = 30     # read notifications older than this move out
+ARCHIVE_RETENTION_DAYS    = 365    # TTL on notifications_archive.archived_at
+ARCHIVE_BATCH_SIZE        = 1000   # documents moved per round trip
+MAX_BATCHES_PER_RUN       = 500    # caps one run at 500k documents
+
+# Fields kept in the archive; everything else (is_read, expires_at, sent_by…)
+# is dropped
+_ARCHIVE_FIELDS = {
+    "user_id": 1, "notification_type": 1, "title": 1, "message": 1,
+    "link": 1, "data": 1, "created_at": 1, "read_at": 1
+}
+
+
+def _archive_batch(docs, archived_at):
+    """Copy one batch into the archive, then remove it from the hot collection."""
+    for doc in docs:
+        doc["archived_at"] = archived_at
+    try:
+        mongo.db.notifications_archive.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        # Duplicate keys mean an earlier run already archived these ids
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    mongo.db.notifications.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+
+
+def archive_read_notifications(days=ARCHIVE_AFTER_DAYS):
+    """
+    Move read notifications read more than *days* ago to the archive.
+
+    Uses the partial (read_at) index on read notifications; returns the number
+    of documents moved.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    archived_at = datetime.utcnow()
+    moved = 0
+
+    for _ in range(MAX_BATCHES_PER_RUN):
+        docs = list(mongo.db.notifications.find(
+            {"is_read": True, "read_at": {"$lt": cutoff}},
+            _ARCHIVE_FIELDS
+        ).sort("read_at", 1).limit(ARCHIVE_BATCH_SIZE))
+        if not docs:
+            break
+        _archive_batch(docs, archived_at)
+        moved += len(docs)
+
+    return moved
+
+
+def backfill_notification_expiry():
+    """
+    Give notifications created before `expires_at` was enforced an expiry so
+    the TTL index can reach them. Walks the collection in _id order so each
+    batch is an index range scan. Returns the number of documents updated.
+    """
+    updated = 0
+    last_id = None
+    while True:
+        query = {"expires_at": None}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = list(mongo.db.notifications.find(
+            query, {"_id": 1, "created_at": 1}
+        ).sort("_id", 1).limit(ARCHIVE_BATCH_SIZE))
+        if not docs:
+            break
+        mongo.db.notifications.bulk_write([
+            UpdateOne({"_id": doc["_id"]},
+                      {"$set": {"expires_at": default_expires_at(doc.get("created_at"))}})
+            for doc in docs
+        ], ordered=False)
+        updated += len(docs)
+        last_id = docs[-1]["_id"]
+    return updated
+
+
+# ──────────────────────────────────────────────────────────
+# MAIN JOB  — called by APScheduler (see app.py)
+# ──────────────────────────────────────────────────────────
+def run_notification_archive():
+    logger.info("Starting archive pass …")
+    moved = archive_read_notifications()
+    logger.info("Done — archived: %s", moved)
+    return moved
+
+
+if __name__ == "__main__":
+    # One-off migration: python -m services.notification_archiver
+    from app import create_app
+
+    with create_app().app_context():
+        print(f"Backfilled expiry on {backfill_notification_expiry()} notifications")
@@ -0,0 +1,210 @@
+"""
+services/notification_dispatcher.py
+───────────────────────────────────
+Delivers documents from `scheduled_notifications` once they fall due.
+
+POST /admin/notifications/schedule only stores a `pending` document; this job
+(registered with APScheduler in app.py) polls for due ones and delivers them.
+
+Claiming is atomic: each due schedule is moved `pending → dispatching` with a
+single find_one_and_update, so any number of workers/processes can run the
+job without double-sending. A claim that is never completed (worker crashed)
+becomes claimable again after CLAIM_LEASE_MINUTES, up to MAX_ATTEMPTS claims
+in all; after that the schedule is marked `failed`.
+
+Delivery:
+  - audience schedules ("all" / "landlords" / "tenants") become ONE broadcast
+    document, merged into inboxes at read time (see broadcast_service)
+  - schedules with explicit `user_ids` are written with chunked insert_many.
+    `delivered_offset` on the schedule records how many ids are done, so a
+    retry resumes after the last delivered chunk; the unique
+    (schedule_id, user_id) index drops the rest of a chunk that was written
+    just before a crash.
+
+Per-schedule metrics stored on the document when it is sent:
+  dispatched_at, dispatch_lag_seconds (dispatched_at - scheduled_for),
+  delivered_count, attempts
+"""
+
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from extensions import mongo
+from models.notification import default_expires_at
+from services import broadcast_service
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────
+# CONFIGURATION
+# ──────────────────────────────────────────────────────────
+DISPATCH_BATCH_SIZE   = 50     # schedules claimed per run
+DELIVERY_CHUNK_SIZE   = 1000   # notifications per insert_many
+CLAIM_LEASE_MINUTES   = 10     # stale claims are re-claimable after this
+MAX_ATTEMPTS          = 3      # failed deliveries are retried this many times
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ──────────────────────────────────────────────────────────
+# CLAIMING
+# ──────────────────────────────────────────────────────────
+def claim_due_schedule(now=None):
+    """
+    Atomically claim the oldest due schedule (or a stale claim).
+
+    Uses the (status, scheduled_for) index; returns the claimed document or
+    None when nothing is due.
+    """
+    now = now or datetime.utcnow()
+    stale_before = now - timedelta(minutes=CLAIM_LEASE_MINUTES)
+    return mongo.db.scheduled_notifications.find_one_and_update(
+        {"$or": [
+            {"status": "pending", "scheduled_for": {"$lte": now}},
+            {"status": "dispatching", "claimed_at": {"$lt": stale_before},
+             "attempts": {"$lt": MAX_ATTEMPTS}}
+        ]},
+        {"$set": {
+            "status": "dispatching",
+            "claimed_at": now,
+            "claimed_by": WORKER_ID
+        },
+         "$inc": {"attempts": 1}},
+        sort=[("scheduled_for", 1)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def fail_exhausted_claims(now=None):
+    """
+    Mark `failed` the stale claims that used up MAX_ATTEMPTS - deliveries
+    that kept killing their worker before it could record an error.
+    """
+    now = now or datetime.utcnow()
+    stale_before = now - timedelta(minutes=CLAIM_LEASE_MINUTES)
+    result = mongo.db.scheduled_notifications.update_many(
+        {"status": "dispatching", "claimed_at": {"$lt": stale_before},
+         "attempts": {"$gte": MAX_ATTEMPTS}},
+        {"$set": {
+            "status":     "failed",
+            "last_error": f"Delivery did not finish within {CLAIM_LEASE_MINUTES} minutes "
+                          f"in {MAX_ATTEMPTS} attempts"
+        }}
+    )
+    return result.modified_count
+
+
+# ──────────────────────────────────────────────────────────
+# DELIVERY
+# ──────────────────────────────────────────────────────────
+def _insert_chunk(chunk):
+    """insert_many that skips notifications this schedule already delivered"""
+    try:
+        mongo.db.notifications.insert_many(chunk, ordered=False)
+    except BulkWriteError as e:
+        # 11000: duplicate (schedule_id, user_id) from an interrupted attempt
+        if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+
+
+def _deliver_to_users(schedule, user_ids):
+    """
+    Write one notification per user id in chunks, starting after the ids a
+    previous attempt delivered; returns the count.
+    """
+    resume_from = schedule.get("delivered_offset", 0)
+    delivered = resume_from
+    for start in range(resume_from, len(user_ids), DELIVERY_CHUNK_SIZE):
+        now = datetime.utcnow()
+        chunk = [{
+            "user_id":            str(user_id),
+            "title":              schedule.get("title"),
+            "message":            schedule.get("message"),
+            "notification_type":  schedule.get("notification_type", "system_announcement"),
+            "link":               schedule.get("link"),
+            "is_read":            False,
+            "created_at":         now,
+            "expires_at":         default_expires_at(now),
+            "schedule_id":        str(schedule["_id"]),
+            "sent_by":            schedule.get("created_by")
+        } for user_id in user_ids[start:start + DELIVERY_CHUNK_SIZE]]
+        _insert_chunk(chunk)
+        delivered += len(chunk)
+        progress = mongo.db.scheduled_notifications.update_one(
+            {"_id": schedule["_id"], "claimed_by": WORKER_ID, "status": "dispatching"},
+            {"$set": {"delivered_offset": delivered}}
+        )
+        if not progress.matched_count:
+            raise RuntimeError("Claim lost to another worker during delivery")
+    return delivered
+
+
+def deliver_schedule(schedule):
+    """Deliver one claimed schedule; returns the number of recipients."""
+    if schedule.get("user_ids"):
+        return _deliver_to_users(schedule, schedule["user_ids"])
+
+    target_audience = schedule.get("target_audience", "all")
+    broadcast_service.create_broadcast(
+        title=schedule.get("title"),
+        message=schedule.get("message"),
+        target_audience=target_audience,
+        notification_type=schedule.get("notification_type", "system_announcement"),
+        link=schedule.get("link"),
+        sent_by=schedule.get("created_by"),
+        schedule_id=str(schedule["_id"])
+    )
+    return broadcast_service.count_audience(target_audience)
+
+
+# ──────────────────────────────────────────────────────────
+# MAIN JOB  — called by APScheduler on a short interval
+# ──────────────────────────────────────────────────────────
+def run_scheduled_notification_dispatch():
+    """Claim and deliver up to DISPATCH_BATCH_SIZE due schedules."""
+    dispatched = 0
+    failed = fail_exhausted_claims()
+
+    for _ in range(DISPATCH_BATCH_SIZE):
+        schedule = claim_due_schedule()
+        if not schedule:
+            break
+
+        try:
+            delivered = deliver_schedule(schedule)
+            dispatched_at = datetime.utcnow()
+            lag = (dispatched_at - schedule["scheduled_for"]).total_seconds()
+
+            # Only the worker holding the claim may mark it sent
+            mongo.db.scheduled_notifications.update_one(
+                {"_id": schedule["_id"], "claimed_by": WORKER_ID, "status": "dispatching"},
+                {"$set": {
+                    "status":                "sent",
+                    "dispatched_at":         dispatched_at,
+                    "dispatch_lag_seconds":  lag,
+                    "delivered_count":       delivered
+                }}
+            )
+            dispatched += 1
+            logger.info("Sent %s to %s recipients (lag %.1fs)", schedule["_id"], delivered, lag)
+
+        except Exception as e:
+            # Retry on a later run until MAX_ATTEMPTS, then give up
+            retry = schedule.get("attempts", 1) < MAX_ATTEMPTS
+            mongo.db.scheduled_notifications.update_one(
+                {"_id": schedule["_id"], "claimed_by": WORKER_ID},
+                {"$set": {
+                    "status":      "pending" if retry else "failed",
+                    "last_error":  str(e)
+                }}
+            )
+            failed += 1
+            logger.exception("Failed %s", schedule["_id"])
+
+    if dispatched or failed:
+        logger.info("Done — sent: %s, failed: %s", dispatched, failed)
+    return dispatched
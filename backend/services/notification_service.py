@@ -1,8 +1,13 @@
+import logging
 from models.notification import Notification
 from services.email_service import EmailService
+from services.notification_archiver import archive_read_notifications
 from extensions import mongo
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
+
 class NotificationService:
     """
     Centralized Notification Service
@@ -27,11 +32,11 @@ class NotificationService:
             )
             
             result = mongo.db.notifications.insert_one(notification.to_dict())
-            print(f"✅ In-app notification created for user {user_id}: {title}")
+            logger.debug("In-app notification created for user %s: %s", user_id, title)
             return str(result.inserted_id)
             
-        except Exception as e:
-            print(f"❌ Failed to create notification: {str(e)}")
+        except Exception:
+            logger.exception("Failed to create notification")
             return None
     
     # ==========================================
@@ -70,11 +75,11 @@ class NotificationService:
                 property_data=property_data
             )
             
-            print(f"✅ Booking confirmation notifications sent to {tenant_name}")
+            logger.info("Booking confirmation notifications sent to %s", tenant_name)
             return True
             
-        except Exception as e:
-            print(f"❌ Failed to send booking confirmation notifications: {str(e)}")
+        except Exception:
+            logger.exception("Failed to send booking confirmation notifications")
             return False
     
     def notify_booking_rejected(self, booking_data, property_data, tenant_data, rejection_reason):
@@ -110,11 +115,11 @@ class NotificationService:
                 rejection_reason=rejection_reason
             )
             
-            print(f"✅ Booking rejection notifications sent to {tenant_name}")
+            logger.info("Booking rejection notifications sent to %s", tenant_name)
             return True
             
-        except Exception as e:
-            print(f"❌ Failed to send booking rejection notifications: {str(e)}")
+        except Exception:
+            logger.exception("Failed to send booking rejection notifications")
             return False
     
     def notify_new_booking(self, booking_data, property_data, landlord_data):
@@ -150,11 +155,11 @@ class NotificationService:
                 property_data=property_data
             )
             
-            print(f"✅ New booking notifications sent to landlord")
+            logger.info("New booking notifications sent to landlord")
             return True
             
-        except Exception as e:
-            print(f"❌ Failed to send new booking notifications: {str(e)}")
+        except Exception:
+            logger.exception("Failed to send new booking notifications")
             return False
     
     def notify_booking_cancelled(self, booking_data, property_data, landlord_data, cancellation_reason):
@@ -178,11 +183,11 @@ class NotificationService:
                 }
             )
             
-            print(f"✅ Booking cancellation notification sent to landlord")
+            logger.info("Booking cancellation notification sent to landlord")
             return True
             
-        except Exception as e:
-            print(f"❌ Failed to send booking cancellation notification: {str(e)}")
+        except Exception:
+            logger.exception("Failed to send booking cancellation notification")
             return False
     
     def notify_booking_reminder(self, booking_data, property_data, user_data, user_role):
@@ -209,11 +214,11 @@ class NotificationService:
                 }
             )
             
-            print(f"✅ Booking reminder sent to {user_data.get('email')}")
+            logger.info("Booking reminder sent to %s", user_data.get('email'))
             return True
             
-        except Exception as e:
-            print(f"❌ Failed to send booking reminder: {str(e)}")
+        except Exception:
+            logger.exception("Failed to send booking reminder")
             return False
     
     # ==========================================
@@ -250,11 +255,11 @@ class NotificationService:
                 days_until_expiry=days_until_expiry
             )
             
-            print(f"✅ Property expiring notification sent to landlord")
+            logger.info("Property expiring notification sent to landlord")
             return True
             
-        except Exception as e:
-            print(f"❌ Failed to send property expiring notification: {str(e)}")
+        except Exception:
+            logger.exception("Failed to send property expiring notification")
             return False
     
     # ==========================================
@@ -296,11 +301,11 @@ class NotificationService:
                 user_role=user_role
             )
             
-            print(f"✅ Welcome notifications sent to {user_email}")
+            logger.info("Welcome notifications sent to %s", user_email)
             return True
             
-        except Exception as e:
-            print(f"❌ Failed to send welcome notifications: {str(e)}")
+        except Exception:
+            logger.exception("Failed to send welcome notifications")
             return False
     
     # ==========================================
@@ -317,8 +322,8 @@ class NotificationService:
                 "is_read": False
             })
             return count
-        except Exception as e:
-            print(f"❌ Failed to get unread count: {str(e)}")
+        except Exception:
+            logger.exception("Failed to get unread count")
             return 0
     
     def mark_as_read(self, notification_id, user_id):
@@ -334,8 +339,8 @@ class NotificationService:
                 }}
             )
             return True
-        except Exception as e:
-            print(f"❌ Failed to mark notification as read: {str(e)}")
+        except Exception:
+            logger.exception("Failed to mark notification as read")
             return False
     
     def mark_all_as_read(self, user_id):
@@ -351,8 +356,8 @@ class NotificationService:
                 }}
             )
             return True
-        except Exception as e:
-            print(f"❌ Failed to mark all as read: {str(e)}")
+        except Exception:
+            logger.exception("Failed to mark all as read")
             return False
     
     def delete_notification(self, notification_id, user_id):
@@ -365,21 +370,19 @@ class NotificationService:
                 "user_id": user_id
             })
             return result.deleted_count > 0
-        except Exception as e:
-            print(f"❌ Failed to delete notification: {str(e)}")
+        except Exception:
+            logger.exception("Failed to delete notification")
             return False
     
     def cleanup_old_notifications(self, days=30):
         """
-        Delete notifications older than specified days
+        Archive read notifications older than specified days.
+        Expiry itself is handled by the TTL index on expires_at.
         """
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
-            result = mongo.db.notifications.delete_many({
-                "created_at": {"$lt": cutoff_date}
-            })
-            print(f"✅ Deleted {result.deleted_count} old notifications")
-            return result.deleted_count
-        except Exception as e:
-            print(f"❌ Failed to cleanup old notifications: {str(e)}")
+            archived_count = archive_read_notifications(days)
+            logger.info("Archived %s old notifications", archived_count)
+            return archived_count
+        except Exception:
+            logger.exception("Failed to cleanup old notifications")
             return 0
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""
+services/payment_reconciler.py
+──────────────────────────────
+Background reconciliation of M-Pesa payments whose callback has not arrived.
+
+GET /mpesa/check-status only reads the stored payment; this job (registered
+with APScheduler in app.py) is the only place that asks Daraja about a
+payment, so frontend polling no longer turns into outbound calls.
+
+Each `processing` payment carries:
+  reconcile_attempts   Daraja queries made so far
+  next_reconcile_at    when it may be queried again
+
+Payments are claimed one at a time with find_one_and_update, which also
+pushes next_reconcile_at out along RECONCILE_BACKOFF_SECONDS, so several
+workers never query the same payment at once. After MAX_RECONCILE_QUERIES
+queries, or once older than PAYMENT_TIMEOUT_MINUTES, a payment is expired.
+Open payments that never got as far as an STK push are expired on the same
+timeout.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from flask import current_app
+from pymongo import ReturnDocument
+from extensions import mongo
+from utils.mpesa import get_mpesa_client
+from services import payment_service
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────
+# CONFIGURATION
+# ──────────────────────────────────────────────────────────
+RECONCILE_BATCH_SIZE      = 50                          # payments queried per run
+RECONCILE_BACKOFF_SECONDS = [30, 60, 120, 240, 480]     # wait before query n+1
+MAX_RECONCILE_QUERIES     = len(RECONCILE_BACKOFF_SECONDS) + 1
+
+
+def next_reconcile_at(attempts, now=None):
+    """When a payment that has been queried *attempts* times is next due."""
+    now = now or datetime.utcnow()
+    delay = RECONCILE_BACKOFF_SECONDS[min(attempts, len(RECONCILE_BACKOFF_SECONDS) - 1)]
+    return now + timedelta(seconds=delay)
+
+
+def _claim_due_payment(now):
+    payment = mongo.db.payments.find_one({
+        "status": "processing",
+        "next_reconcile_at": {"$lte": now}
+    }, {"reconcile_attempts": 1}, sort=[("next_reconcile_at", 1)])
+    if not payment:
+        return None
+    attempts = payment.get("reconcile_attempts", 0)
+    # Conditional on next_reconcile_at so only one worker wins the claim
+    return mongo.db.payments.find_one_and_update(
+        {"_id": payment["_id"], "status": "processing", "next_reconcile_at": {"$lte": now}},
+        {"$set": {
+            "next_reconcile_at": next_reconcile_at(attempts + 1, now),
+            "last_reconciled_at": now
+        },
+         "$inc": {"reconcile_attempts": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def apply_query_result(payment, result):
+    """Move a payment on according to a Daraja STK query result."""
+    result_code = str(result.get("ResultCode")) if result.get("ResultCode") is not None else None
+    if result_code == "0":
+        return payment_service.complete_payment(payment, "mpesa_query", {"mpesa_result": result})
+    if result_code == "1032":
+        return payment_service.cancel_payment(payment, {"mpesa_result": result})
+    if result_code is not None:
+        return payment_service.fail_payment(
+            payment, result.get("ResultDesc", "Payment failed"), {"mpesa_result": result}
+        )
+    return False  # still being processed by Safaricom
+
+
+def reconcile_payment(payment, timeout_cutoff):
+    """Query (or expire) one claimed payment; returns the outcome label."""
+    started = payment.get("stk_push_initiated_at") or payment.get("created_at")
+    if payment.get("reconcile_attempts", 0) > MAX_RECONCILE_QUERIES or \
+            (started and started < timeout_cutoff):
+        payment_service.expire_payment(payment)
+        return "expired"
+
+    try:
+        result = get_mpesa_client().query_transaction(payment["mpesa_checkout_request_id"])
+    except Exception:
+        # Daraja answers "transaction is being processed" with an HTTP error;
+        # either way try again on the next backoff step
+        return "pending"
+
+    return "resolved" if apply_query_result(payment, result) else "pending"
+
+
+def expire_abandoned_payments(timeout_cutoff):
+    """Expire open payments that never reached an STK push."""
+    result = mongo.db.payments.update_many(
+        {"status": "pending", "created_at": {"$lt": timeout_cutoff}},
+        {"$set": {
+            "status": "expired",
+            "expired_at": datetime.utcnow(),
+            "failure_reason": "Payment was never completed"
+        }}
+    )
+    return result.modified_count
+
+
+# ──────────────────────────────────────────────────────────
+# MAIN JOB  — called by APScheduler on a short interval
+# ──────────────────────────────────────────────────────────
+def run_payment_reconciliation():
+    now = datetime.utcnow()
+    timeout = current_app.config.get("PAYMENT_TIMEOUT_MINUTES", 30)
+    timeout_cutoff = now - timedelta(minutes=timeout)
+
+    counts = {"resolved": 0, "pending": 0, "expired": 0}
+    for _ in range(RECONCILE_BATCH_SIZE):
+        payment = _claim_due_payment(now)
+        if not payment:
+            break
+        counts[reconcile_payment(payment, timeout_cutoff)] += 1
+
+    counts["expired"] += expire_abandoned_payments(timeout_cutoff)
+
+    if any(counts.values()):
+        logger.info("Done — resolved: %s, still pending: %s, expired: %s",
+                    counts["resolved"], counts["pending"], counts["expired"])
+    return counts
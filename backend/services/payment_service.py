@@ -0,0 +1,152 @@
+# services/payment_service.py
+"""
+Payment state transitions shared by the M-Pesa callback, the reconciliation
+worker and the routes.
+
+Every transition is a conditional update that only matches a payment that is
+still open (pending / processing), so when the callback and the reconciler
+race for the same payment exactly one of them wins, and only the winner
+records the ledger entry and activates the subscription.
+
+The reconciler can give up on a payment (expired / failed) that M-Pesa then
+confirms with a receipt - the customer paid. settle_late_payment() completes
+it anyway; when the landlord has paid for a subscription again in the
+meantime, or the payment was cancelled, it is flagged with
+`needs_reconciliation` for an admin instead (financial /transactions
+?needs_reconciliation=true).
+"""
+
+import logging
+from datetime import datetime
+from bson import ObjectId
+from extensions import mongo
+from services.ledger_service import record_payment
+
+logger = logging.getLogger(__name__)
+
+
+OPEN_STATUSES = ["pending", "processing"]
+# Closed by the reconciler, but a late M-Pesa receipt still completes them
+LATE_SETTLEMENT_STATUSES = ["expired", "failed"]
+
+
+def _transition(payment_id, status, fields, from_statuses=OPEN_STATUSES):
+    result = mongo.db.payments.update_one(
+        {"_id": ObjectId(str(payment_id)), "status": {"$in": from_statuses}},
+        {"$set": {"status": status, **fields}}
+    )
+    return result.modified_count == 1
+
+
+def complete_payment(payment, source, fields=None):
+    """
+    Mark *payment* completed, append it to the ledger and activate the
+    subscription. Returns False (and does nothing) if it was no longer open.
+    """
+    completed_at = datetime.utcnow()
+    if not _transition(payment["_id"], "completed", {"completed_at": completed_at, **(fields or {})}):
+        return False
+
+    record_payment(payment, completed_at, source=source)
+    if payment.get("type") == "subscription":
+        activate_subscription(payment["landlord_id"], payment)
+    logger.info("Payment completed (%s): %s", source, payment['_id'])
+    return True
+
+
+def settle_late_payment(payment, source, fields=None):
+    """
+    Complete *payment* after it was expired or failed, on a success callback
+    that carries an MpesaReceiptNumber. The money was taken, so it always goes
+    to the ledger; the subscription is only activated if the landlord has not
+    paid for one since. Anything else is flagged needs_reconciliation.
+    Returns True when the payment was completed.
+    """
+    fields = fields or {}
+    paid_again = None
+    if payment.get("type") == "subscription":
+        paid_again = mongo.db.payments.find_one({
+            "_id": {"$ne": payment["_id"]},
+            "landlord_id": payment["landlord_id"],
+            "type": "subscription",
+            "status": "completed",
+            "created_at": {"$gt": payment["created_at"]}
+        }, {"_id": 1})
+
+    completed_at = datetime.utcnow()
+    late_fields = {"completed_at": completed_at, "settled_late": True, **fields}
+    if paid_again:
+        late_fields.update({
+            "needs_reconciliation": True,
+            "reconciliation_reason": f"Paid again ({paid_again['_id']}) after this payment was closed"
+        })
+    if _transition(payment["_id"], "completed", late_fields, LATE_SETTLEMENT_STATUSES):
+        record_payment(payment, completed_at, source=source)
+        if payment.get("type") == "subscription" and not paid_again:
+            activate_subscription(payment["landlord_id"], payment)
+        logger.warning("Late payment completed (%s): %s", source, payment["_id"])
+        return True
+
+    # Cancelled, or gone: keep the receipt for an admin. Already completed
+    # means this confirmation was a duplicate.
+    flagged = mongo.db.payments.update_one(
+        {"_id": payment["_id"], "status": {"$ne": "completed"}},
+        {"$set": {
+            "needs_reconciliation": True,
+            "reconciliation_reason": "M-Pesa confirmed a payment that was already closed",
+            **fields
+        }}
+    )
+    if flagged.modified_count:
+        logger.warning("Payment needs reconciliation (%s): %s", source, payment["_id"])
+    return False
+
+
+def fail_payment(payment, reason, fields=None):
+    return _transition(payment["_id"], "failed", {
+        "failed_at": datetime.utcnow(),
+        "failure_reason": reason,
+        **(fields or {})
+    })
+
+
+def cancel_payment(payment, fields=None):
+    return _transition(payment["_id"], "cancelled", {
+        "cancelled_at": datetime.utcnow(),
+        **(fields or {})
+    })
+
+
+def expire_payment(payment, reason="Payment timed out"):
+    return _transition(payment["_id"], "expired", {
+        "expired_at": datetime.utcnow(),
+        "failure_reason": reason
+    })
+
+
+def activate_subscription(landlord_id, payment):
+    """Activate subscription after successful payment"""
+    try:
+        subscription = {
+            "tier": payment["tier"],
+            "status": "active",
+            "billing_cycle": payment["billing_cycle"],
+            "started_at": payment["subscription_period"]["start"],
+            "expires_at": payment["subscription_period"]["end"],
+            "auto_renew": True,
+            "last_payment_id": str(payment["_id"]),
+            "last_payment_date": datetime.utcnow()
+        }
+
+        mongo.db.users.update_one(
+            {"_id": ObjectId(landlord_id)},
+            {"$set": {"subscription": subscription}}
+        )
+
+        logger.info("Subscription activated for landlord: %s", landlord_id)
+
+        # TODO: Send confirmation email/notification
+
+    except Exception:
+        logger.exception("Error activating subscription")
+        raise
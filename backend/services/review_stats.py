@@ -0,0 +1,157 @@
+# services/review_stats.py
+"""
+Running review aggregates stored on the landlord's user document.
+
+Instead of re-aggregating every active review on each change, each review
+state change applies a signed delta with a single atomic $inc:
+
+    review_stats: {
+        "count":         <number of active reviews>,
+        "rating_sum":    <sum of overall ratings>,
+        "category_sums": {"communication": .., "responsiveness": .., ...},
+        "histogram":     {"1": n, "2": n, "3": n, "4": n, "5": n}
+    }
+
+Averages are derived when the stats are read, so a public stats read is one
+projected find_one. rebuild_review_stats() recomputes everything from the
+reviews collection and is the reconciliation path:
+
+    python -m services.review_stats [<landlord_id>]
+"""
+
+from bson import ObjectId
+from extensions import mongo
+
+
+CATEGORIES = [
+    "communication",
+    "responsiveness",
+    "property_accuracy",
+    "cleanliness",
+    "value_for_money"
+]
+
+
+def _bucket(rating):
+    """Histogram bucket (1-5) for an overall rating such as 4.5 -> "4"."""
+    return str(min(5, max(1, int(rating or 0))))
+
+
+def review_delta(review, sign=1):
+    """$inc document adding (sign=1) or removing (sign=-1) one review."""
+    categories = review.get("categories") or {}
+    delta = {
+        "review_stats.count": sign,
+        "review_stats.rating_sum": sign * float(review.get("rating") or 0),
+        f"review_stats.histogram.{_bucket(review.get('rating'))}": sign
+    }
+    for category in CATEGORIES:
+        delta[f"review_stats.category_sums.{category}"] = sign * float(categories.get(category) or 0)
+    return delta
+
+
+def apply_review_change(landlord_id, before=None, after=None):
+    """
+    Move one review's contribution from *before* to *after* atomically.
+
+    Pass before=None for a newly active review, after=None for one that
+    stopped being active (deleted/hidden), or both for an edit.
+    """
+    inc = {}
+    for review, sign in ((before, -1), (after, 1)):
+        if review is None:
+            continue
+        for key, value in review_delta(review, sign).items():
+            inc[key] = inc.get(key, 0) + value
+
+    # Drop keys that cancel out (e.g. an edit that keeps the histogram bucket)
+    inc = {k: v for k, v in inc.items() if v != 0}
+    if inc:
+        mongo.db.users.update_one({"_id": ObjectId(landlord_id)}, {"$inc": inc})
+
+
+def empty_stats():
+    return {
+        "average_rating": 0,
+        "total_reviews": 0,
+        "rating_distribution": {1: 0, 2: 0, 3: 0, 4: 0, 5: 0},
+        "category_ratings": {category: 0 for category in CATEGORIES}
+    }
+
+
+def get_review_stats(landlord_id):
+    """Public statistics for a landlord from one projected document read."""
+    user = mongo.db.users.find_one({"_id": ObjectId(landlord_id)}, {"review_stats": 1})
+    stats = (user or {}).get("review_stats") or {}
+    count = stats.get("count", 0)
+    if count <= 0:
+        return empty_stats()
+
+    histogram = stats.get("histogram", {})
+    category_sums = stats.get("category_sums", {})
+    return {
+        "average_rating": round(stats.get("rating_sum", 0) / count, 2),
+        "total_reviews": count,
+        "rating_distribution": {star: histogram.get(str(star), 0) for star in range(1, 6)},
+        "category_ratings": {
+            category: round(category_sums.get(category, 0) / count, 2)
+            for category in CATEGORIES
+        }
+    }
+
+
+def rebuild_review_stats(landlord_id=None):
+    """
+    Recompute review_stats from scratch for one landlord, or for every landlord
+    when landlord_id is None. Returns the number of landlords updated.
+    """
+    match = {"status": "active"}
+    if landlord_id:
+        match["landlord_id"] = landlord_id
+
+    group = {
+        "_id": "$landlord_id",
+        "count": {"$sum": 1},
+        "rating_sum": {"$sum": "$rating"}
+    }
+    for category in CATEGORIES:
+        group[category] = {"$sum": {"$ifNull": [f"$categories.{category}", 0]}}
+    for star in range(1, 6):
+        # Same bucketing as _bucket(): floor, clamped to 1..5
+        bucket = {"$min": [5, {"$max": [1, {"$floor": "$rating"}]}]}
+        group[f"h{star}"] = {"$sum": {"$cond": [{"$eq": [bucket, star]}, 1, 0]}}
+
+    rebuilt = set()
+    for row in mongo.db.reviews.aggregate([{"$match": match}, {"$group": group}]):
+        if not row["_id"] or not ObjectId.is_valid(row["_id"]):
+            continue
+        mongo.db.users.update_one(
+            {"_id": ObjectId(row["_id"])},
+            {"$set": {"review_stats": {
+                "count": row["count"],
+                "rating_sum": row["rating_sum"],
+                "category_sums": {category: row[category] for category in CATEGORIES},
+                "histogram": {str(star): row[f"h{star}"] for star in range(1, 6)}
+            }}}
+        )
+        rebuilt.add(row["_id"])
+
+    # Landlords whose last active review disappeared get zeroed stats
+    stale_query = {"review_stats.count": {"$gt": 0}}
+    if landlord_id:
+        stale_query["_id"] = ObjectId(landlord_id)
+    for user in mongo.db.users.find(stale_query, {"_id": 1}):
+        if str(user["_id"]) not in rebuilt:
+            mongo.db.users.update_one({"_id": user["_id"]}, {"$unset": {"review_stats": ""}})
+            rebuilt.add(str(user["_id"]))
+
+    return len(rebuilt)
+
+
+if __name__ == "__main__":
+    import sys
+    from app import create_app
+
+    with create_app().app_context():
+        target = sys.argv[1] if len(sys.argv) > 1 else None
+        print(f"Rebuilt review stats for {rebuild_review_stats(target)} landlords")
@@ -0,0 +1,389 @@
+# services/slow_query_log.py
+"""
+Slow MongoDB command log with sampled explain plans.
+
+SlowQueryListener is registered on the app's MongoClient (see create_app).
+Every command that takes at least SLOW_QUERY_THRESHOLD_MS is recorded in the
+`slow_queries` collection:
+
+    {"shape_hash": "9f3c...", "command": "find", "collection": "properties",
+     "shape": '{"filter": {"city": "?", "price": {"$gte": "?"}}, ...}',
+     "duration_ms": 412.7, "failed": false,
+     "route": "POST /properties/search", "server": "db1:27017", "created_at": dt,
+     "plan": {"stages": ["FETCH", "IXSCAN"], "indexes": ["city_1"],
+              "collscan": false, "in_memory_sort": false}}
+
+The shape is the command with every literal replaced by "?", so the same
+query with different values groups under one shape_hash and no user data
+is stored. `plan` comes from explain("queryPlanner") and is only present
+on sampled records: the first time this process sees a shape, then for
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE of the rest. Plans with a COLLSCAN stage are
+flagged with collscan=true.
+
+The listener itself only queues the record; a background thread writes it
+and runs the explain, so a slow query is not made slower by being logged.
+Records are dropped (and counted) if the queue is full.
+
+GET /admin/slow-queries aggregates the log by shape.
+"""
+
+import logging
+import hashlib
+import json
+import queue
+import random
+import threading
+from datetime import datetime
+from flask import has_request_context, request
+from pymongo import monitoring
+from extensions import mongo
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────
+# CONFIGURATION
+# ──────────────────────────────────────────────────────────
+SLOW_QUERY_COLLECTION = "slow_queries"
+QUEUE_SIZE            = 1000
+
+# Never recorded: handshake / auth payloads and housekeeping
+IGNORED_COMMANDS = {
+    "hello", "ismaster", "isMaster", "ping", "buildInfo", "saslStart",
+    "saslContinue", "authenticate", "getnonce", "endSessions", "killCursors",
+    "explain",
+}
+
+# Commands explain() accepts
+EXPLAINABLE_COMMANDS = {
+    "find", "aggregate", "count", "distinct", "findAndModify", "update", "delete",
+}
+
+# Driver / session fields that are not part of the query
+SESSION_FIELDS = {
+    "lsid", "$clusterTime", "$db", "txnNumber", "autocommit", "startTransaction",
+    "$readPreference", "readConcern", "writeConcern", "apiVersion", "apiStrict",
+    "apiDeprecationErrors", "signature",
+}
+
+# Keys whose numeric values are directions, not data (kept in the shape)
+DIRECTION_KEYS = {"sort", "$sort", "projection", "$project", "hint", "key"}
+
+
+# ──────────────────────────────────────────────────────────
+# SHAPES AND PLANS
+# ──────────────────────────────────────────────────────────
+def _strip_literals(value, keep_numbers=False):
+    if isinstance(value, dict):
+        return {
+            key: _strip_literals(item, keep_numbers or key in DIRECTION_KEYS)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        items = []
+        for item in value:
+            shaped = _strip_literals(item, keep_numbers)
+            if shaped not in items:      # $in lists, bulk updates of one shape
+                items.append(shaped)
+        return "?" if all(item == "?" for item in items) else items
+    if isinstance(value, str) and value.startswith("$"):
+        return value                     # field path, e.g. "$landlord_id"
+    if keep_numbers and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return "?"
+
+
+def command_shape(command_name, command):
+    """(collection, shape dict, shape_hash) for a command document"""
+    collection = command.get(command_name)
+    if not isinstance(collection, str):
+        collection = None
+    body = {
+        key: value for key, value in command.items()
+        if key not in SESSION_FIELDS and key != command_name
+    }
+    if "documents" in body:              # inserts: shape of the write, not the data
+        body["documents"] = "?"
+    shape = _strip_literals(body)
+    encoded = json.dumps([command_name, collection, shape], sort_keys=True, default=str)
+    return collection, shape, hashlib.sha1(encoded.encode()).hexdigest()[:16]
+
+
+def _plan_stages(node, stages, indexes):
+    if isinstance(node, dict):
+        if "stage" in node:
+            stages.append(node["stage"])
+            if node.get("indexName"):
+                indexes.append(node["indexName"])
+        for value in node.values():
+            _plan_stages(value, stages, indexes)
+    elif isinstance(node, list):
+        for value in node:
+            _plan_stages(value, stages, indexes)
+
+
+def _winning_plans(node):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "winningPlan":
+                yield value
+            else:
+                yield from _winning_plans(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _winning_plans(value)
+
+
+def plan_summary(explain_output):
+    """Stages, index names and red flags of every winning plan in an explain result"""
+    stages, indexes = [], []
+    for plan in _winning_plans(explain_output):
+        _plan_stages(plan, stages, indexes)
+    return {
+        "stages": stages,
+        "indexes": sorted(set(indexes)),
+        "collscan": "COLLSCAN" in stages,
+        "in_memory_sort": "SORT" in stages,
+    }
+
+
+def explain_command(database, command_name, command, verbosity="queryPlanner"):
+    """Run explain for a captured command; returns the raw explain output"""
+    body = {key: value for key, value in command.items() if key not in SESSION_FIELDS}
+    # explain takes a single statement
+    if command_name == "update" and body.get("updates"):
+        body["updates"] = body["updates"][:1]
+    if command_name == "delete" and body.get("deletes"):
+        body["deletes"] = body["deletes"][:1]
+    return mongo.cx[database].command({"explain": body, "verbosity": verbosity})
+
+
+# ──────────────────────────────────────────────────────────
+# LISTENER AND WRITER
+# ──────────────────────────────────────────────────────────
+class SlowQueryLog:
+    def __init__(self):
+        self.enabled = False
+        self.threshold_ms = 100.0
+        self.explain_sample_rate = 0.1
+        self._lock = threading.Lock()
+        self._queue = None
+        self._writer = None
+        self._writer_ident = None
+        self._explained_shapes = set()
+        self.metrics = {"recorded": 0, "written": 0, "dropped": 0, "explained": 0, "explain_errors": 0}
+
+    def configure(self, config):
+        self.enabled = config.get("SLOW_QUERY_LOG_ENABLED", True)
+        self.threshold_ms = float(config.get("SLOW_QUERY_THRESHOLD_MS", 100))
+        self.explain_sample_rate = float(config.get("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 0.1))
+
+    def in_writer(self):
+        return threading.get_ident() == self._writer_ident
+
+    def _ensure_writer(self):
+        # Started on first use, i.e. in the worker process, never in a
+        # gunicorn master before fork
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+            self._writer = threading.Thread(target=self._run, name="slow-query-log", daemon=True)
+            self._writer.start()
+
+    def record(self, entry):
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry)
+            self.metrics["recorded"] += 1
+        except queue.Full:
+            self.metrics["dropped"] += 1
+
+    def _should_explain(self, entry):
+        if entry["command"] not in EXPLAINABLE_COMMANDS:
+            return False
+        if entry["shape_hash"] not in self._explained_shapes:
+            self._explained_shapes.add(entry["shape_hash"])
+            return True
+        return random.random() < self.explain_sample_rate
+
+    def _write(self, entry):
+        raw_command = entry.pop("raw_command")
+        database = entry.pop("database")
+        if self._should_explain(entry):
+            try:
+                entry["plan"] = plan_summary(
+                    explain_command(database, entry["command"], raw_command)
+                )
+                self.metrics["explained"] += 1
+            except Exception as e:
+                entry["plan_error"] = str(e)[:200]
+                self.metrics["explain_errors"] += 1
+        mongo.db[SLOW_QUERY_COLLECTION].insert_one(entry)
+        self.metrics["written"] += 1
+
+    def _run(self):
+        self._writer_ident = threading.get_ident()
+        while True:
+            entry = self._queue.get()
+            try:
+                if entry is None:
+                    return
+                self._write(entry)
+            except Exception:
+                logger.exception("Slow query log write failed")
+            finally:
+                self._queue.task_done()
+
+    def shutdown(self, timeout=5):
+        """Write what is queued and stop the writer thread"""
+        writer = self._writer
+        if writer is None or not writer.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        writer.join(timeout)
+
+    def metrics_snapshot(self):
+        return {
+            **self.metrics,
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold_ms,
+            "explain_sample_rate": self.explain_sample_rate,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _current_route():
+    if has_request_context():
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        return f"{request.method} {rule}"
+    return f"background:{threading.current_thread().name}"
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Captures commands over the threshold into the slow query log"""
+
+    def __init__(self):
+        self._started = {}               # (connection_id, request_id) -> (name, db, command)
+
+    def started(self, event):
+        if (not slow_query_log.enabled or event.command_name in IGNORED_COMMANDS
+                or slow_query_log.in_writer()):
+            return
+        self._started[(event.connection_id, event.request_id)] = (
+            event.command_name, event.database_name, event.command
+        )
+
+    def _finished(self, event, failed):
+        captured = self._started.pop((event.connection_id, event.request_id), None)
+        if captured is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < slow_query_log.threshold_ms:
+            return
+        command_name, database, command = captured
+        collection, shape, shape_hash = command_shape(command_name, command)
+        if collection == SLOW_QUERY_COLLECTION:
+            return
+        slow_query_log.record({
+            "shape_hash": shape_hash,
+            "command": command_name,
+            "collection": collection,
+            "shape": json.dumps(shape, sort_keys=True, default=str),
+            "duration_ms": round(duration_ms, 1),
+            "failed": failed,
+            "route": _current_route(),
+            # host:port that ran it - shows which reporting reads hit a secondary
+            "server": "%s:%s" % event.connection_id[:2],
+            "created_at": datetime.utcnow(),
+            "database": database,
+            "raw_command": command,
+        })
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+
+slow_query_listener = SlowQueryListener()
+
+
+def init_slow_query_log(app):
+    """Apply the app's SLOW_QUERY_* settings to the listener"""
+    slow_query_log.configure(app.config)
+
+
+def shutdown(timeout=5):
+    slow_query_log.shutdown(timeout)
+
+
+# ──────────────────────────────────────────────────────────
+# REPORTING
+# ──────────────────────────────────────────────────────────
+def slow_query_report(since, collscan_only=False, route=None, limit=50):
+    """Slow commands since *since*, grouped by shape, slowest total time first"""
+    match = {"created_at": {"$gte": since}}
+    if route:
+        match["route"] = route
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"created_at": -1}},
+        {"$group": {
+            "_id": "$shape_hash",
+            "command": {"$first": "$command"},
+            "collection": {"$first": "$collection"},
+            "shape": {"$first": "$shape"},
+            "count": {"$sum": 1},
+            "failed": {"$sum": {"$cond": ["$failed", 1, 0]}},
+            "total_ms": {"$sum": "$duration_ms"},
+            "avg_ms": {"$avg": "$duration_ms"},
+            "max_ms": {"$max": "$duration_ms"},
+            "routes": {"$addToSet": "$route"},
+            "last_seen": {"$first": "$created_at"},
+            "plans": {"$push": "$plan"},
+        }},
+        {"$addFields": {
+            "latest_plan": {"$first": "$plans"},
+            "collscan": {"$anyElementTrue": [{"$map": {
+                "input": "$plans", "as": "p", "in": {"$ifNull": ["$$p.collscan", False]}
+            }}]},
+        }},
+        {"$project": {"plans": 0}},
+    ]
+    if collscan_only:
+        pipeline.append({"$match": {"collscan": True}})
+    pipeline += [{"$sort": {"total_ms": -1}}, {"$limit": limit}]
+
+    shapes = []
+    for group in mongo.db[SLOW_QUERY_COLLECTION].aggregate(pipeline):
+        group["shape_hash"] = group.pop("_id")
+        group["avg_ms"] = round(group["avg_ms"], 1)
+        group["total_ms"] = round(group["total_ms"], 1)
+        group["last_seen"] = group["last_seen"].isoformat()
+        group["shape"] = json.loads(group["shape"])
+        shapes.append(group)
+    return shapes
+
+
+def slow_query_samples(shape_hash, limit=20):
+    """Most recent records of one shape"""
+    samples = []
+    cursor = (mongo.db[SLOW_QUERY_COLLECTION]
+              .find({"shape_hash": shape_hash}, {"_id": 0})
+              .sort("created_at", -1)
+              .limit(limit))
+    for doc in cursor:
+        doc["created_at"] = doc["created_at"].isoformat()
+        doc["shape"] = json.loads(doc["shape"])
+        samples.append(doc)
+    return samples
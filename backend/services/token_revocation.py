@@ -0,0 +1,189 @@
+# services/token_revocation.py
+"""
+Token revocation and suspension checks without a database read per request.
+
+Access tokens carry a `token_version` claim copied from the user document at
+login. Whenever a user's sessions must end (password change / reset, account
+deleted) their users.token_version is incremented, and any token with an
+older version is rejected. Suspension is enforced the same way, for tokens
+of every version.
+
+Only affected users are written to the small `token_revocations` collection:
+
+    {"_id": "<user_id>", "token_version": 3, "is_suspended": true,
+     "suspension_reason": "...", "deleted": false, "updated_at": dt}
+
+Each process keeps that collection in memory. The process that makes a
+change applies it to its own cache immediately; the others pick it up on
+their next refresh, which only fetches documents changed since the last
+one and happens at most every TOKEN_REVOCATION_REFRESH_SECONDS.
+
+register_token_checks() hooks the check into flask_jwt_extended's blocklist
+callback, so it runs for every @jwt_required() route — including everything
+behind admin_only / landlord_only / tenant_only.
+
+Users suspended before these checks existed have no `token_revocations`
+entry; run once on deploy to end their sessions and record the suspension:
+
+    python -m services.token_revocation
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import current_app, jsonify
+from pymongo import ReturnDocument
+from extensions import mongo
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────
+# CONFIGURATION
+# ──────────────────────────────────────────────────────────
+TOKEN_VERSION_CLAIM     = "token_version"
+REFRESH_OVERLAP_SECONDS = 5      # re-read a little before the high-water mark (clock skew)
+
+_cache = {}                      # user_id -> revocation document
+_cache_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+_state = {"loaded": False, "refreshed_at": 0.0, "high_water": None}
+
+
+def _apply(doc):
+    with _cache_lock:
+        _cache[doc["_id"]] = doc
+        if _state["high_water"] is None or doc["updated_at"] > _state["high_water"]:
+            _state["high_water"] = doc["updated_at"]
+
+
+def refresh(force=False):
+    """Pull revocation changes into this process's cache when the TTL has passed"""
+    ttl = current_app.config.get("TOKEN_REVOCATION_REFRESH_SECONDS", 5)
+    if not force and _state["loaded"] and time.monotonic() - _state["refreshed_at"] < ttl:
+        return
+
+    # One thread refreshes; once loaded, the others keep using the cache
+    if not _refresh_lock.acquire(blocking=not _state["loaded"]):
+        return
+    try:
+        if not force and _state["loaded"] and time.monotonic() - _state["refreshed_at"] < ttl:
+            return
+        query = {}
+        if _state["high_water"] is not None:
+            query = {"updated_at": {
+                "$gte": _state["high_water"] - timedelta(seconds=REFRESH_OVERLAP_SECONDS)
+            }}
+        for doc in mongo.db.token_revocations.find(query):
+            _apply(doc)
+        _state["loaded"] = True
+    except Exception as e:
+        # Keep serving the cache we have; try again after the next TTL
+        logger.warning("Refresh failed: %s", e)
+    finally:
+        _state["refreshed_at"] = time.monotonic()
+        _refresh_lock.release()
+
+
+def _publish(user_id, update):
+    update.setdefault("$set", {})["updated_at"] = datetime.utcnow()
+    doc = mongo.db.token_revocations.find_one_and_update(
+        {"_id": str(user_id)},
+        update,
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    _apply(doc)
+    return doc
+
+
+# ──────────────────────────────────────────────────────────
+# WRITERS  — called by the routes that change a user's access
+# ──────────────────────────────────────────────────────────
+def revoke_tokens(user_id):
+    """End every session of *user_id*; returns the new token version"""
+    user = mongo.db.users.find_one_and_update(
+        {"_id": ObjectId(str(user_id))},
+        {"$inc": {"token_version": 1}},
+        projection={"token_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    version = user["token_version"] if user else 0
+    _publish(user_id, {"$max": {"token_version": version}})
+    return version
+
+
+def set_suspended(user_id, suspended, reason=None):
+    _publish(user_id, {"$set": {"is_suspended": bool(suspended), "suspension_reason": reason}})
+
+
+def mark_deleted(user_id):
+    _publish(user_id, {"$set": {"deleted": True}})
+
+
+# ──────────────────────────────────────────────────────────
+# CHECKS
+# ──────────────────────────────────────────────────────────
+def token_version_of(user):
+    """Claim value for a token issued now to *user* (a users document)"""
+    return user.get("token_version", 0)
+
+
+def token_state(jwt_payload):
+    """None for a usable token, otherwise "revoked" or "suspended" """
+    refresh()
+    entry = _cache.get(jwt_payload.get("sub"))
+    if not entry:
+        return None
+    if entry.get("deleted") or \
+            jwt_payload.get(TOKEN_VERSION_CLAIM, 0) < entry.get("token_version", 0):
+        return "revoked"
+    if entry.get("is_suspended"):
+        return "suspended"
+    return None
+
+
+def register_token_checks(jwt):
+    """Wire the checks into a JWTManager (called from create_app)"""
+
+    @jwt.token_in_blocklist_loader
+    def _token_blocked(jwt_header, jwt_payload):
+        return token_state(jwt_payload) is not None
+
+    @jwt.revoked_token_loader
+    def _blocked_token_response(jwt_header, jwt_payload):
+        if token_state(jwt_payload) == "suspended":
+            entry = _cache.get(jwt_payload.get("sub")) or {}
+            return jsonify({
+                "error": "account_suspended",
+                "message": "Your account has been suspended. Please contact support.",
+                "reason": entry.get("suspension_reason") or ""
+            }), 403
+        return jsonify({
+            "error": "token_revoked",
+            "message": "Your session has ended. Please log in again."
+        }), 401
+
+
+# ──────────────────────────────────────────────────────────
+# BACKFILL
+# ──────────────────────────────────────────────────────────
+def revoke_suspended_users():
+    """End the sessions of every suspended user; returns how many were revoked"""
+    revoked = 0
+    for user in mongo.db.users.find(
+        {"is_suspended": True}, {"_id": 1, "suspension_reason": 1}
+    ):
+        revoke_tokens(user["_id"])
+        set_suspended(user["_id"], True, user.get("suspension_reason"))
+        revoked += 1
+    return revoked
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    with create_app().app_context():
+        print(f"Revoked tokens for {revoke_suspended_users()} suspended users")
@@ -0,0 +1,191 @@
+# services/usage_counters.py
+"""
+Per-landlord subscription usage counters stored on the landlord's user
+document, so /subscription/current and tier-limit checks never count
+properties or aggregate bookings:
+
+    usage: {
+        "listings":            <properties the landlord currently has>,
+        "total_bookings":      <bookings ever confirmed>,
+        "period":              "2026-10",   (current billing month)
+        "period_bookings":     <bookings confirmed this month>,
+        "commission_accrued":  <estimated commission for this month>
+    }
+
+Every counter moves with a single atomic update. Listing slots are reserved
+with a conditional $inc (`usage.listings < limit`), so the tier limit holds
+even under concurrent creates. A landlord without a usage block (created
+before the counters existed) is seeded from the properties / bookings
+collections on first use, never counted from zero. rebuild_usage()
+recomputes the counters for everyone and is the reconciliation path:
+
+    python -m services.usage_counters [<landlord_id>]
+"""
+
+from datetime import datetime
+from bson import ObjectId
+from extensions import mongo
+
+
+PERIOD_FORMAT = "%Y-%m"
+
+# Landlords whose usage block was never built (or only partly, by older code)
+MISSING_USAGE = {"$or": [{"usage.listings": {"$exists": False}},
+                         {"usage.total_bookings": {"$exists": False}}]}
+
+
+def current_period(now=None):
+    return (now or datetime.utcnow()).strftime(PERIOD_FORMAT)
+
+
+def _commission_rates():
+    from routes.subscription_routes import SUBSCRIPTION_TIERS
+    return {tier: t["commission_rate"] for tier, t in SUBSCRIPTION_TIERS.items()}
+
+
+def seed_usage(landlord_id):
+    """
+    Build the usage block from the landlord's properties and confirmed
+    bookings if it is missing. Returns True when this call wrote it.
+    """
+    landlord = ObjectId(landlord_id)
+    usage = _count_usage(str(landlord), _commission_rates())
+    result = mongo.db.users.update_one(
+        {"_id": landlord, **MISSING_USAGE},
+        {"$set": {"usage": usage}}
+    )
+    return result.modified_count == 1
+
+
+def reserve_listing(landlord_id, limit):
+    """
+    Take one listing slot if the landlord is below *limit*.
+    Returns False when the limit is already reached.
+    """
+    query = {"_id": ObjectId(landlord_id), "usage.listings": {"$lt": limit}}
+    if mongo.db.users.update_one(query, {"$inc": {"usage.listings": 1}}).modified_count:
+        return True
+    # No counter yet: seed it from the properties they already have, then
+    # check the limit against that
+    seed_usage(landlord_id)
+    return mongo.db.users.update_one(query, {"$inc": {"usage.listings": 1}}).modified_count == 1
+
+
+def release_listing(landlord_id):
+    """Give back a listing slot (property deleted or its insert failed)."""
+    mongo.db.users.update_one(
+        {"_id": ObjectId(landlord_id), "usage.listings": {"$gt": 0}},
+        {"$inc": {"usage.listings": -1}}
+    )
+
+
+def booking_commission(booking, commission_rates):
+    """Estimated commission for one booking: one month's rent x tier rate."""
+    price = (booking.get("property_snapshot") or {}).get("price") or 0
+    rate = commission_rates.get(booking.get("landlord_tier") or "free", 0)
+    return float(price) * rate / 100
+
+
+def record_confirmed_booking(landlord_id, commission):
+    """
+    Count one newly confirmed booking against the landlord's usage. Call it
+    after the booking is stored as confirmed: a missing usage block is seeded
+    from the bookings collection, which already includes this one.
+    """
+    period = current_period()
+    landlord = ObjectId(landlord_id)
+    for _ in range(3):
+        # Same month: plain increments
+        result = mongo.db.users.update_one(
+            {"_id": landlord, "usage.period": period},
+            {"$inc": {
+                "usage.total_bookings": 1,
+                "usage.period_bookings": 1,
+                "usage.commission_accrued": commission
+            }}
+        )
+        if result.matched_count:
+            return
+        # First confirmation of a new month: restart the period counters
+        result = mongo.db.users.update_one(
+            {"_id": landlord, "usage.period": {"$ne": period},
+             "usage.total_bookings": {"$exists": True}},
+            {"$set": {
+                "usage.period": period,
+                "usage.period_bookings": 1,
+                "usage.commission_accrued": commission
+            },
+             "$inc": {"usage.total_bookings": 1}}
+        )
+        if result.matched_count:
+            return
+        if seed_usage(landlord_id):
+            return
+        # Another request started the period (or seeded) in between; increment instead
+
+
+def get_usage(user):
+    """Usage block for a landlord document (period counters reset lazily)."""
+    usage = (user or {}).get("usage") or {}
+    same_period = usage.get("period") == current_period()
+    return {
+        "listings": usage.get("listings", 0),
+        "total_bookings": usage.get("total_bookings", 0),
+        "period": current_period(),
+        "period_bookings": usage.get("period_bookings", 0) if same_period else 0,
+        "commission_accrued": round(usage.get("commission_accrued", 0), 2) if same_period else 0
+    }
+
+
+def rebuild_usage(landlord_id=None, commission_rates=None):
+    """
+    Recompute usage counters from properties and bookings for one landlord,
+    or every landlord. Returns the number of landlords updated.
+    """
+    if commission_rates is None:
+        commission_rates = _commission_rates()
+
+    query = {"role": "landlord"}
+    if landlord_id:
+        query["_id"] = ObjectId(landlord_id)
+
+    updated = 0
+    for user in mongo.db.users.find(query, {"_id": 1}):
+        usage = _count_usage(str(user["_id"]), commission_rates)
+        mongo.db.users.update_one({"_id": user["_id"]}, {"$set": {"usage": usage}})
+        updated += 1
+    return updated
+
+
+def _count_usage(uid, commission_rates):
+    """Usage block computed from the properties and bookings collections"""
+    period = current_period()
+    period_start = datetime.strptime(period, PERIOD_FORMAT)
+    listings = mongo.db.properties.count_documents({"landlord_id": uid})
+    total_bookings = 0
+    period_bookings = 0
+    commission = 0.0
+    for booking in mongo.db.bookings.find(
+        {"landlord_id": uid, "confirmed_at": {"$ne": None}},
+        {"confirmed_at": 1, "property_snapshot": 1, "landlord_tier": 1}
+    ):
+        total_bookings += 1
+        if booking["confirmed_at"] >= period_start:
+            period_bookings += 1
+            commission += booking_commission(booking, commission_rates)
+    return {
+        "listings": listings,
+        "total_bookings": total_bookings,
+        "period": period,
+        "period_bookings": period_bookings,
+        "commission_accrued": commission
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    from app import create_app
+
+    with create_app().app_context():
+        target = sys.argv[1] if len(sys.argv) > 1 else None
+        print(f"Rebuilt usage counters for {rebuild_usage(target)} landlords")
@@ -0,0 +1,114 @@
+# backend/tests/test_mpesa_client.py
+"""
+MPesaClient (utils/mpesa.py) against the local Daraja stub (utils/mpesa_stub.py).
+
+    cd backend && python -m pytest tests
+"""
+
+import threading
+
+import pytest
+import requests
+
+from utils.mpesa import MPesaClient
+from utils.mpesa_stub import DarajaStub
+
+
+@pytest.fixture
+def stub():
+    server = DarajaStub().start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(stub, **config):
+    return MPesaClient({
+        "MPESA_BASE_URL": stub.base_url,
+        "MPESA_CONSUMER_KEY": "key",
+        "MPESA_CONSUMER_SECRET": "secret",
+        "MPESA_SHORTCODE": "174379",
+        "MPESA_PASSKEY": "passkey",
+        "MPESA_CALLBACK_URL": "http://127.0.0.1/mpesa/callback",
+        **config
+    })
+
+
+def test_concurrent_callers_share_one_oauth_call(stub):
+    stub.latency = 0.2      # long enough for every thread to find the cache empty
+    client = make_client(stub)
+    threads = 10
+    barrier = threading.Barrier(threads)
+    tokens = []
+
+    def fetch():
+        barrier.wait()
+        tokens.append(client.get_access_token())
+
+    workers = [threading.Thread(target=fetch) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert stub.calls["oauth"] == 1
+    assert len(tokens) == threads and len(set(tokens)) == 1
+
+
+def test_cached_token_is_reused(stub):
+    client = make_client(stub)
+    client.stk_push("254712345678", 100, "ref", "Subscription")
+    client.query_transaction("ws_CO_1")
+
+    assert stub.calls == {"oauth": 1, "stk_push": 1, "stk_query": 1}
+
+
+def test_401_refreshes_the_token_once_and_retries(stub):
+    client = make_client(stub)
+    old_token = client.get_access_token()
+    stub.valid_tokens.clear()       # Daraja expired the token early
+
+    result = client.stk_push("254712345678", 100, "ref", "Subscription")
+
+    assert result["ResponseCode"] == "0"
+    assert stub.calls["oauth"] == 2
+    assert stub.calls["stk_push"] == 1
+    assert client.get_access_token() != old_token
+
+
+def test_repeated_401_gives_up_after_one_refresh(stub):
+    client = make_client(stub)
+    stub.reject_tokens = True
+
+    with pytest.raises(requests.HTTPError) as excinfo:
+        client.query_transaction("ws_CO_1")
+
+    assert excinfo.value.response.status_code == 401
+    assert stub.calls["oauth"] == 2
+    assert client.metrics_snapshot()["stk_query"]["errors"] == 2
+
+
+def test_slow_daraja_times_out(stub):
+    client = make_client(stub, MPESA_READ_TIMEOUT=0.1)
+    client.get_access_token()
+    stub.latency = 0.5
+
+    with pytest.raises(requests.Timeout):
+        client.stk_push("254712345678", 100, "ref", "Subscription")
+
+    stk_push = client.metrics_snapshot()["stk_push"]
+    assert stk_push["count"] == 1 and stk_push["errors"] == 1
+    # A timeout is not an auth failure: the cached token is kept
+    assert stub.calls["oauth"] == 1
+
+
+def test_oauth_timeout_is_raised_and_not_cached(stub):
+    stub.latency = 0.5
+    client = make_client(stub, MPESA_READ_TIMEOUT=0.1)
+
+    with pytest.raises(requests.Timeout):
+        client.get_access_token()
+
+    stub.latency = 0.0
+    assert client.get_access_token()
+    assert stub.calls["oauth"] == 2
@@ -0,0 +1,101 @@
+# backend/tests/test_usage_counters.py
+"""
+Usage counters (services/usage_counters.py) for landlords created before the
+counters existed. Needs a MongoDB server; the tests are skipped without one.
+
+    TEST_MONGO_URI=mongodb://localhost:27017/house_hunting_test python -m pytest tests
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+TEST_MONGO_URI = os.getenv("TEST_MONGO_URI", "mongodb://localhost:27017/house_hunting_test")
+
+
+@pytest.fixture(scope="module")
+def app():
+    try:
+        with MongoClient(TEST_MONGO_URI, serverSelectionTimeoutMS=500) as client:
+            client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"No MongoDB at {TEST_MONGO_URI}")
+
+    # Config reads MONGO_URI when it is first imported
+    os.environ["MONGO_URI"] = TEST_MONGO_URI
+    from app import create_app
+    app = create_app(start_background_jobs=False)
+    yield app
+    from extensions import mongo
+    with app.app_context():
+        mongo.cx.drop_database(mongo.db.name)
+
+
+@pytest.fixture
+def landlord(app):
+    """A landlord document without a usage block, removed afterwards"""
+    from extensions import mongo
+    with app.app_context():
+        landlord_id = mongo.db.users.insert_one({
+            "email": f"legacy-{ObjectId()}@example.com",
+            "role": "landlord",
+            "subscription": {"tier": "free"}
+        }).inserted_id
+        yield str(landlord_id)
+        mongo.db.users.delete_one({"_id": landlord_id})
+        mongo.db.properties.delete_many({"landlord_id": str(landlord_id)})
+        mongo.db.bookings.delete_many({"landlord_id": str(landlord_id)})
+
+
+def _usage(landlord_id):
+    from extensions import mongo
+    return mongo.db.users.find_one({"_id": ObjectId(landlord_id)})["usage"]
+
+
+def test_legacy_landlord_at_the_limit_cannot_add_listings(app, landlord):
+    from extensions import mongo
+    from services import usage_counters
+    with app.app_context():
+        mongo.db.properties.insert_many([{"landlord_id": landlord} for _ in range(10)])
+
+        assert not usage_counters.reserve_listing(landlord, 2)
+        assert _usage(landlord)["listings"] == 10
+
+
+def test_legacy_landlord_below_the_limit_counts_from_existing_listings(app, landlord):
+    from extensions import mongo
+    from services import usage_counters
+    with app.app_context():
+        mongo.db.properties.insert_one({"landlord_id": landlord})
+
+        assert usage_counters.reserve_listing(landlord, 2)
+        assert not usage_counters.reserve_listing(landlord, 2)
+        assert _usage(landlord)["listings"] == 2
+
+
+def test_legacy_landlord_booking_totals_include_earlier_bookings(app, landlord):
+    from extensions import mongo
+    from services import usage_counters
+    with app.app_context():
+        now = datetime.utcnow()
+        mongo.db.bookings.insert_many([
+            {"landlord_id": landlord, "status": "completed", "confirmed_at": now - timedelta(days=400)},
+            {"landlord_id": landlord, "status": "confirmed", "confirmed_at": now - timedelta(days=200)},
+            # The booking being recorded, already stored as confirmed
+            {"landlord_id": landlord, "status": "confirmed", "confirmed_at": now,
+             "landlord_tier": "free", "property_snapshot": {"price": 10000}},
+        ])
+
+        usage_counters.record_confirmed_booking(landlord, 1000.0)
+        usage = _usage(landlord)
+        assert usage["total_bookings"] == 3
+        assert usage["period_bookings"] == 1
+        assert usage["commission_accrued"] == 1000.0
+
+        # Seeded once; the next confirmation is a plain increment
+        usage_counters.record_confirmed_booking(landlord, 1000.0)
+        assert _usage(landlord)["total_bookings"] == 4
@@ -1,15 +1,22 @@
-import cloudinary
-import cloudinary.uploader
+import logging
 import os
 from werkzeug.utils import secure_filename
 import tempfile
 
+logger = logging.getLogger(__name__)
+
+
+def _uploader():
+    """cloudinary.uploader, imported on first upload instead of at app startup"""
+    import cloudinary.uploader
+    return cloudinary.uploader
+
 
 
 def upload_image_to_cloudinary(file):
     """Upload a single image to Cloudinary"""
     try:
-        result = cloudinary.uploader.upload(
+        result = _uploader().upload(
             file,
             folder="property_images",
             resource_type="image"
@@ -19,8 +26,8 @@ def upload_image_to_cloudinary(file):
             "public_id": result["public_id"],
             "filename": result.get("original_filename", "")
         }
-    except Exception as e:
-        print(f"Error uploading image to Cloudinary: {str(e)}")
+    except Exception:
+        logger.exception("Error uploading image to Cloudinary")
         raise
 
 
@@ -34,7 +41,7 @@ def upload_video_to_cloudinary(file):
             file.save(temp_file.name)
             temp_file.close()
             
-            result = cloudinary.uploader.upload(
+            result = _uploader().upload(
                 temp_file.name,
                 folder="property_videos",
                 resource_type="video",
@@ -51,8 +58,8 @@ def upload_video_to_cloudinary(file):
             if os.path.exists(temp_file.name):
                 os.unlink(temp_file.name)
                 
-    except Exception as e:
-        print(f"Error uploading video to Cloudinary: {str(e)}")
+    except Exception:
+        logger.exception("Error uploading video to Cloudinary")
         raise
 
 
@@ -82,7 +89,7 @@ def upload_multiple_videos(files):
     
     for file in files:
         try:
-            print(f"Uploading video to Cloudinary: {file.filename}")
+            logger.info("Uploading video to Cloudinary: %s", file.filename)
             
             # Create a temporary file to save the video
             # FileStorage objects need to be saved to disk for Cloudinary video upload
@@ -93,17 +100,17 @@ def upload_multiple_videos(files):
                 file.save(temp_file.name)
                 temp_file.close()
                 
-                print(f"Temp file created: {temp_file.name}")
+                logger.debug("Temp file created: %s", temp_file.name)
                 
                 # Upload to Cloudinary using the temp file path
-                result = cloudinary.uploader.upload(
+                result = _uploader().upload(
                     temp_file.name,
                     folder="property_videos",
                     resource_type="video",
                     chunk_size=6000000  # 6MB chunks
                 )
                 
-                print(f"Cloudinary upload successful: {result['secure_url']}")
+                logger.info("Cloudinary upload successful: %s", result['secure_url'])
                 
                 uploaded_files.append({
                     "original_name": file.filename,
@@ -115,11 +122,11 @@ def upload_multiple_videos(files):
                 # Always clean up the temp file
                 if os.path.exists(temp_file.name):
                     os.unlink(temp_file.name)
-                    print(f"Temp file cleaned up: {temp_file.name}")
+                    logger.debug("Temp file cleaned up: %s", temp_file.name)
                     
         except Exception as e:
             error_msg = f"{file.filename}: {str(e)}"
-            print(f"❌ Error uploading video: {error_msg}")
+            logger.exception("Error uploading video %s", file.filename)
             errors.append(error_msg)
     
     return uploaded_files, errors
@@ -144,15 +151,15 @@ def delete_from_cloudinary(url, resource_type="image"):
         # Remove file extension
         public_id = os.path.splitext(public_id)[0]
         
-        print(f"Deleting from Cloudinary: {public_id} (type: {resource_type})")
+        logger.info("Deleting from Cloudinary: %s (type: %s)", public_id, resource_type)
         
-        result = cloudinary.uploader.destroy(
+        result = _uploader().destroy(
             public_id,
             resource_type=resource_type
         )
         
         return result.get("result") == "ok"
         
-    except Exception as e:
-        print(f"Error deleting from Cloudinary: {str(e)}")
+    except Exception:
+        logger.exception("Error deleting from Cloudinary")
         return False
\ No newline at end of file
@@ -1,5 +1,9 @@
 # utils/create_indexes.py
+# Run manually from the backend folder: python -m utils.create_indexes
+# create_index() is idempotent, so running it again is safe.
+from flask import current_app
 from extensions import mongo
+from services.notification_archiver import ARCHIVE_RETENTION_DAYS
 
 def create_favourites_indexes():
     """Create indexes for favourites collection"""
@@ -7,4 +11,152 @@ def create_favourites_indexes():
     mongo.db.favourites.create_index([("user_id", 1), ("property_id", 1)], unique=True)
     # Index for querying by user
     mongo.db.favourites.create_index([("user_id", 1)])
-    print(" Favourites indexes created")
\ No newline at end of file
+    print(" Favourites indexes created")
+
+def create_notification_indexes():
+    """Create indexes for notifications, broadcasts and broadcast receipts"""
+    # Inbox listing / unread count for one user, newest first
+    mongo.db.notifications.create_index([("user_id", 1), ("created_at", -1)])
+    mongo.db.notifications.create_index([("user_id", 1), ("is_read", 1)])
+    # TTL: mongod deletes each notification once expires_at has passed
+    mongo.db.notifications.create_index([("expires_at", 1)], expireAfterSeconds=0)
+    # Archive job scans read notifications by read_at; partial keeps it small
+    mongo.db.notifications.create_index(
+        [("read_at", 1)],
+        partialFilterExpression={"is_read": True}
+    )
+    # Cold archive: per-user lookups, removed ARCHIVE_RETENTION_DAYS after archiving
+    mongo.db.notifications_archive.create_index([("user_id", 1), ("created_at", -1)])
+    mongo.db.notifications_archive.create_index(
+        [("archived_at", 1)],
+        expireAfterSeconds=ARCHIVE_RETENTION_DAYS * 24 * 3600
+    )
+    # Active broadcasts for a role, newest first
+    mongo.db.broadcasts.create_index([("audience_roles", 1), ("created_at", -1)])
+    # One read/dismiss marker per (user, broadcast)
+    mongo.db.broadcast_receipts.create_index([("user_id", 1), ("broadcast_id", 1)], unique=True)
+    # Receipts are only needed while their broadcast is still visible
+    mongo.db.broadcast_receipts.create_index([("expires_at", 1)], expireAfterSeconds=0)
+    # Scheduled delivery: at most one broadcast per schedule
+    mongo.db.broadcasts.create_index([("schedule_id", 1)], unique=True, sparse=True)
+    # Scheduled delivery: at most one notification per (schedule, user), so a
+    # retried chunk cannot notify anyone twice
+    mongo.db.notifications.create_index(
+        [("schedule_id", 1), ("user_id", 1)],
+        unique=True,
+        partialFilterExpression={"schedule_id": {"$type": "string"}}
+    )
+    # Dispatcher polls due schedules in order
+    mongo.db.scheduled_notifications.create_index([("status", 1), ("scheduled_for", 1)])
+    print(" Notification indexes created")
+
+def create_booking_indexes():
+    """Create indexes for bookings collection"""
+    # Per-landlord / per-tenant listings and last-activity lookups
+    mongo.db.bookings.create_index([("landlord_id", 1), ("created_at", -1)])
+    mongo.db.bookings.create_index([("tenant_id", 1), ("created_at", -1)])
+    # Daily analytics rollups scan one day at a time
+    mongo.db.bookings.create_index([("created_at", 1)])
+    mongo.db.bookings.create_index([("confirmed_at", 1)], sparse=True)
+    # Commission report: confirmed bookings in a period, grouped by landlord_tier
+    mongo.db.bookings.create_index([("status", 1), ("created_at", 1)])
+    print(" Booking indexes created")
+
+def create_property_indexes():
+    """Create indexes for properties collection"""
+    # Landlord dashboards and campaign property-status lookups
+    mongo.db.properties.create_index([("landlord_id", 1), ("status", 1)])
+    # Daily analytics rollups scan one day at a time
+    mongo.db.properties.create_index([("created_at", 1)])
+    # Listing and filter options: active properties, newest first
+    mongo.db.properties.create_index([("status", 1), ("created_at", -1)])
+    # Search by type, newest first; the case-insensitive city regex is
+    # checked on the (much smaller) set of matching index entries
+    mongo.db.properties.create_index([("status", 1), ("property_type", 1), ("created_at", -1)])
+    # Nearby: bounding box on latitude / longitude
+    mongo.db.properties.create_index([("status", 1), ("latitude", 1), ("longitude", 1)])
+    print(" Property indexes created")
+
+def create_review_indexes():
+    """Create indexes for reviews collection"""
+    # Public landlord review listing and stats reconciliation
+    mongo.db.reviews.create_index([("landlord_id", 1), ("status", 1), ("created_at", -1)])
+    # One review per tenant per property
+    mongo.db.reviews.create_index([("tenant_id", 1), ("landlord_id", 1), ("property_id", 1)])
+    print(" Review indexes created")
+
+def create_analytics_indexes():
+    """Create indexes for the daily_metrics rollups"""
+    # Range sums per metric/dimension and latest-snapshot lookups
+    mongo.db.daily_metrics.create_index([("kind", 1), ("metric", 1), ("dimension", 1), ("day", -1)])
+    # Rollup re-runs clear stale values of one day
+    mongo.db.daily_metrics.create_index([("kind", 1), ("day", 1)])
+    # Daily rollup of new users
+    mongo.db.users.create_index([("created_at", 1)])
+    print(" Analytics indexes created")
+
+def create_ledger_indexes():
+    """Create indexes for the revenue ledger and its daily rollup"""
+    # One entry per completed payment - makes ledger writes idempotent
+    mongo.db.ledger_entries.create_index([("payment_id", 1)], unique=True)
+    # Report periods and top landlords
+    mongo.db.ledger_entries.create_index([("completed_at", 1)])
+    # MRR: subscriptions whose paid period has not ended
+    mongo.db.ledger_entries.create_index([("type", 1), ("period_end", 1)])
+    mongo.db.ledger_daily.create_index([("day", 1)])
+    # Transactions listing
+    mongo.db.payments.create_index([("created_at", -1)])
+    # Callback lookup by STK CheckoutRequestID
+    mongo.db.payments.create_index([("mpesa_checkout_request_id", 1)], sparse=True)
+    # Reconciler: due processing payments, and abandoned pending ones
+    mongo.db.payments.create_index([("status", 1), ("next_reconcile_at", 1)])
+    mongo.db.payments.create_index([("status", 1), ("created_at", 1)])
+    # Late M-Pesa confirmations awaiting an admin (few documents)
+    mongo.db.payments.create_index(
+        [("needs_reconciliation", 1), ("created_at", -1)],
+        partialFilterExpression={"needs_reconciliation": True}
+    )
+    # Callback inbox: one document per CheckoutRequestID makes retries no-ops
+    mongo.db.mpesa_callback_inbox.create_index(
+        [("checkout_request_id", 1)],
+        unique=True,
+        partialFilterExpression={"checkout_request_id": {"$type": "string"}}
+    )
+    mongo.db.mpesa_callback_inbox.create_index([("status", 1), ("next_attempt_at", 1)])
+    print(" Ledger indexes created")
+
+def create_auth_indexes():
+    """Create indexes for token revocation checks and rate limiting"""
+    # Incremental cache refresh: documents changed since the last pull
+    mongo.db.token_revocations.create_index([("updated_at", 1)])
+    # Rate limit windows expire on their own once they stop mattering
+    mongo.db.rate_limit_counters.create_index([("expires_at", 1)], expireAfterSeconds=0)
+    print(" Auth indexes created")
+
+def create_monitoring_indexes():
+    """Create indexes for the slow query log"""
+    retention_days = current_app.config.get("SLOW_QUERY_RETENTION_DAYS", 7)
+    mongo.db.slow_queries.create_index(
+        [("created_at", 1)], expireAfterSeconds=retention_days * 86400
+    )
+    mongo.db.slow_queries.create_index([("shape_hash", 1), ("created_at", -1)])
+    print(" Monitoring indexes created")
+
+def create_all_indexes():
+    """Create every index the application relies on"""
+    create_favourites_indexes()
+    create_notification_indexes()
+    create_booking_indexes()
+    create_property_indexes()
+    create_review_indexes()
+    create_analytics_indexes()
+    create_ledger_indexes()
+    create_auth_indexes()
+    create_monitoring_indexes()
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    with create_app().app_context():
+        create_all_indexes()
@@ -0,0 +1,117 @@
+# utils/export_stream.py
+"""
+Streaming CSV / NDJSON exports for admin reports.
+
+Export endpoints hand a MongoDB cursor to export_response(), which walks it
+in batches of EXPORT_BATCH_SIZE and yields the encoded rows through a Flask
+streaming response, so memory use stays constant however many documents
+match. An optional enrich(batch) callback runs once per batch - that is where
+related data (e.g. landlord emails) is joined with a single $in query instead
+of one lookup per row.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from bson import ObjectId
+from flask import Response, request, stream_with_context
+from extensions import mongo
+
+
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_FORMATS = {
+    "csv":    "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _plain(value):
+    """JSON/CSV-safe representation of a Mongo value."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _lookup(doc, field):
+    """Value of a dotted *field* in *doc* (None when missing)."""
+    for part in field.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+
+def iter_batches(cursor, size=EXPORT_BATCH_SIZE):
+    """Yield lists of up to *size* documents from *cursor*."""
+    batch = []
+    for doc in cursor.batch_size(size):
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def landlord_emails(landlord_ids):
+    """Map str(landlord_id) -> email with one query for the whole batch."""
+    ids = {ObjectId(str(i)) for i in landlord_ids if i and ObjectId.is_valid(str(i))}
+    if not ids:
+        return {}
+    return {
+        str(user["_id"]): user.get("email")
+        for user in mongo.db.users.find({"_id": {"$in": list(ids)}}, {"email": 1})
+    }
+
+
+def export_format():
+    """The requested export format, or None when it is not supported."""
+    fmt = (request.args.get("format") or "csv").lower()
+    return fmt if fmt in EXPORT_FORMATS else None
+
+
+def export_response(cursor, fields, fmt, filename, enrich=None):
+    """
+    Stream *cursor* as CSV (header row = *fields*) or NDJSON (one object per
+    line with *fields* as keys). Dotted field names read nested values.
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(fields)
+
+        for batch in iter_batches(cursor):
+            if enrich:
+                enrich(batch)
+            for doc in batch:
+                row = [_plain(_lookup(doc, field)) for field in fields]
+                if fmt == "csv":
+                    writer.writerow(
+                        json.dumps(v) if isinstance(v, (dict, list)) else v for v in row
+                    )
+                else:
+                    buffer.write(json.dumps(dict(zip(fields, row)), default=str) + "\n")
+            # One chunk per batch keeps writes large without holding more
+            # than a batch in memory
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+        remainder = buffer.getvalue()
+        if remainder:
+            yield remainder
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
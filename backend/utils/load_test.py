@@ -0,0 +1,158 @@
+# backend/utils/load_test.py
+"""
+HTTP load test for the main public endpoints, used to compare gunicorn
+worker classes.
+
+Start the server with rate limiting off (it would answer most of the load
+with 429) and run the same load against each worker class:
+
+    RATE_LIMIT_ENABLED=false GUNICORN_WORKER_CLASS=sync   gunicorn -c gunicorn.conf.py wsgi:app
+    python -m utils.load_test --url http://127.0.0.1:5000 --concurrency 64 --duration 30 --out sync.json
+
+    RATE_LIMIT_ENABLED=false GUNICORN_WORKER_CLASS=gevent gunicorn -c gunicorn.conf.py wsgi:app
+    python -m utils.load_test --url http://127.0.0.1:5000 --concurrency 64 --duration 30 --out gevent.json
+
+    python -m utils.load_test --compare sync.json gevent.json
+
+Each virtual user loops over the scenario below for --duration seconds on
+its own keep-alive session; results are per endpoint (requests/s, p50 /
+p95 / p99 latency, errors).
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SEARCH_BODIES = [
+    {"city": "Nairobi"},
+    {"property_type": "apartment", "min_price": 10000, "max_price": 50000},
+    {"bedrooms": 2},
+]
+
+
+def _scenario(base_url, property_ids):
+    """(name, method, url, json body) for one pass of a virtual user"""
+    steps = [
+        ("health", "GET", f"{base_url}/health", None),
+        ("list", "GET", f"{base_url}/properties/?page={random.randint(1, 5)}&per_page=12", None),
+        ("search", "POST", f"{base_url}/properties/search", random.choice(SEARCH_BODIES)),
+        ("filters", "GET", f"{base_url}/properties/filters/options", None),
+    ]
+    if property_ids:
+        steps.append(("detail", "GET", f"{base_url}/properties/{random.choice(property_ids)}", None))
+    return steps
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _property_ids(base_url):
+    try:
+        response = requests.get(f"{base_url}/properties/?per_page=50", timeout=10)
+        return [p.get("_id") or p.get("id") for p in response.json().get("properties", [])
+                if p.get("_id") or p.get("id")]
+    except Exception:
+        return []
+
+
+def run(base_url, concurrency, duration, timeout):
+    property_ids = _property_ids(base_url)
+    results = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def virtual_user():
+        session = requests.Session()
+        local = {}
+        while time.monotonic() < deadline:
+            for name, method, url, body in _scenario(base_url, property_ids):
+                stats = local.setdefault(name, {"latencies": [], "errors": 0, "status": {}})
+                started = time.perf_counter()
+                try:
+                    response = session.request(method, url, json=body, timeout=timeout)
+                    status = str(response.status_code)
+                    if response.status_code >= 500:
+                        stats["errors"] += 1
+                except requests.RequestException:
+                    status = "exception"
+                    stats["errors"] += 1
+                stats["latencies"].append(time.perf_counter() - started)
+                stats["status"][status] = stats["status"].get(status, 0) + 1
+        with lock:
+            for name, stats in local.items():
+                merged = results.setdefault(name, {"latencies": [], "errors": 0, "status": {}})
+                merged["latencies"].extend(stats["latencies"])
+                merged["errors"] += stats["errors"]
+                for status, count in stats["status"].items():
+                    merged["status"][status] = merged["status"].get(status, 0) + count
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(virtual_user) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.monotonic() - started
+
+    ms = lambda seconds: round(seconds * 1000, 1)
+    report = {"url": base_url, "concurrency": concurrency, "elapsed_s": round(elapsed, 1), "endpoints": {}}
+    total = 0
+    for name, stats in sorted(results.items()):
+        latencies = stats["latencies"]
+        total += len(latencies)
+        report["endpoints"][name] = {
+            "requests": len(latencies),
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": ms(_percentile(latencies, 50)),
+            "p95_ms": ms(_percentile(latencies, 95)),
+            "p99_ms": ms(_percentile(latencies, 99)),
+            "errors": stats["errors"],
+            "status": stats["status"]
+        }
+    report["total_rps"] = round(total / elapsed, 1)
+    return report
+
+
+def compare(paths):
+    reports = [(path, json.load(open(path))) for path in paths]
+    names = sorted({name for _, r in reports for name in r["endpoints"]})
+    print(f"{'endpoint':<10}" + "".join(f"{path:>36}" for path, _ in reports))
+    for name in names:
+        row = f"{name:<10}"
+        for _, report in reports:
+            e = report["endpoints"].get(name)
+            row += f"{e['rps']:>10} rps p95 {e['p95_ms']:>8} ms err {e['errors']:>3}" if e else f"{'-':>36}"
+        print(row)
+    print(f"{'total':<10}" + "".join(f"{r['total_rps']:>32} rps" for _, r in reports))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the main API endpoints")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users")
+    parser.add_argument("--duration", type=int, default=30, help="seconds")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout (s)")
+    parser.add_argument("--out", help="write the JSON report here as well")
+    parser.add_argument("--compare", nargs="+", metavar="REPORT", help="print saved reports side by side")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+        return
+
+    report = run(args.url.rstrip("/"), args.concurrency, args.duration, args.timeout)
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,22 @@
 # utils/location_utils.py
 
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-from geopy.distance import geodesic
+import logging
 import time
 
-# Initialize geocoder with a user agent (required by Nominatim)
-geolocator = Nominatim(user_agent="house_hunting_app")
+logger = logging.getLogger(__name__)
+
+# geopy (and the requests/urllib3 stack under it) is imported on first use
+# rather than at app startup; it accounts for most of the import time
+_geolocator = None
+
+
+def get_geolocator():
+    """Shared Nominatim geocoder (a user agent is required by Nominatim)"""
+    global _geolocator
+    if _geolocator is None:
+        from geopy.geocoders import Nominatim
+        _geolocator = Nominatim(user_agent="house_hunting_app")
+    return _geolocator
 
 def geocode_address(address, city=None, state=None, country=None):
     """
@@ -22,6 +32,7 @@ def geocode_address(address, city=None, state=None, country=None):
         dict: {"latitude": float, "longitude": float, "formatted_address": str}
         or None if geocoding fails
     """
+    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
     try:
         # Build full address string
         address_parts = [address]
@@ -38,7 +49,7 @@ def geocode_address(address, city=None, state=None, country=None):
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                location = geolocator.geocode(full_address, timeout=10)
+                location = get_geolocator().geocode(full_address, timeout=10)
                 
                 if location:
                     return {
@@ -54,14 +65,14 @@ def geocode_address(address, city=None, state=None, country=None):
                     time.sleep(1)  # Wait before retry
                     continue
                 else:
-                    print(f"Geocoding timed out after {max_retries} attempts")
+                    logger.warning("Geocoding timed out after %s attempts", max_retries)
                     return None
                     
-    except GeocoderServiceError as e:
-        print(f"Geocoding service error: {str(e)}")
+    except GeocoderServiceError:
+        logger.exception("Geocoding service error")
         return None
-    except Exception as e:
-        print(f"Unexpected geocoding error: {str(e)}")
+    except Exception:
+        logger.exception("Unexpected geocoding error")
         return None
 
 
@@ -77,12 +88,13 @@ def reverse_geocode(latitude, longitude):
         dict: {"address": str, "city": str, "state": str, "country": str}
         or None if reverse geocoding fails
     """
+    from geopy.exc import GeocoderTimedOut, GeocoderServiceError
     try:
         # Reverse geocode with retry logic
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                location = geolocator.reverse(
+                location = get_geolocator().reverse(
                     f"{latitude}, {longitude}", 
                     timeout=10,
                     language="en"
@@ -116,14 +128,14 @@ def reverse_geocode(latitude, longitude):
                     time.sleep(1)
                     continue
                 else:
-                    print(f"Reverse geocoding timed out after {max_retries} attempts")
+                    logger.warning("Reverse geocoding timed out after %s attempts", max_retries)
                     return None
                     
-    except GeocoderServiceError as e:
-        print(f"Reverse geocoding service error: {str(e)}")
+    except GeocoderServiceError:
+        logger.exception("Reverse geocoding service error")
         return None
-    except Exception as e:
-        print(f"Unexpected reverse geocoding error: {str(e)}")
+    except Exception:
+        logger.exception("Unexpected reverse geocoding error")
         return None
 
 
@@ -138,13 +150,14 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     Returns:
         float: Distance in kilometers
     """
+    from geopy.distance import geodesic
     try:
         point1 = (lat1, lon1)
         point2 = (lat2, lon2)
         distance = geodesic(point1, point2).kilometers
         return round(distance, 2)
-    except Exception as e:
-        print(f"Error calculating distance: {str(e)}")
+    except Exception:
+        logger.exception("Error calculating distance")
         return None
 
 
@@ -220,6 +233,8 @@ def get_bounding_box(center_lat, center_lon, radius_km):
     Returns:
         dict: {"min_lat", "max_lat", "min_lon", "max_lon"}
     """
+    from geopy.distance import geodesic
+
     # Approximate degrees per kilometer
     # At equator: 1 degree latitude ≈ 111 km
     # Longitude varies by latitude
@@ -0,0 +1,218 @@
+# backend/utils/logging_setup.py
+"""
+Structured, non-blocking application logging.
+
+configure_logging(app) sets up the root logger once per app:
+
+  - every record goes through a QueueHandler onto an in-memory queue; a
+    QueueListener thread formats it and writes it to stdout. A request
+    never waits on a slow log pipe, and lines from different threads /
+    greenlets never interleave. When the queue is full (LOG_QUEUE_SIZE)
+    records are dropped and counted instead of blocking.
+  - output is one JSON object per line (LOG_FORMAT=json, the default) or
+    plain text for local development (LOG_FORMAT=text).
+  - each request gets an id — the incoming X-Request-ID header, or a new
+    one — that is added to every record logged while serving it and echoed
+    back in the X-Request-ID response header.
+  - LOG_LEVEL is the default level; LOG_LEVELS overrides it per module,
+    e.g. "routes.property_routes=DEBUG,apscheduler=WARNING".
+  - DEBUG records are sampled: LOG_DEBUG_SAMPLE_RATE of requests keep all
+    of their debug lines, the rest keep none (outside requests, each record
+    is sampled on its own). Set it to 1 to keep everything.
+
+Modules log through the standard library:
+
+    logger = logging.getLogger(__name__)
+    logger.info("Property created", extra={"property_id": property_id})
+
+Fields passed in `extra` become keys of the JSON line.
+
+The listener thread is started lazily in the process that first logs, so a
+gunicorn master that preloads the app hands every worker a working logger.
+shutdown_logging() writes out what is queued; it runs from
+shutdown_background_work() and at interpreter exit.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Library loggers that are too chatty at INFO
+DEFAULT_LEVELS = {"apscheduler": "WARNING", "pymongo": "WARNING", "urllib3": "WARNING"}
+
+# LogRecord attributes that are not `extra` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "request_id",
+}
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps the request id on records and applies debug sampling"""
+
+    def __init__(self, debug_sample_rate):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record):
+        in_request = has_request_context()
+        record.request_id = g.get("request_id") if in_request else None
+        if record.levelno >= logging.INFO or self.debug_sample_rate >= 1:
+            return True
+        if in_request:
+            return g.get("log_debug_sampled", False)
+        return random.random() < self.debug_sample_rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        entry["pid"] = record.process
+        entry["thread"] = record.threadName
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        record.request_id = getattr(record, "request_id", None) or "-"
+        return super().format(record)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """QueueHandler that owns its listener and never blocks the caller"""
+
+    def __init__(self, target, queue_size):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = target
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # New process (first record, or a forked worker): the parent's
+            # listener thread does not exist here
+            self.queue = queue.Queue(maxsize=self.queue_size)
+            self._listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Resolve the message and traceback here, in the calling thread, but
+        # keep them apart so the formatter can emit structured fields
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def flush_and_stop(self):
+        """Write every queued record and stop the listener thread"""
+        with self._start_lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+
+
+_handler = None
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in (spec or "").split(","):
+        name, _, level = item.strip().partition("=")
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(app):
+    """Route all logging through the async JSON handler and add request ids"""
+    global _handler
+    config = app.config
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(TextFormatter() if config.get("LOG_FORMAT") == "text" else JsonFormatter())
+
+    handler = AsyncQueueHandler(stream, config.get("LOG_QUEUE_SIZE", 10000))
+    sample_rate = float(config.get("LOG_DEBUG_SAMPLE_RATE", 0.01))
+    handler.addFilter(RequestContextFilter(sample_rate))
+
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+        _handler.flush_and_stop()
+    root.addHandler(handler)
+    root.setLevel(config.get("LOG_LEVEL", "INFO").upper())
+    for name, level in {**DEFAULT_LEVELS, **_parse_levels(config.get("LOG_LEVELS"))}.items():
+        logging.getLogger(name).setLevel(level)
+    _handler = handler
+
+    @app.before_request
+    def _assign_request_id():
+        g.request_id = request.headers.get(REQUEST_ID_HEADER, "")[:64] or uuid.uuid4().hex
+        g.log_debug_sampled = random.random() < sample_rate
+
+    @app.after_request
+    def _echo_request_id(response):
+        if g.get("request_id"):
+            response.headers[REQUEST_ID_HEADER] = g.request_id
+        return response
+
+
+def shutdown_logging():
+    """Flush queued records to stdout; safe to call more than once"""
+    if _handler is not None:
+        _handler.flush_and_stop()
+
+
+def dropped_records():
+    return _handler.dropped if _handler is not None else 0
+
+
+atexit.register(shutdown_logging)
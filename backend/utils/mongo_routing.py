@@ -0,0 +1,117 @@
+# backend/utils/mongo_routing.py
+"""
+MongoDB client options and read routing per workload.
+
+The app talks to MongoDB through two clients:
+
+  primary    mongo.cx - user-facing routes and background jobs. Reads go to
+             the primary, so users always see their own writes.
+  reporting  admin analytics, financial reports and exports. Reads go to a
+             secondary (MONGO_REPORTING_READ_PREFERENCE) that is at most
+             MONGO_REPORTING_MAX_STALENESS_SECONDS behind, through a separate,
+             smaller pool - a burst of dashboard aggregations neither loads
+             the primary nor takes connections from booking writes.
+
+A route opts in with a decorator placed right above the function, below
+@jwt_required() / @admin_only so the token checks still read the primary:
+
+    @admin_bp.route("/users/export", methods=["GET"])
+    @jwt_required()
+    @admin_only
+    @reads_from(REPORTING)
+    def export_users(): ...
+
+For the rest of that request mongo.db (see extensions.RoutedPyMongo) is the
+reporting client's database, in the route and in every service it calls.
+Writes made through it still go to the primary.
+
+MONGO_REPORTING_URI points the reporting client at other hosts (a hidden
+analytics member, say); without it it connects to MONGO_URI.
+MONGO_READ_ROUTING_ENABLED=false sends everything through the primary client.
+Options written in a URI win over the Config defaults.
+
+utils/replica_set.py starts a local three-member replica set to try this on.
+"""
+
+from functools import wraps
+
+from flask import g
+from pymongo import MongoClient, uri_parser
+
+from extensions import mongo
+
+REPORTING = "reporting"
+
+_clients = {}
+
+
+def _without_uri_options(uri, options):
+    """Drop the options the URI already sets, and the unset ones"""
+    in_uri = uri_parser.parse_uri(uri)["options"]
+    return {key: value for key, value in options.items() if key not in in_uri and value is not None}
+
+
+def primary_client_options(config):
+    """Keyword options for the primary MongoClient (mongo.init_app)"""
+    return _without_uri_options(config["MONGO_URI"], {
+        "maxPoolSize": config["MONGO_MAX_POOL_SIZE"],
+        "minPoolSize": config["MONGO_MIN_POOL_SIZE"],
+        "serverSelectionTimeoutMS": config["MONGO_SERVER_SELECTION_TIMEOUT_MS"],
+        "connectTimeoutMS": config["MONGO_CONNECT_TIMEOUT_MS"],
+        "socketTimeoutMS": config["MONGO_SOCKET_TIMEOUT_MS"],
+        "waitQueueTimeoutMS": config["MONGO_WAIT_QUEUE_TIMEOUT_MS"],
+    })
+
+
+def reporting_client_options(config):
+    uri = config["MONGO_REPORTING_URI"] or config["MONGO_URI"]
+    read_preference = config["MONGO_REPORTING_READ_PREFERENCE"]
+    return _without_uri_options(uri, {
+        "readPreference": read_preference,
+        # Not allowed with primary reads
+        "maxStalenessSeconds": (config["MONGO_REPORTING_MAX_STALENESS_SECONDS"]
+                                if read_preference != "primary" else None),
+        "maxPoolSize": config["MONGO_REPORTING_MAX_POOL_SIZE"],
+        "minPoolSize": 0,
+        "serverSelectionTimeoutMS": config["MONGO_SERVER_SELECTION_TIMEOUT_MS"],
+        "connectTimeoutMS": config["MONGO_CONNECT_TIMEOUT_MS"],
+        "socketTimeoutMS": config["MONGO_REPORTING_SOCKET_TIMEOUT_MS"],
+        "waitQueueTimeoutMS": config["MONGO_WAIT_QUEUE_TIMEOUT_MS"],
+    })
+
+
+def init_mongo_routing(app, event_listeners=()):
+    """Create the reporting client; call after mongo.init_app()"""
+    mongo.workloads.clear()
+    _clients.clear()
+    if not app.config["MONGO_READ_ROUTING_ENABLED"]:
+        return
+
+    uri = app.config["MONGO_REPORTING_URI"] or app.config["MONGO_URI"]
+    # connect=False for the same reason as the primary client: a preloading
+    # gunicorn master must fork workers before any sockets exist
+    client = MongoClient(
+        uri,
+        connect=False,
+        appname=f"house-hunting-{REPORTING}",
+        event_listeners=list(event_listeners),
+        **reporting_client_options(app.config)
+    )
+    _clients[REPORTING] = client
+    mongo.workloads[REPORTING] = client.get_default_database(default=mongo.db.name)
+
+
+def reads_from(workload):
+    """Serve the rest of the request from `workload`'s client"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            g.mongo_workload = workload
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def shutdown_mongo_routing():
+    for client in _clients.values():
+        client.close()
@@ -4,53 +4,169 @@ M-Pesa Daraja API Integration
 STK Push (Lipa Na M-Pesa Online)
 """
 
-import requests
+import logging
 import base64
+import threading
+import time
 from datetime import datetime
+
 from flask import current_app
-import json
+
+logger = logging.getLogger(__name__)
+
+# Refresh the cached OAuth token this long before Daraja says it expires
+TOKEN_REFRESH_MARGIN_SECONDS = 60
+
+# Daraja tokens live for an hour; used when the response omits expires_in
+DEFAULT_TOKEN_TTL_SECONDS = 3599
+
 
 class MPesaClient:
-    """M-Pesa Daraja API Client"""
+    """
+    M-Pesa Daraja API Client
+
+    One instance is shared by the whole process (see get_mpesa_client()):
+      - a requests.Session keeps a pool of keep-alive connections to Daraja
+      - the OAuth token is cached until shortly before it expires; when it
+        does need refreshing only one thread fetches it, the others wait for
+        that result instead of each making their own OAuth round trip
+      - every call uses explicit (connect, read) timeouts
+      - per-operation latency / error counters are kept in self.metrics
+    """
     
-    def __init__(self):
-        # Get credentials from environment variables
-        self.consumer_key = current_app.config.get('MPESA_CONSUMER_KEY')
-        self.consumer_secret = current_app.config.get('MPESA_CONSUMER_SECRET')
-        self.shortcode = current_app.config.get('MPESA_SHORTCODE')
-        self.passkey = current_app.config.get('MPESA_PASSKEY')
-        self.callback_url = current_app.config.get('MPESA_CALLBACK_URL')
+    def __init__(self, config=None):
+        config = config if config is not None else current_app.config
         
-        # API URLs
-        self.environment = current_app.config.get('MPESA_ENVIRONMENT', 'sandbox')
-        if self.environment == 'production':
+        # Get credentials from configuration
+        self.consumer_key = config.get('MPESA_CONSUMER_KEY')
+        self.consumer_secret = config.get('MPESA_CONSUMER_SECRET')
+        self.shortcode = config.get('MPESA_SHORTCODE')
+        self.passkey = config.get('MPESA_PASSKEY')
+        self.callback_url = config.get('MPESA_CALLBACK_URL')
+        
+        # API URLs (MPESA_BASE_URL overrides, e.g. to point at a local stub)
+        self.environment = config.get('MPESA_ENVIRONMENT', 'sandbox')
+        if config.get('MPESA_BASE_URL'):
+            self.base_url = config.get('MPESA_BASE_URL').rstrip('/')
+        elif self.environment == 'production':
             self.base_url = 'https://api.safaricom.co.ke'
         else:
             self.base_url = 'https://sandbox.safaricom.co.ke'
+        
+        self.timeout = (
+            float(config.get('MPESA_CONNECT_TIMEOUT', 3.05)),
+            float(config.get('MPESA_READ_TIMEOUT', 15))
+        )
+        
+        # Connection pool shared by all threads of this process
+        pool_size = int(config.get('MPESA_POOL_SIZE', 10))
+        # requests is imported here, on first use, to keep it off app startup
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Token cache
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        
+        # Per-operation metrics
+        self.metrics = {}
+        self._metrics_lock = threading.Lock()
     
-    def get_access_token(self):
-        """Get OAuth access token from M-Pesa API"""
+    # ------------------------------------------------------------------ #
+    # Metrics                                                             #
+    # ------------------------------------------------------------------ #
+    def _record(self, operation, started, ok):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._metrics_lock:
+            m = self.metrics.setdefault(operation, {
+                "count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0
+            })
+            m["count"] += 1
+            m["errors"] += 0 if ok else 1
+            m["total_ms"] += elapsed_ms
+            m["max_ms"] = max(m["max_ms"], elapsed_ms)
+            m["last_ms"] = elapsed_ms
+    
+    def metrics_snapshot(self):
+        """Copy of the per-operation metrics with the average latency added"""
+        with self._metrics_lock:
+            return {
+                op: {**m, "avg_ms": round(m["total_ms"] / m["count"], 2) if m["count"] else 0}
+                for op, m in self.metrics.items()
+            }
+    
+    def _request(self, operation, method, url, **kwargs):
+        """Timed Daraja call through the pooled session"""
+        started = time.perf_counter()
+        ok = False
         try:
-            url = f"{self.base_url}/oauth/v1/generate?grant_type=client_credentials"
-            
-            # Create basic auth string
-            auth_string = f"{self.consumer_key}:{self.consumer_secret}"
-            auth_bytes = auth_string.encode('ascii')
-            auth_base64 = base64.b64encode(auth_bytes).decode('ascii')
-            
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            ok = response.status_code < 400
+            return response
+        finally:
+            self._record(operation, started, ok)
+    
+    # ------------------------------------------------------------------ #
+    # OAuth token                                                         #
+    # ------------------------------------------------------------------ #
+    def _fetch_access_token(self):
+        url = f"{self.base_url}/oauth/v1/generate?grant_type=client_credentials"
+        
+        # Create basic auth string
+        auth_string = f"{self.consumer_key}:{self.consumer_secret}"
+        auth_base64 = base64.b64encode(auth_string.encode('ascii')).decode('ascii')
+        
+        response = self._request(
+            "oauth", "GET", url, headers={'Authorization': f'Basic {auth_base64}'}
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        ttl = int(result.get('expires_in') or DEFAULT_TOKEN_TTL_SECONDS)
+        return result['access_token'], ttl
+    
+    def get_access_token(self):
+        """Cached OAuth access token, refreshed shortly before it expires"""
+        if self._token and time.monotonic() < self._token_expires_at:
+            return self._token
+        
+        # Single flight: one thread refreshes, the rest reuse its token
+        with self._token_lock:
+            if self._token and time.monotonic() < self._token_expires_at:
+                return self._token
+            try:
+                token, ttl = self._fetch_access_token()
+            except Exception:
+                logger.exception("Error getting access token")
+                raise
+            self._token = token
+            self._token_expires_at = time.monotonic() + max(0, ttl - TOKEN_REFRESH_MARGIN_SECONDS)
+            return token
+    
+    def invalidate_token(self):
+        with self._token_lock:
+            self._token = None
+            self._token_expires_at = 0.0
+    
+    def _authorized_post(self, operation, path, payload):
+        """POST with the cached token; a 401 forces one refresh and retry"""
+        url = f"{self.base_url}{path}"
+        for attempt in range(2):
             headers = {
-                'Authorization': f'Basic {auth_base64}'
+                'Authorization': f'Bearer {self.get_access_token()}',
+                'Content-Type': 'application/json'
             }
-            
-            response = requests.get(url, headers=headers)
+            response = self._request(operation, "POST", url, json=payload, headers=headers)
+            if response.status_code == 401 and attempt == 0:
+                self.invalidate_token()
+                continue
             response.raise_for_status()
-            
-            result = response.json()
-            return result['access_token']
-            
-        except Exception as e:
-            print(f"❌ Error getting access token: {str(e)}")
-            raise
+            return response.json()
     
     def generate_password(self):
         """Generate password for STK Push"""
@@ -73,20 +189,9 @@ class MPesaClient:
             dict: Response from M-Pesa API
         """
         try:
-            # Get access token
-            access_token = self.get_access_token()
-            
             # Generate password and timestamp
             password, timestamp = self.generate_password()
             
-            # Prepare request
-            url = f"{self.base_url}/mpesa/stkpush/v1/processrequest"
-            
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-            
             payload = {
                 'BusinessShortCode': self.shortcode,
                 'Password': password,
@@ -101,16 +206,13 @@ class MPesaClient:
                 'TransactionDesc': transaction_desc
             }
             
-            response = requests.post(url, json=payload, headers=headers)
-            response.raise_for_status()
+            result = self._authorized_post("stk_push", "/mpesa/stkpush/v1/processrequest", payload)
             
-            result = response.json()
-            
-            print(f"✅ STK Push initiated: {result}")
+            logger.info("STK Push initiated: %s", result)
             return result
             
-        except Exception as e:
-            print(f"❌ Error initiating STK Push: {str(e)}")
+        except Exception:
+            logger.exception("Error initiating STK Push")
             raise
     
     def query_transaction(self, checkout_request_id):
@@ -124,19 +226,9 @@ class MPesaClient:
             dict: Transaction status
         """
         try:
-            # Get access token
-            access_token = self.get_access_token()
-            
             # Generate password and timestamp
             password, timestamp = self.generate_password()
             
-            url = f"{self.base_url}/mpesa/stkpushquery/v1/query"
-            
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-            
             payload = {
                 'BusinessShortCode': self.shortcode,
                 'Password': password,
@@ -144,17 +236,31 @@ class MPesaClient:
                 'CheckoutRequestID': checkout_request_id
             }
             
-            response = requests.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            
-            result = response.json()
-            return result
+            return self._authorized_post("stk_query", "/mpesa/stkpushquery/v1/query", payload)
             
-        except Exception as e:
-            print(f"❌ Error querying transaction: {str(e)}")
+        except Exception:
+            logger.exception("Error querying transaction")
             raise
 
 
+# ============================================================================
+# PROCESS-WIDE CLIENT
+# ============================================================================
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_mpesa_client():
+    """The shared MPesaClient for this process, created on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MPesaClient()
+    return _client
+
+
 # ============================================================================
 # M-PESA CALLBACK HANDLER
 # ============================================================================
@@ -216,8 +322,8 @@ def handle_mpesa_callback(callback_data):
         
         return response
         
-    except Exception as e:
-        print(f"❌ Error handling callback: {str(e)}")
+    except Exception:
+        logger.exception("Error handling callback")
         raise
 
 
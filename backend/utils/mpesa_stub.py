@@ -0,0 +1,119 @@
+# backend/utils/mpesa_stub.py
+"""
+Local Daraja stub server for development.
+
+Answers the three endpoints MPesaClient uses so payments can be exercised
+without Safaricom's sandbox:
+
+    GET  /oauth/v1/generate              -> {"access_token", "expires_in"}
+    POST /mpesa/stkpush/v1/processrequest -> ResponseCode "0" + CheckoutRequestID
+    POST /mpesa/stkpushquery/v1/query     -> ResultCode "0"
+
+Run it and point the backend at it:
+
+    python -m utils.mpesa_stub 8089
+    MPESA_BASE_URL=http://127.0.0.1:8089 python app.py
+
+STUB_LATENCY_SECONDS adds an artificial delay to every response, and the
+counters in DarajaStub.calls show how many OAuth round trips were made.
+Clearing DarajaStub.valid_tokens expires the tokens handed out so far;
+reject_tokens = True answers 401 to every authorized call. tests/ uses both.
+"""
+
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class DarajaStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, token_ttl=3599):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.calls = {"oauth": 0, "stk_push": 0, "stk_query": 0}
+        self.valid_tokens = set()
+        self.reject_tokens = False
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def start(self):
+        """Serve on a background thread; returns self"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so client pooling is observable
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        header = self.headers.get("Authorization", "")
+        return (not self.server.reject_tokens and header.startswith("Bearer ")
+                and header[7:] in self.server.valid_tokens)
+
+    def do_GET(self):
+        if self.path.startswith("/oauth/v1/generate"):
+            self.server.count("oauth")
+            token = uuid.uuid4().hex
+            self.server.valid_tokens.add(token)
+            return self._reply(200, {"access_token": token, "expires_in": str(self.server.token_ttl)})
+        self._reply(404, {"errorMessage": "Not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self._authorized():
+            return self._reply(401, {"errorMessage": "Invalid Access Token"})
+
+        if self.path == "/mpesa/stkpush/v1/processrequest":
+            self.server.count("stk_push")
+            return self._reply(200, {
+                "MerchantRequestID": uuid.uuid4().hex,
+                "CheckoutRequestID": f"ws_CO_{uuid.uuid4().hex}",
+                "ResponseCode": "0",
+                "ResponseDescription": "Success. Request accepted for processing",
+                "CustomerMessage": "Success. Request accepted for processing"
+            })
+
+        if self.path == "/mpesa/stkpushquery/v1/query":
+            self.server.count("stk_query")
+            return self._reply(200, {
+                "CheckoutRequestID": payload.get("CheckoutRequestID"),
+                "ResponseCode": "0",
+                "ResultCode": "0",
+                "ResultDesc": "The service request is processed successfully."
+            })
+
+        self._reply(404, {"errorMessage": "Not found"})
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8089
+    stub = DarajaStub(port=port)
+    print(f"Daraja stub listening on {stub.base_url}")
+    stub.serve_forever()
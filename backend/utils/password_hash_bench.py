@@ -0,0 +1,111 @@
+# backend/utils/password_hash_bench.py
+"""
+Login-burst benchmark for password hashing.
+
+Simulates a request worker pool (--threads) that receives a burst of logins
+(--logins password checks) mixed with ordinary API requests (--requests,
+~1ms of CPU each), once with bcrypt inline on the request threads and once
+through PasswordHasher's process pool, and prints login throughput plus the
+latency of the ordinary requests:
+
+    python -m utils.password_hash_bench --threads 16 --logins 64 --rounds 12
+
+No database or running server is needed.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.password_hasher import PasswordHasher
+
+PASSWORD = "correct horse battery staple"
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _api_request():
+    # Stand-in for a cheap endpoint: build and serialise a small response
+    payload = [{"id": i, "title": f"Property {i}", "price": i * 1000} for i in range(200)]
+    return len(json.dumps(payload))
+
+
+def run_scenario(hasher, hashed, threads, logins, requests):
+    login_latency = []
+    request_latency = []
+
+    def login():
+        started = time.perf_counter()
+        assert hasher.check_password(hashed, PASSWORD)
+        login_latency.append(time.perf_counter() - started)
+
+    def api_request():
+        started = time.perf_counter()
+        _api_request()
+        request_latency.append(time.perf_counter() - started)
+
+    # Interleave so ordinary requests arrive throughout the login burst
+    jobs = []
+    ratio = max(1, requests // max(1, logins))
+    for i in range(max(logins, requests)):
+        if i < logins:
+            jobs.append(login)
+        jobs.extend([api_request] * ratio if i * ratio < requests else [])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for future in [pool.submit(job) for job in jobs]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    ms = lambda seconds: round(seconds * 1000, 1)
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "logins_per_s": round(logins / elapsed, 1),
+        "login_p50_ms": ms(_percentile(login_latency, 50)),
+        "login_p95_ms": ms(_percentile(login_latency, 95)),
+        "request_p50_ms": ms(_percentile(request_latency, 50)),
+        "request_p95_ms": ms(_percentile(request_latency, 95)),
+        "request_p99_ms": ms(_percentile(request_latency, 99)),
+        "request_mean_ms": ms(statistics.mean(request_latency)) if request_latency else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--threads", type=int, default=16, help="request worker threads")
+    parser.add_argument("--logins", type=int, default=64, help="logins in the burst")
+    parser.add_argument("--requests", type=int, default=640, help="ordinary API requests")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=2, help="hashing pool processes")
+    args = parser.parse_args()
+
+    inline = PasswordHasher({"BCRYPT_LOG_ROUNDS": args.rounds, "PASSWORD_HASH_WORKERS": 0})
+    pooled = PasswordHasher({
+        "BCRYPT_LOG_ROUNDS": args.rounds,
+        "PASSWORD_HASH_WORKERS": args.workers,
+        "PASSWORD_HASH_MAX_PENDING": max(args.threads, args.logins),
+        "PASSWORD_HASH_QUEUE_TIMEOUT": 60
+    })
+    hashed = inline.hash_password(PASSWORD)
+    pooled.check_password(hashed, PASSWORD)  # start the worker processes
+
+    results = {
+        "config": vars(args),
+        "inline": run_scenario(inline, hashed, args.threads, args.logins, args.requests),
+        "pooled": run_scenario(pooled, hashed, args.threads, args.logins, args.requests),
+        "pool_metrics": pooled.metrics_snapshot()
+    }
+    pooled.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# backend/utils/password_hasher.py
+"""
+Password hashing off the request threads.
+
+bcrypt is deliberately slow (~250ms at cost 12), so hashing inline pins a
+request worker for the whole computation and a burst of logins starves the
+rest of the API. PasswordHasher runs every hash / check in a small process
+pool instead:
+
+  - at most PASSWORD_HASH_WORKERS hashes run at once, on their own cores
+  - at most PASSWORD_HASH_MAX_PENDING jobs may be running or queued; a
+    request that cannot get a slot within PASSWORD_HASH_QUEUE_TIMEOUT gets
+    PasswordHasherBusy (the routes answer 503) instead of piling up
+  - queue depth, rejections and per-operation latency are kept in
+    self.metrics (GET /auth/password-hashing/metrics)
+
+The cost factor comes from BCRYPT_LOG_ROUNDS; needs_rehash() tells login
+when a stored hash was made with a different cost.
+
+Setting PASSWORD_HASH_WORKERS=0 hashes inline (scripts, debugging).
+"""
+
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt as _bcrypt
+from flask import current_app
+
+# bcrypt only looks at the first 72 bytes of a password; older versions
+# truncated silently, so truncate here to keep existing hashes valid
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+_COST_PATTERN = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class PasswordHasherBusy(Exception):
+    """Every hashing slot is taken; the caller should retry later"""
+
+
+def _encode(password):
+    if isinstance(password, str):
+        password = password.encode("utf-8")
+    return password[:BCRYPT_MAX_PASSWORD_BYTES]
+
+
+# These two run inside the pool's worker processes
+def _hash(password, rounds):
+    return _bcrypt.hashpw(_encode(password), _bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _check(hashed, password):
+    try:
+        return _bcrypt.checkpw(_encode(password), hashed.encode("utf-8"))
+    except ValueError:
+        return False  # not a bcrypt hash
+
+
+def hash_cost(hashed):
+    """The cost factor a bcrypt hash was made with, or None"""
+    match = _COST_PATTERN.match(hashed or "")
+    return int(match.group(1)) if match else None
+
+
+class PasswordHasher:
+    """
+    Bounded process pool for bcrypt; one instance per process
+    (see get_password_hasher())
+    """
+
+    def __init__(self, config=None):
+        config = config if config is not None else current_app.config
+
+        self.rounds = int(config.get("BCRYPT_LOG_ROUNDS", 12))
+        self.workers = int(config.get("PASSWORD_HASH_WORKERS", 2))
+        self.max_pending = int(config.get("PASSWORD_HASH_MAX_PENDING", 64))
+        self.queue_timeout = float(config.get("PASSWORD_HASH_QUEUE_TIMEOUT", 5))
+
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+
+        self.metrics = {
+            "in_flight": 0,
+            "peak_in_flight": 0,
+            "rejected": 0,
+            "pool_restarts": 0,
+            "operations": {}
+        }
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the web process has live Mongo clients
+                # and scheduler threads that must not be copied
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _record(self, operation, elapsed):
+        with self._lock:
+            stats = self.metrics["operations"].setdefault(
+                operation, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed * 1000
+            stats["max_ms"] = max(stats["max_ms"], elapsed * 1000)
+
+    def _run(self, operation, fn, *args):
+        started = time.monotonic()
+
+        if self.workers <= 0:
+            result = fn(*args)
+            self._record(operation, time.monotonic() - started)
+            return result
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.metrics["rejected"] += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+
+        with self._lock:
+            self.metrics["in_flight"] += 1
+            self.metrics["peak_in_flight"] = max(
+                self.metrics["peak_in_flight"], self.metrics["in_flight"]
+            )
+        try:
+            executor = self._pool()
+            try:
+                return executor.submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed); start a fresh pool next time
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+                        self.metrics["pool_restarts"] += 1
+                raise
+        finally:
+            with self._lock:
+                self.metrics["in_flight"] -= 1
+            self._slots.release()
+            self._record(operation, time.monotonic() - started)
+
+    def hash_password(self, password):
+        """bcrypt hash (str) of *password* at the configured cost"""
+        return self._run("hash", _hash, password, self.rounds)
+
+    def check_password(self, hashed, password):
+        if not hashed or password is None:
+            return False
+        return self._run("check", _check, hashed, password)
+
+    def needs_rehash(self, hashed):
+        return hash_cost(hashed) != self.rounds
+
+    def metrics_snapshot(self):
+        with self._lock:
+            in_flight = self.metrics["in_flight"]
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "max_pending": self.max_pending,
+                "in_flight": in_flight,
+                "queued": max(0, in_flight - self.workers),
+                "peak_in_flight": self.metrics["peak_in_flight"],
+                "rejected": self.metrics["rejected"],
+                "pool_restarts": self.metrics["pool_restarts"],
+                "operations": {
+                    name: {
+                        "calls": s["calls"],
+                        "avg_ms": round(s["total_ms"] / s["calls"], 2) if s["calls"] else 0,
+                        "max_ms": round(s["max_ms"], 2)
+                    }
+                    for name, s in self.metrics["operations"].items()
+                }
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_password_hasher():
+    """The shared PasswordHasher for this process, created on first use"""
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                _hasher = PasswordHasher()
+    return _hasher
+
+
+def shutdown_password_hasher():
+    """Drain and stop this process's hashing pool, if one was started"""
+    if _hasher is not None:
+        _hasher.shutdown()
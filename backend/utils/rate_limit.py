@@ -0,0 +1,261 @@
+# backend/utils/rate_limit.py
+"""
+Rate limiting for expensive endpoints.
+
+Usage — list the policy under the route decorator:
+
+    @property_bp.route("/search", methods=["POST"])
+    @rate_limited("search")
+    def search_properties(): ...
+
+A policy is one or more rules, each "at most <limit> requests per <window>
+seconds per <identity>". Identities:
+
+    ip      client address (X-Forwarded-For hop when RATE_LIMIT_PROXY_HOPS > 0)
+    user    JWT identity when a valid token is sent, else the client address
+    email   "email" field of the JSON body (login / password reset)
+    global  one key for the whole deployment (an upstream quota)
+
+Every rule is checked in two layers:
+
+  1. an in-process token bucket (capacity <limit>, refilled at
+     limit/window per second) — a client hammering one worker is refused
+     without touching the database, and once the shared counter has said
+     "no" the key stays blocked locally until Retry-After has passed
+  2. a sliding-window counter shared by all workers in `rate_limit_counters`
+     (one document per rule/key/fixed window, TTL-expired). The estimate is
+     previous_window * (1 - elapsed_fraction) + current_window, so a burst
+     across a window boundary cannot double the limit.
+
+Refused requests get 429 with a Retry-After header. If the database cannot
+be reached the request is allowed (and counted in store_errors) — the local
+bucket still applies. Per-policy counters and the time spent in the limiter
+are available from metrics_snapshot() (GET /admin/rate-limits/metrics).
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from pymongo import ReturnDocument
+from extensions import mongo
+
+logger = logging.getLogger(__name__)
+
+
+# ──────────────────────────────────────────────────────────
+# POLICIES  — (identity, limit, window_seconds)
+# ──────────────────────────────────────────────────────────
+RATE_LIMIT_POLICIES = {
+    "search":          [("user", 60, 60)],
+    "nearby":          [("user", 60, 60)],
+    # Nominatim allows ~1 request/s for the whole deployment; the per-user
+    # rule keeps one client from using all of it
+    "geocode":         [("user", 20, 60), ("global", 60, 60)],
+    "login":           [("ip", 30, 300), ("email", 10, 300)],
+    "forgot_password": [("ip", 10, 3600), ("email", 3, 3600)],
+}
+
+MAX_LOCAL_KEYS = 10000    # token buckets kept per process (least recently used dropped)
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "blocked_until", "previous_window", "previous_count")
+
+    def __init__(self, capacity, now):
+        self.tokens = float(capacity)
+        self.updated = now
+        self.blocked_until = 0.0
+        self.previous_window = None
+        self.previous_count = 0
+
+
+class RateLimiter:
+    """Token buckets for this process plus the shared sliding-window store"""
+
+    def __init__(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {}
+
+    # ── metrics ────────────────────────────────────────────
+    def _record(self, policy, outcome, elapsed):
+        with self._lock:
+            stats = self.metrics.setdefault(policy, {
+                "allowed": 0, "rejected_local": 0, "rejected_shared": 0,
+                "store_errors": 0, "overhead_total_ms": 0.0, "overhead_max_ms": 0.0
+            })
+            stats[outcome] += 1
+            stats["overhead_total_ms"] += elapsed * 1000
+            stats["overhead_max_ms"] = max(stats["overhead_max_ms"], elapsed * 1000)
+
+    def metrics_snapshot(self):
+        with self._lock:
+            snapshot = {}
+            for policy, stats in self.metrics.items():
+                checks = stats["allowed"] + stats["rejected_local"] + stats["rejected_shared"]
+                snapshot[policy] = {
+                    "allowed": stats["allowed"],
+                    "rejected_local": stats["rejected_local"],
+                    "rejected_shared": stats["rejected_shared"],
+                    "store_errors": stats["store_errors"],
+                    "overhead_avg_ms": round(stats["overhead_total_ms"] / checks, 3) if checks else 0,
+                    "overhead_max_ms": round(stats["overhead_max_ms"], 3)
+                }
+            return {"policies": snapshot, "local_keys": len(self._buckets)}
+
+    # ── local layer ────────────────────────────────────────
+    def _bucket(self, bucket_key, limit, window, now):
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            bucket = _Bucket(limit, now)
+            self._buckets[bucket_key] = bucket
+            if len(self._buckets) > MAX_LOCAL_KEYS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(bucket_key)
+            bucket.tokens = min(limit, bucket.tokens + (now - bucket.updated) * limit / window)
+            bucket.updated = now
+        return bucket
+
+    # ── shared layer ───────────────────────────────────────
+    def _shared_estimate(self, bucket, bucket_key, window, now):
+        """Count this hit in the shared window; returns (estimate, elapsed fraction, current count)"""
+        window_index = int(now // window)
+        window_end = datetime.utcfromtimestamp((window_index + 1) * window)
+        current = mongo.db.rate_limit_counters.find_one_and_update(
+            {"_id": f"{bucket_key}|{window_index}"},
+            {"$inc": {"count": 1},
+             "$setOnInsert": {"expires_at": window_end + timedelta(seconds=window)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )["count"]
+
+        # The previous window is closed, so its count is read once and cached
+        if bucket.previous_window != window_index - 1:
+            previous = mongo.db.rate_limit_counters.find_one(
+                {"_id": f"{bucket_key}|{window_index - 1}"}, {"count": 1}
+            )
+            bucket.previous_window = window_index - 1
+            bucket.previous_count = previous["count"] if previous else 0
+
+        fraction = (now % window) / window
+        return bucket.previous_count * (1 - fraction) + current, fraction, current
+
+    @staticmethod
+    def _retry_after(previous, current, limit, window, fraction):
+        """Seconds until the sliding estimate drops back under *limit*"""
+        remaining = (1 - fraction) * window
+        if current < limit and previous:
+            # The previous window's share decays enough within this window
+            wait = window * (previous * (1 - fraction) + current - limit + 1) / previous
+            if wait <= remaining:
+                return max(1, math.ceil(wait))
+        # Otherwise wait for the next window, where this one's count decays
+        return max(1, math.ceil(remaining + window * max(0.0, 1 - (limit - 1) / max(current, 1))))
+
+    # ── check ──────────────────────────────────────────────
+    def check(self, policy, rules):
+        """
+        Returns None if the request may proceed, else the Retry-After seconds.
+        *rules* is a list of (rule_key, limit, window).
+        """
+        started = time.perf_counter()
+        now = time.time()
+        outcome = "allowed"
+        retry_after = None
+
+        for rule_key, limit, window in rules:
+            with self._lock:
+                bucket = self._bucket(rule_key, limit, window, now)
+                if bucket.blocked_until > now or bucket.tokens < 1:
+                    wait = bucket.blocked_until - now if bucket.blocked_until > now \
+                        else (1 - bucket.tokens) * window / limit
+                    outcome, retry_after = "rejected_local", max(1, math.ceil(wait))
+                    break
+                bucket.tokens -= 1
+
+            try:
+                estimate, fraction, current = self._shared_estimate(bucket, rule_key, window, now)
+            except Exception as e:
+                logger.warning("Shared counter unavailable: %s", e)
+                self._record(policy, "store_errors", 0)
+                continue
+
+            if estimate > limit:
+                retry_after = self._retry_after(bucket.previous_count, current, limit, window, fraction)
+                with self._lock:
+                    bucket.blocked_until = now + retry_after
+                outcome = "rejected_shared"
+                break
+
+        self._record(policy, outcome, time.perf_counter() - started)
+        return retry_after
+
+
+_limiter = RateLimiter()
+
+
+def get_rate_limiter():
+    return _limiter
+
+
+def _client_ip():
+    hops = current_app.config.get("RATE_LIMIT_PROXY_HOPS", 0)
+    if hops:
+        forwarded = [h.strip() for h in request.headers.get("X-Forwarded-For", "").split(",") if h.strip()]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.remote_addr or "unknown"
+
+
+def _identity(kind):
+    if kind == "global":
+        return "global"
+    if kind == "email":
+        email = ((request.get_json(silent=True) or {}).get("email") or "").strip().lower()
+        return f"email:{email}" if email else None
+    if kind == "user":
+        try:
+            verify_jwt_in_request(optional=True)
+            user_id = get_jwt_identity()
+        except Exception:
+            user_id = None
+        if user_id:
+            return f"user:{user_id}"
+    return f"ip:{_client_ip()}"
+
+
+def rate_limited(policy):
+    """Apply RATE_LIMIT_POLICIES[policy] to a route"""
+    rules = RATE_LIMIT_POLICIES[policy]
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get("RATE_LIMIT_ENABLED", True):
+                return fn(*args, **kwargs)
+
+            keyed_rules = []
+            for kind, limit, window in rules:
+                identity = _identity(kind)
+                if identity:
+                    keyed_rules.append((f"{policy}|{kind}|{identity}", limit, window))
+
+            retry_after = _limiter.check(policy, keyed_rules)
+            if retry_after is not None:
+                response = jsonify({
+                    "error": "Too many requests. Please try again later.",
+                    "retry_after": retry_after
+                })
+                response.headers["Retry-After"] = str(retry_after)
+                return response, 429
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,169 @@
+# backend/utils/replica_set.py
+"""
+Local three-member MongoDB replica set for trying read routing
+(utils/mongo_routing.py) on one machine. Needs `mongod` on the PATH.
+
+    python -m utils.replica_set start            # ports 27017-27019, data in /tmp
+    export MONGO_URI="mongodb://127.0.0.1:27017,127.0.0.1:27018,127.0.0.1:27019/house_hunting?replicaSet=rs0"
+    python -m utils.replica_set check            # where primary and reporting reads go
+    python -m utils.replica_set stop
+
+start launches the members in the background, initiates the set (the member
+on --port has the highest priority, so it is elected primary) and waits for
+the election; running it again with the set up is a no-op. check builds the
+app against MONGO_URI, writes a document, reads it back through the primary
+client and the reporting client, and exits with status 1 if the reporting
+read did not go to a secondary. stop shuts the members down; their data stays
+in --dir.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure, PyMongoError
+
+REPLICA_SET = "rs0"
+MEMBERS = 3
+DEFAULT_DIR = "/tmp/house_hunting_rs"
+STARTUP_TIMEOUT_SECONDS = 60
+
+
+def _uri(port, database="house_hunting"):
+    hosts = ",".join(f"127.0.0.1:{port + i}" for i in range(MEMBERS))
+    return f"mongodb://{hosts}/{database}?replicaSet={REPLICA_SET}"
+
+
+def _direct(port):
+    return MongoClient("127.0.0.1", port, directConnection=True, serverSelectionTimeoutMS=1000)
+
+
+def _ping(port):
+    with _direct(port) as client:
+        return client.admin.command("ping")
+
+
+def _wait(predicate, what):
+    deadline = time.monotonic() + STARTUP_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            if predicate():
+                return
+        except PyMongoError:
+            pass
+        time.sleep(0.5)
+    sys.exit(f"Timed out waiting for {what}")
+
+
+def start(data_dir, port):
+    pid_file = os.path.join(data_dir, "pids.json")
+    if os.path.exists(pid_file):
+        print(f"Already running (see {pid_file}); stop it first")
+        return
+    pids = []
+    for i in range(MEMBERS):
+        member_dir = os.path.join(data_dir, f"member{i}")
+        os.makedirs(member_dir, exist_ok=True)
+        process = subprocess.Popen(
+            ["mongod", "--replSet", REPLICA_SET, "--port", str(port + i), "--bind_ip", "127.0.0.1",
+             "--dbpath", member_dir, "--logpath", os.path.join(member_dir, "mongod.log")],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        pids.append(process.pid)
+    with open(pid_file, "w") as f:
+        json.dump(pids, f)
+
+    for i in range(MEMBERS):
+        _wait(lambda: _ping(port + i), f"mongod on port {port + i}")
+
+    client = _direct(port)
+    try:
+        client.admin.command("replSetInitiate", {
+            "_id": REPLICA_SET,
+            "members": [
+                {"_id": i, "host": f"127.0.0.1:{port + i}", "priority": 2 if i == 0 else 1}
+                for i in range(MEMBERS)
+            ],
+        })
+    except OperationFailure as e:
+        if e.code != 23:        # AlreadyInitialized: restarted on existing data
+            raise
+    _wait(lambda: client.admin.command("hello").get("isWritablePrimary"), "a primary")
+    print(f"Replica set {REPLICA_SET} is up:\n  MONGO_URI={_uri(port)}")
+
+
+def stop(data_dir):
+    pid_file = os.path.join(data_dir, "pids.json")
+    if not os.path.exists(pid_file):
+        print("Not running")
+        return
+    with open(pid_file) as f:
+        pids = json.load(f)
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    os.remove(pid_file)
+    print(f"Stopped {len(pids)} members (data kept in {data_dir})")
+
+
+def check():
+    from flask import g
+    from app import create_app
+    from extensions import mongo
+    from utils.mongo_routing import REPORTING
+
+    app = create_app(start_background_jobs=False)
+    with app.test_request_context("/replica-set-check"):
+        collection = "replica_set_check"
+        mongo.db[collection].insert_one({"checked_at": time.time()})
+        primary_read = mongo.db[collection].find().limit(1)
+        primary_read.next()
+
+        g.mongo_workload = REPORTING
+        if mongo.db.client is mongo.cx:
+            sys.exit("Read routing is disabled (MONGO_READ_ROUTING_ENABLED=false)")
+        # A secondary may not have replicated the insert yet; any document will do
+        reporting_read = mongo.db[collection].find().limit(1)
+        list(reporting_read)
+
+        status = mongo.cx.admin.command("replSetGetStatus")
+        optimes = {m["name"]: m["optimeDate"] for m in status["members"] if "optimeDate" in m}
+        primary_optime = max(optimes.values())
+        for name, optime in sorted(optimes.items()):
+            print(f"  {name}  lag {(primary_optime - optime).total_seconds():.0f}s")
+
+        primary = "%s:%s" % primary_read.address
+        reporting = "%s:%s" % reporting_read.address
+        print(f"primary client read from   {primary}")
+        print(f"reporting client read from {reporting} "
+              f"({app.config['MONGO_REPORTING_READ_PREFERENCE']}, "
+              f"max staleness {app.config['MONGO_REPORTING_MAX_STALENESS_SECONDS']}s)")
+        mongo.cx[mongo.db.name][collection].drop()
+    if reporting == primary:
+        sys.exit("Reporting read went to the primary")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local MongoDB replica set for read routing")
+    parser.add_argument("action", choices=["start", "stop", "check"])
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="data and pid file directory")
+    parser.add_argument("--port", type=int, default=27017, help="first member's port")
+    args = parser.parse_args()
+
+    if args.action == "start":
+        start(args.dir, args.port)
+    elif args.action == "stop":
+        stop(args.dir)
+    else:
+        check()
+
+
+if __name__ == "__main__":
+    main()
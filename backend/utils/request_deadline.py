@@ -0,0 +1,158 @@
+# backend/utils/request_deadline.py
+"""
+Per-request time budgets for MongoDB work.
+
+Usage — name the route's budget under the route decorator (after
+@rate_limited / @jwt_required, so those run first):
+
+    @property_bp.route("/search", methods=["POST"])
+    @rate_limited("search")
+    @deadline("search")
+    def search_properties(): ...
+
+The budget counts from the start of the request. The view runs inside
+pymongo.timeout() (client side operation timeout): every MongoDB operation
+it makes, directly or through a service, is sent with maxTimeMS set to the
+time left, so the server gives up on a pathological query - an unanchored
+search_text regex, a 365-day analytics range - once the request can no
+longer use its answer. After the budget is spent further operations fail
+without being sent.
+
+When the budget runs out the request gets
+
+    503 {"error": "...", "deadline_ms": 2000}
+
+whether the view let the timeout propagate or turned it into a 5xx in its
+own `except Exception` block. A view that can do without part of its data
+wraps that part in best_effort(fn, default): it returns `default` instead
+of failing, and the view reports "partial": is_partial() in its payload.
+
+Only time the database spent on the request counts as a hit: a command
+stopped by maxTimeMS (ExecutionTimeout) or a reply that did not arrive on an
+open connection before the budget ended. When the database cannot be reached
+at all - server selection timeout, refused or dropped connections, a full
+pool - the error propagates (or the view's own 5xx stands) as an outage, not
+as a 503 "took too long".
+
+Hits are counted per endpoint, budget and outcome ("503" / "partial") in
+request_deadline_exceeded_total on /metrics. REQUEST_DEADLINES_ENABLED=false
+runs routes without budgets.
+"""
+
+import time
+from functools import wraps
+
+import pymongo
+from flask import current_app, g, jsonify, request
+from pymongo.errors import ConnectionFailure, ExecutionTimeout, NetworkTimeout, PyMongoError
+
+from extensions import mongo
+from utils.request_metrics import metrics
+
+# ──────────────────────────────────────────────────────────
+# BUDGETS  — seconds from the start of the request
+# ──────────────────────────────────────────────────────────
+REQUEST_BUDGETS = {
+    "browse":    2.0,     # property list, detail, filter options
+    "search":    2.0,
+    "nearby":    3.0,     # geo query plus distance sort in Python
+    "dashboard": 5.0,     # landlord / admin dashboard statistics
+    "analytics": 10.0,
+    "report":    15.0,    # financial reports (exports stream without a budget)
+}
+
+
+def _endpoint_label():
+    return request.url_rule.rule if request.url_rule is not None else request.path
+
+
+def _ran_out(error, expires_at):
+    """
+    Whether `error` means the request's budget was used up by the database.
+    Connection failures - server selection timeouts included, however late
+    they come - are outages and propagate like any other error.
+    """
+    if isinstance(error, ExecutionTimeout):
+        return True
+    if isinstance(error, ConnectionFailure):
+        # mongo_socket_timeout: the NetworkTimeout came from a sent command,
+        # not from opening a connection (set by utils/request_metrics.py)
+        return (isinstance(error, NetworkTimeout) and error.timeout
+                and g.get("mongo_socket_timeout", False))
+    return g.get("mongo_max_time_expired", False)
+
+
+def _database_reachable():
+    """Whether the driver knows a server that can serve this request's reads"""
+    db = mongo.db
+    return db.client.topology_description.has_readable_server(db.read_preference)
+
+
+def _deadline_response(budget_seconds):
+    return jsonify({
+        "error": "The request took too long to complete. Try narrowing it down.",
+        "deadline_ms": int(budget_seconds * 1000)
+    }), 503
+
+
+def deadline(budget):
+    """Run the route within REQUEST_BUDGETS[budget] seconds of MongoDB time"""
+    budget_seconds = REQUEST_BUDGETS[budget]
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get("REQUEST_DEADLINES_ENABLED", True):
+                return fn(*args, **kwargs)
+
+            # request_started is set by utils/request_metrics.py
+            started = g.get("request_started") or time.perf_counter()
+            expires_at = started + budget_seconds
+            g.deadline_expires_at = expires_at
+            remaining = expires_at - time.perf_counter()
+            if remaining <= 0:
+                metrics.observe_deadline(_endpoint_label(), budget, "503")
+                return _deadline_response(budget_seconds)
+
+            try:
+                with pymongo.timeout(remaining):
+                    rv = fn(*args, **kwargs)
+            except PyMongoError as e:
+                if not _ran_out(e, expires_at):
+                    raise
+                metrics.observe_deadline(_endpoint_label(), budget, "503")
+                return _deadline_response(budget_seconds)
+
+            response = current_app.make_response(rv)
+            # mongo_max_time_expired / mongo_socket_timeout: a command failed
+            # with MaxTimeMSExpired or got no reply in time (set by the
+            # command listener in utils/request_metrics.py). Past the budget
+            # with no server to talk to is an outage, and keeps its 5xx.
+            expired = (g.get("mongo_max_time_expired") or g.get("mongo_socket_timeout")
+                       or (time.perf_counter() >= expires_at and _database_reachable()))
+            if response.status_code >= 500 and expired:
+                # The view caught the timeout itself and answered 500
+                metrics.observe_deadline(_endpoint_label(), budget, "503")
+                return _deadline_response(budget_seconds)
+            if g.get("deadline_partial"):
+                metrics.observe_deadline(_endpoint_label(), budget, "partial")
+            return response
+        return wrapper
+    return decorator
+
+
+def best_effort(fn, default):
+    """fn(), or `default` if the request's budget runs out while it runs"""
+    try:
+        return fn()
+    except PyMongoError as e:
+        if not _ran_out(e, g.get("deadline_expires_at", float("inf"))):
+            raise
+        g.deadline_partial = True
+        return default
+
+
+def is_partial():
+    """True when a best_effort() call in this request fell back to its default"""
+    return g.get("deadline_partial", False)
+
@@ -0,0 +1,414 @@
+# backend/utils/request_metrics.py
+"""
+Per-request performance instrumentation.
+
+init_request_metrics(app) installs request hooks that record, per endpoint
+(method + URL rule, e.g. "GET /properties/<property_id>"):
+
+  - a latency histogram and status-code counts
+  - a histogram of MongoDB commands per request, so N+1 query patterns
+    show up as endpoints whose command count grows with the page size
+  - the number of requests currently in flight
+
+MongoCommandListener — passed to the MongoClient in create_app — adds every
+command's duration to the request that issued it (Flask `g`) and to
+per-command totals.
+
+Every response carries a Server-Timing header (visible in browser devtools):
+
+    Server-Timing: app;dur=41.7, db;dur=12.3;desc="7 mongo commands"
+
+Requests that run out of their time budget (utils/request_deadline.py) are
+counted per endpoint, budget and outcome.
+
+GET /metrics exports everything in the Prometheus text format. Metrics are
+kept per process. With METRICS_MULTIPROC_DIR set (gunicorn.conf.py does),
+every worker writes its numbers to <dir>/worker_<pid>.json at most every
+METRICS_WRITE_INTERVAL_SECONDS, and /metrics - whichever worker answers it -
+reports the sum over all files. The master folds an exited worker's file into
+exited.json, so counters survive worker recycling. Without it each process
+reports its own numbers with a `pid` label.
+
+/metrics requires "Authorization: Bearer <METRICS_AUTH_TOKEN>"; with no token
+configured it is only served in DEBUG.
+"""
+
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import Response, current_app, g, has_request_context, request
+from pymongo import monitoring
+
+from utils.logging_setup import dropped_records
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Server error code for a command that ran past its maxTimeMS
+MAX_TIME_MS_EXPIRED = 50
+
+# Upper bounds of the MongoDB-commands-per-request histogram buckets
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        """Prometheus exposition lines (cumulative buckets)"""
+        out = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        out.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        out.append(f"{name}_sum{{{labels}}} {round(self.total, 6)}")
+        out.append(f"{name}_count{{{labels}}} {self.count}")
+        return out
+
+    def state(self):
+        return {"counts": list(self.counts), "total": self.total, "count": self.count}
+
+    def add_state(self, state):
+        for i, count in enumerate(state["counts"]):
+            self.counts[i] += count
+        self.total += state["total"]
+        self.count += state["count"]
+
+
+class RequestMetrics:
+    """In-process metric store shared by the request hooks and the listener"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.latency = {}          # (method, endpoint) -> _Histogram (seconds)
+        self.db_commands = {}      # (method, endpoint) -> _Histogram (commands)
+        self.statuses = {}         # (method, endpoint, status) -> count
+        self.mongo = {}            # command_name -> [count, failures, seconds]
+        self.deadlines = {}        # (endpoint, budget, outcome) -> count
+        self.log_records_dropped = None    # None: this process's own count
+
+    @classmethod
+    def from_snapshots(cls, snapshots):
+        """Sum of several processes' snapshot() dicts"""
+        combined = cls()
+        combined.log_records_dropped = 0
+        for snapshot in snapshots:
+            combined.add_snapshot(snapshot)
+        return combined
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def observe_request(self, method, endpoint, status, seconds, commands):
+        key = (method, endpoint)
+        with self._lock:
+            self.latency.setdefault(key, _Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.db_commands.setdefault(key, _Histogram(COMMAND_COUNT_BUCKETS)).observe(commands)
+            status_key = (method, endpoint, status)
+            self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+
+    def observe_deadline(self, endpoint, budget, outcome):
+        """A request ran out of its time budget (utils/request_deadline.py)"""
+        key = (endpoint.replace('"', ""), budget, outcome)
+        with self._lock:
+            self.deadlines[key] = self.deadlines.get(key, 0) + 1
+
+    def observe_command(self, command_name, seconds, failed=False):
+        with self._lock:
+            stats = self.mongo.setdefault(command_name, [0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += 1 if failed else 0
+            stats[2] += seconds
+
+    def snapshot(self):
+        """The counters as a JSON-serialisable dict"""
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "latency": [[*key, hist.state()] for key, hist in self.latency.items()],
+                "db_commands": [[*key, hist.state()] for key, hist in self.db_commands.items()],
+                "statuses": [[*key, count] for key, count in self.statuses.items()],
+                "mongo": [[name, *stats] for name, stats in self.mongo.items()],
+                "deadlines": [[*key, count] for key, count in self.deadlines.items()],
+                "log_records_dropped": self._log_records_dropped(),
+            }
+
+    def _log_records_dropped(self):
+        if self.log_records_dropped is None:
+            return dropped_records()
+        return self.log_records_dropped
+
+    def add_snapshot(self, snapshot):
+        with self._lock:
+            self.in_flight += snapshot["in_flight"]
+            for method, endpoint, state in snapshot["latency"]:
+                self.latency.setdefault((method, endpoint), _Histogram(LATENCY_BUCKETS)).add_state(state)
+            for method, endpoint, state in snapshot["db_commands"]:
+                self.db_commands.setdefault(
+                    (method, endpoint), _Histogram(COMMAND_COUNT_BUCKETS)).add_state(state)
+            for method, endpoint, status, count in snapshot["statuses"]:
+                key = (method, endpoint, status)
+                self.statuses[key] = self.statuses.get(key, 0) + count
+            for name, count, failures, seconds in snapshot["mongo"]:
+                stats = self.mongo.setdefault(name, [0, 0, 0.0])
+                stats[0] += count
+                stats[1] += failures
+                stats[2] += seconds
+            for endpoint, budget, outcome, count in snapshot["deadlines"]:
+                key = (endpoint, budget, outcome)
+                self.deadlines[key] = self.deadlines.get(key, 0) + count
+            self.log_records_dropped = (self.log_records_dropped or 0) + snapshot["log_records_dropped"]
+
+    def prometheus(self, pid=None):
+        """Text exposition; `pid` labels every sample with the process it came from"""
+        base = f'pid="{pid}",' if pid is not None else ""
+        own = f'{{pid="{pid}"}}' if pid is not None else ""
+        out = [
+            "# HELP http_requests_in_flight Requests currently being served.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        with self._lock:
+            out.append(f"http_requests_in_flight{own} {self.in_flight}")
+
+            out += ["# HELP http_request_duration_seconds Request latency by endpoint.",
+                    "# TYPE http_request_duration_seconds histogram"]
+            for (method, endpoint), hist in sorted(self.latency.items()):
+                out += hist.lines("http_request_duration_seconds",
+                                  f'{base}method="{method}",endpoint="{endpoint}"')
+
+            out += ["# HELP http_requests_total Responses by endpoint and status code.",
+                    "# TYPE http_requests_total counter"]
+            for (method, endpoint, status), count in sorted(self.statuses.items()):
+                out.append(f'http_requests_total{{{base}method="{method}",'
+                           f'endpoint="{endpoint}",status="{status}"}} {count}')
+
+            out += ["# HELP http_request_mongo_commands MongoDB commands issued per request.",
+                    "# TYPE http_request_mongo_commands histogram"]
+            for (method, endpoint), hist in sorted(self.db_commands.items()):
+                out += hist.lines("http_request_mongo_commands",
+                                  f'{base}method="{method}",endpoint="{endpoint}"')
+
+            out += ["# HELP mongo_commands_total MongoDB commands by name.",
+                    "# TYPE mongo_commands_total counter"]
+            for name, (count, _, _) in sorted(self.mongo.items()):
+                out.append(f'mongo_commands_total{{{base}command="{name}"}} {count}')
+            out += ["# HELP mongo_command_failures_total Failed MongoDB commands by name.",
+                    "# TYPE mongo_command_failures_total counter"]
+            for name, (_, failures, _) in sorted(self.mongo.items()):
+                out.append(f'mongo_command_failures_total{{{base}command="{name}"}} {failures}')
+            out += ["# HELP mongo_command_seconds_total Time spent in MongoDB commands by name.",
+                    "# TYPE mongo_command_seconds_total counter"]
+            for name, (_, _, seconds) in sorted(self.mongo.items()):
+                out.append(f'mongo_command_seconds_total{{{base}command="{name}"}} {round(seconds, 6)}')
+
+            out += ["# HELP request_deadline_exceeded_total Requests that ran out of their time budget, "
+                    "answered with 503 or a partial response.",
+                    "# TYPE request_deadline_exceeded_total counter"]
+            for (endpoint, budget, outcome), count in sorted(self.deadlines.items()):
+                out.append(f'request_deadline_exceeded_total{{{base}endpoint="{endpoint}",'
+                           f'budget="{budget}",outcome="{outcome}"}} {count}')
+
+        out += ["# HELP log_records_dropped_total Log records dropped because the log queue was full.",
+                "# TYPE log_records_dropped_total counter",
+                f"log_records_dropped_total{own} {self._log_records_dropped()}"]
+        return "\n".join(out) + "\n"
+
+
+metrics = RequestMetrics()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Attributes MongoDB command time to the current request"""
+
+    def started(self, event):
+        pass
+
+    def _record(self, event, failed):
+        seconds = event.duration_micros / 1e6
+        metrics.observe_command(event.command_name, seconds, failed)
+        if has_request_context():
+            g.mongo_commands = g.get("mongo_commands", 0) + 1
+            g.mongo_seconds = g.get("mongo_seconds", 0.0) + seconds
+            if failed and event.failure.get("code") == MAX_TIME_MS_EXPIRED:
+                g.mongo_max_time_expired = True
+            # A command sent on an open connection got no reply in time
+            # (connect and server selection failures publish no event)
+            if failed and event.failure.get("errtype") == "NetworkTimeout":
+                g.mongo_socket_timeout = True
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+
+mongo_command_listener = MongoCommandListener()
+
+
+# ──────────────────────────────────────────────────────────
+# SHARED METRICS DIRECTORY  — one file per gunicorn worker
+# ──────────────────────────────────────────────────────────
+EXITED_FILE = "exited.json"
+
+_last_write = {"pid": None, "at": 0.0}
+
+
+def _worker_file(directory, pid):
+    return os.path.join(directory, f"worker_{pid}.json")
+
+
+def _write_json(path, data):
+    # Write then rename, so a reader never sees half a file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def write_snapshot(directory, force=False):
+    """Write this process's metrics to *directory* when the interval has passed"""
+    interval = current_app.config.get("METRICS_WRITE_INTERVAL_SECONDS", 5)
+    pid = os.getpid()
+    now = time.monotonic()
+    if not force and _last_write["pid"] == pid and now - _last_write["at"] < interval:
+        return
+    _last_write.update(pid=pid, at=now)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        _write_json(_worker_file(directory, pid), metrics.snapshot())
+    except OSError as e:
+        logger.warning("Could not write metrics to %s: %s", directory, e)
+
+
+def read_snapshots(directory):
+    snapshots = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue        # removed by mark_process_dead meanwhile
+    return snapshots
+
+
+def mark_process_dead(directory, pid):
+    """
+    Fold an exited worker's counters into exited.json, with nothing in
+    flight. Called in the gunicorn master (child_exit), one worker at a time.
+    """
+    path = _worker_file(directory, pid)
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+    snapshot["in_flight"] = 0
+    snapshots = [snapshot]
+    exited_path = os.path.join(directory, EXITED_FILE)
+    if os.path.exists(exited_path):
+        with open(exited_path) as f:
+            snapshots.append(json.load(f))
+    _write_json(exited_path, RequestMetrics.from_snapshots(snapshots).snapshot())
+    os.remove(path)
+
+
+def reset_metrics_dir(directory):
+    """Start from zero: remove the files of a previous run (gunicorn on_starting)"""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith((".json", ".tmp")):
+            os.remove(os.path.join(directory, name))
+
+
+def flush_metrics(app):
+    """Write this worker's final numbers (called from gunicorn's worker_exit)"""
+    directory = app.config.get("METRICS_MULTIPROC_DIR")
+    if directory:
+        with app.app_context():
+            write_snapshot(directory, force=True)
+
+
+def _endpoint_label():
+    rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    return rule.replace('"', "")
+
+
+def init_request_metrics(app):
+    """Install the request hooks and the /metrics endpoint on *app*"""
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+        g.mongo_commands = 0
+        g.mongo_seconds = 0.0
+        metrics.request_started()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.get("request_started")
+        if started is None:  # answered by an earlier before_request hook
+            return response
+        elapsed = time.perf_counter() - started
+        commands = g.get("mongo_commands", 0)
+        db_seconds = g.get("mongo_seconds", 0.0)
+        metrics.observe_request(request.method, _endpoint_label(), response.status_code,
+                                elapsed, commands)
+        response.headers["Server-Timing"] = (
+            f"app;dur={elapsed * 1000:.1f}, "
+            f'db;dur={db_seconds * 1000:.1f};desc="{commands} mongo commands"'
+        )
+        return response
+
+    @app.teardown_request
+    def _finish_request(exc):
+        if g.get("request_started") is not None:
+            metrics.request_finished()
+            directory = current_app.config.get("METRICS_MULTIPROC_DIR")
+            if directory:
+                write_snapshot(directory)
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        token = current_app.config.get("METRICS_AUTH_TOKEN")
+        if not token and not current_app.debug:
+            return {"error": "Metrics are disabled: METRICS_AUTH_TOKEN is not set"}, 403
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return {"error": "Unauthorized"}, 401
+
+        directory = current_app.config.get("METRICS_MULTIPROC_DIR")
+        if not directory:
+            body = metrics.prometheus(pid=os.getpid())
+        else:
+            write_snapshot(directory, force=True)
+            body = RequestMetrics.from_snapshots(read_snapshots(directory)).prometheus()
+        return Response(body, mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,145 @@
+# backend/utils/startup_bench.py
+"""
+Startup-time benchmark and regression check.
+
+    python -m utils.startup_bench            # profile + check budgets
+    python -m utils.startup_bench --runs 10 --top 25
+
+Three measurements, each in a fresh interpreter:
+
+  1. `python -X importtime -c "import app"` — total import time of the app
+     module and the slowest imports beneath it
+  2. time to first request — import, create_app(start_background_jobs=False)
+     and one GET /health through the test client
+  3. which of LAZY_MODULES got imported by (2); these SDKs must only be
+     loaded by the code paths that use them (geocoding, uploads, M-Pesa,
+     the scheduler)
+
+Exits with status 1 when the median import or first-request time is over
+its budget (--import-budget-ms / --first-request-budget-ms, or the
+STARTUP_IMPORT_BUDGET_MS / STARTUP_FIRST_REQUEST_BUDGET_MS environment
+variables), or when a lazy module was loaded at startup. The budgets leave
+headroom over a laptop run; tighten them for a known CI machine.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy SDKs that must not be imported just by starting the app
+LAZY_MODULES = [
+    "geopy",          # utils/location_utils.py
+    "cloudinary",     # utils/cloudinary_helper.py
+    "requests",       # utils/mpesa.py (and geopy)
+    "apscheduler",    # app.start_scheduler
+    "stripe",
+    "paypalrestsdk",
+]
+
+DEFAULT_IMPORT_BUDGET_MS = 600
+DEFAULT_FIRST_REQUEST_BUDGET_MS = 1000
+
+_FIRST_REQUEST_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app(start_background_jobs=False)
+created = time.perf_counter()
+status = app.test_client().get("/health").status_code
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (done - created) * 1000,
+    "total_ms": (done - started) * 1000,
+    "status": status,
+    "lazy_loaded": [m for m in %r if m in sys.modules]
+}))
+""" % (LAZY_MODULES,)
+
+
+def _python(args):
+    return subprocess.run(
+        [sys.executable] + args, cwd=BACKEND_DIR,
+        capture_output=True, text=True, check=True
+    )
+
+
+def import_profile(top):
+    """Parse one -X importtime run; returns (total_ms, slowest imports)"""
+    stderr = _python(["-X", "importtime", "-c", "import app"]).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_part, cumulative_part, name = line.split("|")
+        rows.append((name.strip(), int(self_part.split(":")[1]), int(cumulative_part)))
+    total_ms = next((cum for name, _, cum in rows if name == "app"), 0) / 1000
+    slowest = sorted(rows, key=lambda r: r[2], reverse=True)
+    return total_ms, [
+        {"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cum / 1000, 1)}
+        for name, self_us, cum in slowest[1:top + 1]
+    ]
+
+
+def first_request():
+    return json.loads(_python(["-c", _FIRST_REQUEST_SNIPPET]).stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and check app startup time")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--import-budget-ms", type=float, default=float(
+        os.getenv("STARTUP_IMPORT_BUDGET_MS", DEFAULT_IMPORT_BUDGET_MS)))
+    parser.add_argument("--first-request-budget-ms", type=float, default=float(
+        os.getenv("STARTUP_FIRST_REQUEST_BUDGET_MS", DEFAULT_FIRST_REQUEST_BUDGET_MS)))
+    args = parser.parse_args()
+
+    import_times = []
+    slowest = []
+    for _ in range(args.runs):
+        total_ms, slowest = import_profile(args.top)
+        import_times.append(total_ms)
+
+    runs = [first_request() for _ in range(args.runs)]
+    lazy_loaded = sorted({m for run in runs for m in run["lazy_loaded"]})
+
+    report = {
+        "import_ms_median": round(statistics.median(import_times), 1),
+        "first_request": {
+            key: round(statistics.median(run[key] for run in runs), 1)
+            for key in ("import_ms", "create_app_ms", "first_request_ms", "total_ms")
+        },
+        "lazy_modules_loaded": lazy_loaded,
+        "slowest_imports": slowest,
+        "budgets": {
+            "import_ms": args.import_budget_ms,
+            "first_request_total_ms": args.first_request_budget_ms
+        }
+    }
+
+    failures = []
+    if report["import_ms_median"] > args.import_budget_ms:
+        failures.append(f"import time {report['import_ms_median']}ms > {args.import_budget_ms}ms")
+    if report["first_request"]["total_ms"] > args.first_request_budget_ms:
+        failures.append(f"time to first request {report['first_request']['total_ms']}ms "
+                        f"> {args.first_request_budget_ms}ms")
+    if any(run["status"] != 200 for run in runs):
+        failures.append("GET /health did not return 200")
+    if lazy_loaded:
+        failures.append(f"imported at startup: {', '.join(lazy_loaded)}")
+    report["failures"] = failures
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+# wsgi.py
+# Production entry point. gunicorn imports `app` from here:
+#
+#     gunicorn -c gunicorn.conf.py wsgi:app
+#
+# The app is built without background jobs: with preload_app the master
+# process imports this module once before forking, and a scheduler started
+# here would run in the master (whose threads do not survive the fork) rather
+# than in a worker. gunicorn.conf.py starts it in exactly one worker instead.
+
+from app import create_app
+
+app = create_app(start_background_jobs=False)
@@ -199,11 +199,20 @@ export class AuthService {
     );
   }
 
-  /** Change the password for an already-logged-in user. */
-  changePassword(currentPassword: string, newPassword: string): Observable<{message: string}> {
-    return this.http.post<{message: string}>(
+  /**
+   * Change the password for an already-logged-in user. The backend signs out
+   * every existing session, so keep this one going with the fresh token it returns.
+   */
+  changePassword(currentPassword: string, newPassword: string): Observable<{message: string; access_token: string}> {
+    return this.http.post<{message: string; access_token: string}>(
       `${this.API_URL}/change-password`,
       { current_password: currentPassword, new_password: newPassword }
+    ).pipe(
+      tap(response => {
+        if (response.access_token) {
+          localStorage.setItem('token', response.access_token);
+        }
+      })
     );
   }
 }
\ No newline at end of file